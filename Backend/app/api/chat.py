@@ -1,154 +1,276 @@
+import json
 from fastapi import APIRouter, HTTPException
-from app.services.llm.llm import llm
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.agents import create_tool_calling_agent, AgentExecutor
-from app.services.llm.prompt import PROMPT
-from app.services.llm.agent import TOOLS, TOOLS_DESC
-from app.db.mongoDB.mongo import topics_collection
+from fastapi.responses import StreamingResponse
+from app.services.llm.executor import get_agent_executor
+from app.services.llm.retrieval import cache_stats, aembed_query, normalize_query
+from app.services.llm.answer_cache import answer_cache
+from app.services.llm.memory import normalize_messages, load_history, schedule_summary
+from app.db.mongoDB.mongo import async_topics_collection, async_repos_collection
+from app.core.config import (
+    ANSWER_CACHE_ENABLED, SSE_TOOL_PREVIEW_CHARS, TOPIC_MESSAGES_PAGE_SIZE, TOPIC_MESSAGES_MAX_PAGE_SIZE
+)
 from bson import ObjectId
 
 router = APIRouter()
 
 
-def normalize_messages(messages: list) -> list[dict]:
+@router.get("/retrieval/cache")
+async def get_retrieval_cache_stats():
     """
-    Ensure all messages are dicts with {role, content}.
-    Flattens any accidental nested arrays.
+    Hit rates of the in-process caches used by the get_context tool and of the answer cache.
     """
-    normalized = []
-    for msg in messages:
-        if isinstance(msg, dict):
-            normalized.append({
-                "role": msg.get("role"),
-                "content": msg.get("content")
-            })
-        elif isinstance(msg, list):  # handle bad nested arrays
-            for inner in msg:
-                if isinstance(inner, dict):
-                    normalized.append({
-                        "role": inner.get("role"),
-                        "content": inner.get("content")
-                    })
-    return normalized
+    return {**cache_stats(), "answers": answer_cache.stats()}
 
 
-@router.post("/{owner}/{repo_name}/{topic_id}")
-def chat_about_repo(owner: str, repo_name: str, topic_id: str, query: str):
+async def _ingested_commit(owner: str, repo_name: str) -> str | None:
+    """Commit the repo's index was last built from, or None if it was never ingested."""
+    if async_repos_collection is None:
+        return None
+    repo = await async_repos_collection.find_one({"repo_name": repo_name, "repo_owner": owner}, {"_id": 0, "commit_sha": 1})
+    return repo.get("commit_sha") if repo else None
+
+
+def _require_topics_db():
+    if async_topics_collection is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Database connection failed. Please check MongoDB configuration."
+        )
+
+
+async def _load_conversation(owner: str, repo_name: str, topic_id: str) -> list[dict]:
     """
-    Chat with the LLM about a repo and save conversation into MongoDB.
+    Bounded history of an existing topic (rolling summary + recent turns);
+    empty for topic_id 'new'.
     """
-    # Check if MongoDB is available
-    if topics_collection is None:
+    if topic_id == "new":
+        return []
+    try:
+        return await load_history(owner, repo_name, topic_id)
+    except Exception as e:
         raise HTTPException(
-            status_code=503, 
-            detail="Database connection failed. Please check MongoDB configuration."
+            status_code=500,
+            detail=f"Failed to retrieve conversation history: {str(e)}"
         )
-    
-    # Build conversation history
-    conversation = []
-    if topic_id != "new":
-        try:
-            topic = topics_collection.find_one(
-                {"_id": ObjectId(topic_id), "owner": owner, "repo_name": repo_name}
-            )
-            if topic and "messages" in topic:
-                conversation = normalize_messages(topic["messages"])
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to retrieve conversation history: {str(e)}"
-            )
-
-    # Prompt setup
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", PROMPT),
-        MessagesPlaceholder("conversation"),
-        ("human", "{query}"),
-        MessagesPlaceholder("agent_scratchpad"),
-    ])
-
-    # Create agent
-    agent = create_tool_calling_agent(
-        llm=llm,
-        prompt=prompt,
-        tools=TOOLS
-    )
 
-    agent_executor = AgentExecutor(
-        agent=agent,
-        tools=TOOLS,
-        verbose=True
-    )
 
-    # Run agent safely
+async def _lookup_cached_answer(owner: str, repo_name: str, query: str, conversation: list, use_cache: bool):
+    """
+    A first question has no history to depend on, so an earlier answer to the
+    same question about the same commit can be reused.
+    Returns: (cached answer dict or None, cache key or None, query vector or None);
+             the key and vector are set when a fresh answer should be stored
+    """
+    if not ANSWER_CACHE_ENABLED or not use_cache or conversation:
+        return None, None, None
     try:
-        raw_res = agent_executor.invoke({
-            "query": query,
-            "conversation": conversation,
-            "TOOLS_DESC": TOOLS_DESC,
-            "collection_name": f"{owner}_{repo_name}",
-            'owner_repo': f"{owner}"
-        })
-        answer = raw_res.get("output", str(raw_res))
+        commit_sha = await _ingested_commit(owner, repo_name)
+        if not commit_sha:
+            return None, None, None
+        cache_key = (f"{owner}_{repo_name}", commit_sha)
+        query_vector = await aembed_query(normalize_query(query))
+        return answer_cache.lookup(cache_key, query_vector), cache_key, query_vector
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"LLM Error: {str(e)}")
+        print(f"Answer cache lookup failed: {e}")
+        return None, None, None
+
+
+def _agent_inputs(owner: str, repo_name: str, query: str, conversation: list) -> dict:
+    return {
+        "query": query,
+        "conversation": conversation,
+        "collection_name": f"{owner}_{repo_name}",
+        'owner_repo': f"{owner}"
+    }
 
+
+async def _save_exchange(owner: str, repo_name: str, topic_id: str, query: str, answer) -> str:
+    """Store the question and answer, creating the topic for 'new'. Returns: The topic id"""
+    messages = [
+        {"role": "human", "content": query},
+        {"role": "ai", "content": answer}
+    ]
     # Save new topic
     if topic_id == "new":
         new_topic = {
             "owner": owner,
             "repo_name": repo_name,
             "topic_name": query[:50],  # first few words as title
-            "messages": [
-                {"role": "human", "content": query},
-                {"role": "ai", "content": answer}
-            ]
-        }
-        result = topics_collection.insert_one(new_topic)
-        return {
-            "topic_id": str(result.inserted_id),
-            "response": answer
+            "messages": messages
         }
+        result = await async_topics_collection.insert_one(new_topic)
+        return str(result.inserted_id)
 
     # Update existing topic
-    topics_collection.update_one(
+    await async_topics_collection.update_one(
         {"_id": ObjectId(topic_id)},
-        {"$push": {"messages": [
-            {"role": "human", "content": query},
-            {"role": "ai", "content": answer}
-        ]}}
+        {"$push": {"messages": {"$each": messages}}}
     )
+    schedule_summary(owner, repo_name, topic_id)
+    return topic_id
+
+
+@router.post("/{owner}/{repo_name}/{topic_id}")
+async def chat_about_repo(owner: str, repo_name: str, topic_id: str, query: str, use_cache: bool = True):
+    """
+    Chat with the LLM about a repo and save conversation into MongoDB.
+    The first question of a topic may be answered from the semantic answer
+    cache when someone asked the same thing about the same commit before;
+    pass use_cache=false to always run the agent.
+    """
+    # Check if MongoDB is available
+    _require_topics_db()
+
+    # Build conversation history
+    conversation = await _load_conversation(owner, repo_name, topic_id)
+
+    cached, cache_key, query_vector = await _lookup_cached_answer(owner, repo_name, query, conversation, use_cache)
+    if cached is not None:
+        answer = cached["answer"]
+    else:
+        # Run agent safely
+        try:
+            raw_res = await get_agent_executor().ainvoke(_agent_inputs(owner, repo_name, query, conversation))
+            answer = raw_res.get("output", str(raw_res))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"LLM Error: {str(e)}")
+
+        if cache_key is not None:
+            answer_cache.store(cache_key, query, query_vector, answer)
+
     return {
-        "topic_id": topic_id,
-        "response": answer
+        "topic_id": await _save_exchange(owner, repo_name, topic_id, query, answer),
+        "response": answer,
+        "cached": cached is not None
     }
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _text_of(content) -> str:
+    """Text of a message chunk; Gemini may send a list of parts instead of a string."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            part if isinstance(part, str) else part.get("text", "")
+            for part in content
+            if isinstance(part, (str, dict))
+        )
+    return ""
+
+
+def _preview(value, limit: int = SSE_TOOL_PREVIEW_CHARS) -> str:
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+@router.post("/{owner}/{repo_name}/{topic_id}/stream")
+async def stream_chat_about_repo(owner: str, repo_name: str, topic_id: str, query: str, use_cache: bool = True):
+    """
+    Same as chat_about_repo, but answers as server-sent events while the agent runs:
+
+        event: tool_start  data: {"name", "input"}
+        event: tool_end    data: {"name", "output"}      (output is a short preview)
+        event: token       data: {"text"}                (answer text as it is generated)
+        event: done        data: {"topic_id", "response", "cached"}
+        event: error       data: {"detail"}
+
+    The conversation is saved once the answer is complete, right before 'done'.
+    """
+    _require_topics_db()
+    conversation = await _load_conversation(owner, repo_name, topic_id)
+    cached, cache_key, query_vector = await _lookup_cached_answer(owner, repo_name, query, conversation, use_cache)
+
+    async def events():
+        answer = cached["answer"] if cached is not None else None
+        if answer is not None:
+            yield _sse("token", {"text": _text_of(answer)})
+        else:
+            streamed = []
+            try:
+                async for event in get_agent_executor().astream_events(
+                    _agent_inputs(owner, repo_name, query, conversation), version="v2"
+                ):
+                    kind = event["event"]
+                    if kind == "on_chat_model_stream":
+                        text = _text_of(event["data"]["chunk"].content)
+                        if text:
+                            streamed.append(text)
+                            yield _sse("token", {"text": text})
+                    elif kind == "on_tool_start":
+                        yield _sse("tool_start", {"name": event["name"], "input": event["data"].get("input")})
+                    elif kind == "on_tool_end":
+                        yield _sse("tool_end", {"name": event["name"], "output": _preview(event["data"].get("output"))})
+                    elif kind == "on_chain_end" and not event.get("parent_ids"):
+                        output = event["data"].get("output")
+                        answer = output.get("output") if isinstance(output, dict) else output
+            except Exception as e:
+                yield _sse("error", {"detail": f"LLM Error: {str(e)}"})
+                return
+            if answer is None:
+                answer = "".join(streamed)
+            if cache_key is not None:
+                answer_cache.store(cache_key, query, query_vector, answer)
+
+        try:
+            saved_topic_id = await _save_exchange(owner, repo_name, topic_id, query, answer)
+        except Exception as e:
+            yield _sse("error", {"detail": f"Failed to save conversation: {str(e)}"})
+            return
+        yield _sse("done", {"topic_id": saved_topic_id, "response": answer, "cached": cached is not None})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Proxies must not buffer the stream or the first token arrives with the last
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{owner}/{repo_name}/{topic_id}/messages")
-def get_topic_messages(owner: str, repo_name: str, topic_id: str):
+async def get_topic_messages(owner: str, repo_name: str, topic_id: str, before: int | None = None,
+                             limit: int = TOPIC_MESSAGES_PAGE_SIZE):
     """
-    Get all messages of a topic from MongoDB.
+    A page of a topic's messages, newest page first. Messages are addressed by
+    their position in the topic; `before` returns the ones before that position
+    and `next_before` is the cursor for the page older than this one (None on
+    the first page of the topic). Only the page is read from MongoDB.
     """
+    limit = max(1, min(limit, TOPIC_MESSAGES_MAX_PAGE_SIZE))
     try:
-        topic = topics_collection.find_one(
-            {
-                "_id": ObjectId(topic_id),
-                "owner": owner,
-                "repo_name": repo_name
-            },
-            {"_id": 1, "messages": 1, "topic_name": 1}
-        )
+        query = {"_id": ObjectId(topic_id), "owner": owner, "repo_name": repo_name}
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid topic ID")
 
-    if not topic:
-        raise HTTPException(status_code=404, detail="Topic not found")
-
-    # Normalize stored messages
-    messages = normalize_messages(topic.get("messages", []))
+    try:
+        # The size first, then just the page: neither query transfers the whole array
+        # AsyncCollection.aggregate is a coroutine that returns the cursor
+        sizes = await (await async_topics_collection.aggregate([
+            {"$match": query},
+            {"$project": {"topic_name": 1, "total": {"$size": {"$ifNull": ["$messages", []]}}}},
+        ])).to_list(None)
+        if not sizes:
+            raise HTTPException(status_code=404, detail="Topic not found")
+        total = sizes[0]["total"]
+        end = total if before is None else max(0, min(before, total))
+        start = max(0, end - limit)
+        messages = []
+        if end > start:
+            page = await async_topics_collection.find_one(query, {"messages": {"$slice": [start, end - start]}})
+            messages = normalize_messages(page.get("messages", [])) if page else []
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve messages: {str(e)}")
 
     return {
-        "topic_id": str(topic["_id"]),
-        "topic_name": topic.get("topic_name", ""),
-        "messages": messages
+        "topic_id": topic_id,
+        "topic_name": sizes[0].get("topic_name", ""),
+        "messages": messages,
+        "total": total,
+        "start": start,
+        "next_before": start or None
     }
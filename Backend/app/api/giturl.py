@@ -1,15 +1,13 @@
 from fastapi import APIRouter,HTTPException
 from pydantic import BaseModel
-import requests
-import os
-import uuid
-from app.db.mongoDB.mongo import repos_collection
-from app.db.qdrant.qdrant_setup import client
-from qdrant_client.models import VectorParams, Distance, PointStruct
-from app.utils.embeddor import create_embedding
+from bson.errors import InvalidId
+from app.core.config import REPO_LIST_PAGE_SIZE, REPO_LIST_MAX_PAGE_SIZE
+from app.db.mongoDB.mongo import async_repos_collection, async_jobs_collection
+from app.services.github.fetcher import GitHubFetchError
+from app.services.ingestion.catalog import SORTS, STATUSES, list_repos, list_repo_names, serialize_repo
+from app.services.ingestion.ingest import get_default_branch, RepoNotFound
+from app.services.ingestion.jobs import submit_job, get_job, list_jobs, cancel_job, serialize_job
 router = APIRouter()
-import datetime
-import time
 
 
 
@@ -19,186 +17,136 @@ class GitURLInput(BaseModel):
     owner: str
     repo: str
 
-def fetch_and_save(owner, repo, path="", local_dir=None, branch="main", base_repos_dir="Repos"):
-    """
-    Recursively fetch files from GitHub repo and save locally
-    """
-    base_url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}?ref={branch}"
-    response = requests.get(base_url)
-
-    if response.status_code == 404:
-        print(f"404 Not Found: {base_url}")
-        return
-    elif response.status_code != 200:
-        print(f"Failed ({response.status_code}): {response.text}")
-        return
-
-    contents = response.json()
-    if local_dir is None:
-        # Create the repo directory inside the Repos folder
-        repo_name = f"{owner}_{repo}"
-        local_dir = os.path.join(base_repos_dir, repo_name)
-
-    os.makedirs(local_dir, exist_ok=True)
-
-    for item in contents:
-        item_path = item["path"]
-        if item["type"] == "file":
-            file_resp = requests.get(item["download_url"])
-            if file_resp.status_code == 200:
-                file_local_path = os.path.join(local_dir, os.path.basename(item_path))
-                with open(file_local_path, "w", encoding="utf-8") as f:
-                    f.write(file_resp.text)
-                print("Saved file:", file_local_path)
-        elif item["type"] == "dir":
-            new_local_dir = os.path.join(local_dir, os.path.basename(item_path))
-            fetch_and_save(owner, repo, item_path, new_local_dir, branch, base_repos_dir)
-
-def create_embeddings(folder_name: str, chunk_size: int = 500, chunk_overlap: int = 50):
-    """
-    Embed every file in the folder structure, breaking large files into chunks.
-    
-    Args:
-        folder_name: Root folder of the downloaded repo.
-        chunk_size: Number of characters per chunk.
-        chunk_overlap: Number of overlapping characters between chunks.
-    """
-    # Create a Qdrant collection for this repo
-    collection = folder_name
-
-    if not client.collection_exists(collection_name=collection):
-        client.create_collection(
-            collection_name=collection,
-            vectors_config= VectorParams(
-                size=3072,
-                distance=Distance.COSINE
-            )
-        )
-
-    # Define excluded extensions (images, pdf, office docs, etc)
-    excluded_exts = {
-        '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg', '.webp', '.ico', '.pdf',
-        '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.odt', '.ods', '.odp', '.rtf', '.zip', '.rar', '.7z', '.tar', '.gz', '.mp3', '.mp4', '.avi', '.mov', '.mkv', '.exe', '.dll'
-    }
-    # Walk through all files recursively
-    for root, dirs, files in os.walk(folder_name):
-        for file_name in files:
-            file_path = os.path.join(root, file_name)
-            ext = os.path.splitext(file_path)[1].lower()
-            if ext in excluded_exts:
-                continue
-            try:
-                # Read file content
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read()
-
-                if not content.strip():
-                    continue  # skip empty files
-
-                # Break content into chunks
-                start = 0
-                chunks = []
-                while start < len(content):
-                    end = min(start + chunk_size, len(content))
-                    chunk = content[start:end]
-                    chunks.append(chunk)
-                    start += chunk_size - chunk_overlap  # move start with overlap
-
-                # Embed and store each chunk
-                for i, chunk in enumerate(chunks):
-                    time.sleep(0.2)
-                    embedding = create_embedding(chunk)  # or embeddor.encode(chunk)
-                    client.upsert(
-                        collection_name=collection,
-                        points=[
-                            PointStruct(
-                                id=str(uuid.uuid4()),
-                                vector=embedding,
-                                payload={
-                                    "text" : chunk,
-                                    "chunk" : i
-                                }
-                            )
-                        ]
-                    )
-
-                print(f"Embedded {len(chunks)} chunks for: {file_path}")
-
-            except Exception as e:
-                print(f"Failed to embed {file_path}: {e}")
-
 
+def _require_jobs_db():
+    if async_repos_collection is None or async_jobs_collection is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Database connection failed. Please check MongoDB configuration."
+        )
 
 
 @router.post(
     "/fetch_repo",
     summary="Download a GitHub Repository",
     description="""
-    This endpoint downloads all files from a GitHub repository.
+    This endpoint starts a background job that downloads and embeds a GitHub repository.
+    It returns immediately with a job ID; poll `/jobs/{job_id}` for progress.
 
     - **owner** → GitHub username or organization  
     - **repo** → Repository name  
-    - **token** → Optional GitHub Personal Access Token (for private repos)
     """,
-    response_model=GitURLInput
+    status_code=202
 )
-def work_on_repo(data: GitURLInput):
-    print("getting repo")
+async def work_on_repo(data: GitURLInput):
     # Ensure DB is available
-    if repos_collection is None:
+    _require_jobs_db()
+    # Get repo info to detect default branch
+    try:
+        default_branch = await get_default_branch(data.owner, data.repo)
+    except RepoNotFound:
+        raise HTTPException(status_code=404, detail="Repository not found")
+    except GitHubFetchError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    try:
+        job = await submit_job(data.owner, data.repo, default_branch)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to start ingestion: {str(e)}")
+
+    return {
+        "message": f"Ingestion of '{data.repo}' started",
+        "job_id": str(job["_id"]),
+        "job_status": job["status"]
+    }
+
+
+@router.get("/jobs")
+async def get_jobs(owner: str | None = None, repo: str | None = None, limit: int = 20):
+    """
+    List recent ingestion jobs, newest first.
+    """
+    _require_jobs_db()
+    return [serialize_job(job) for job in await list_jobs(owner, repo, min(max(limit, 1), 100))]
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """
+    Status and per-stage progress (files fetched, chunks embedded, points upserted, bytes, ETA) of a job.
+    """
+    _require_jobs_db()
+    try:
+        job = await get_job(job_id)
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid job ID")
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return serialize_job(job)
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_ingestion(job_id: str):
+    """
+    Cancel a queued or running job. Running jobs stop at their next checkpoint.
+    """
+    _require_jobs_db()
+    try:
+        job = await cancel_job(job_id)
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid job ID")
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return serialize_job(job)
+
+
+@router.get("/repos")
+async def get_repo_catalogue(owner: str | None = None, status: str | None = None, sort: str = "updated_at",
+                             order: str = "desc", offset: int = 0, limit: int = REPO_LIST_PAGE_SIZE):
+    """
+    Ingested repositories with their commit, ingestion status, file/chunk/byte counts,
+    embedding model and timings. Filter by owner and/or status, sort by updated_at,
+    added_at or name (owner/repo), and page with offset/limit using next_offset.
+    """
+    if async_repos_collection is None:
         raise HTTPException(
             status_code=503,
             detail="Database connection failed. Please check MongoDB configuration."
         )
-    # Get repo info to detect default branch
-    repo_url = f"https://api.github.com/repos/{data.owner}/{data.repo}"
-    repo_resp = requests.get(repo_url)
-    print("reponse",repo_resp.status_code)
-    if repo_resp.status_code == 404:
-        raise HTTPException(status_code=404, detail="Repository not found")
-    elif repo_resp.status_code != 200:
-        raise HTTPException(status_code=repo_resp.status_code, detail=repo_resp.text)
-
-    default_branch = repo_resp.json().get("default_branch", "main")
-
-    # Fetch and save files
-    dir_name = f"{data.owner}_{data.repo}"
-    repos_base_dir = "Repos"
-    full_repo_path = os.path.join(repos_base_dir, dir_name)
-    
-    fetch_and_save(
-        owner=data.owner,
-        repo=data.repo,
-        branch=default_branch,
-        local_dir=full_repo_path,
-        base_repos_dir=repos_base_dir
-    )
-    # Insert repo record
+    if sort not in SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(SORTS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
+    if status is not None and status not in STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(STATUSES)}")
+    offset = max(offset, 0)
+    limit = min(max(limit, 1), REPO_LIST_MAX_PAGE_SIZE)
     try:
-        repos_collection.insert_one({'repo_name':data.repo,"repo_owner":data.owner})
+        repos, total = await list_repos(owner, status, sort, order == "desc", offset, limit)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save repo metadata: {str(e)}")
-    create_embeddings(folder_name=full_repo_path)
-
-    return {"status": 200, "message": f"Repository '{data.repo}' downloaded successfully"}
+        raise HTTPException(status_code=500, detail=f"Failed to fetch repos: {str(e)}")
+    return {
+        "repos": [serialize_repo(r) for r in repos],
+        "total": total,
+        "offset": offset,
+        "next_offset": offset + limit if offset + limit < total else None,
+    }
 
 
 @router.get("/get_repos")
-def get_repos():
-    if repos_collection is None:
+async def get_repos():
+    if async_repos_collection is None:
         raise HTTPException(
             status_code=503,
             detail="Database connection failed. Please check MongoDB configuration."
         )
     try:
-        repos = repos_collection.find({}, {"_id": 0})  # exclude _id
-        if not repos:
-            return []
+        repos = await list_repo_names()
         return [
             {
                 "owner": r.get("repo_owner"),
                 "repo": r.get("repo_name"),
-                "addedAt": datetime.datetime.utcnow().isoformat()
+                "addedAt": r["added_at"].isoformat() if r.get("added_at") else None
             }
             for r in repos
         ]
@@ -1,12 +1,25 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import chat, giturl
+from app.services.ingestion.catalog import ensure_repo_catalog
+from app.services.ingestion.jobs import resume_jobs
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ensure_repo_catalog()
+    # Pick up ingestion jobs interrupted by the last shutdown
+    resume_jobs()
+    yield
+
 
 # Create app instance
 app = FastAPI(
     title="GitDocs Backend",
     description="This project gives awesome",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Allow CORS
@@ -8,7 +8,100 @@ MONGODB_CONNECTION_STRING=os.getenv("MONGODB_CONNECTION_STRING")
 AZURE_OPENAI_ENDPOINT=os.getenv('AZURE_OPENAI_ENDPOINT')
 AZURE_OPENAI_API_KEY=os.getenv('AZURE_OPENAI_API_KEY')
 GROQ_API_KEY=os.getenv('GROQ_API_KEY')
+VECTOR_STORE = os.getenv("VECTOR_STORE", "qdrant").lower()  # values: qdrant|local
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 QDRANT_ENDPOINT = os.getenv("QDRANT_ENDPOINT")
+QDRANT_UPLOAD_BATCH_SIZE = int(os.getenv("QDRANT_UPLOAD_BATCH_SIZE", "256"))
+QDRANT_UPLOAD_PARALLEL = int(os.getenv("QDRANT_UPLOAD_PARALLEL", "2"))
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "scalar").lower()  # values: none|scalar|binary
+QDRANT_VECTORS_ON_DISK = os.getenv("QDRANT_VECTORS_ON_DISK", "true").lower() == "true"  # originals on disk, quantized in RAM
+QDRANT_RESCORE = os.getenv("QDRANT_RESCORE", "true").lower() == "true"  # re-rank quantized hits with the originals
+QDRANT_OVERSAMPLING = float(os.getenv("QDRANT_OVERSAMPLING", "2.0"))  # candidates fetched per result before rescoring
 
+# GitHub ingestion
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+GITHUB_INGEST_MODE = os.getenv("GITHUB_INGEST_MODE", "archive").lower()  # values: archive|tree
+GITHUB_FETCH_CONCURRENCY = int(os.getenv("GITHUB_FETCH_CONCURRENCY", "16"))
+GITHUB_MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "5"))
+REPOS_DIR = os.getenv("REPOS_DIR", "Repos")
+INDEX_DIR = os.getenv("INDEX_DIR", "Indexes")  # per-repo manifests and indexes
+INGEST_MAX_FILE_BYTES = int(os.getenv("INGEST_MAX_FILE_BYTES", str(1024 * 1024)))
+INGEST_MAX_CONCURRENT_JOBS = int(os.getenv("INGEST_MAX_CONCURRENT_JOBS", "2"))
+INGEST_PROGRESS_INTERVAL = float(os.getenv("INGEST_PROGRESS_INTERVAL", "2"))  # seconds between job state writes
+INGEST_CHUNK_WORKERS = int(os.getenv("INGEST_CHUNK_WORKERS", "2"))
+INGEST_FILE_QUEUE_SIZE = int(os.getenv("INGEST_FILE_QUEUE_SIZE", "32"))  # fetched files waiting to be chunked
+INGEST_CHUNK_QUEUE_SIZE = int(os.getenv("INGEST_CHUNK_QUEUE_SIZE", "2048"))  # chunks waiting to be batched
+INGEST_BATCH_QUEUE_SIZE = int(os.getenv("INGEST_BATCH_QUEUE_SIZE", "8"))  # batches waiting to be embedded/upserted
+INGEST_BATCH_LINGER = float(os.getenv("INGEST_BATCH_LINGER", "0.5"))  # seconds before a partial batch is sent
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "400"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "40"))  # only used when a block must be cut mid-way
 
+# Embeddings
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "azure").lower()  # values: azure|local
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-large")
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "0"))  # Matryoshka truncation, 0 keeps the model's full size
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(INDEX_DIR, "embedding_cache.sqlite3"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000"))  # 0 disables the cache
+EMBEDDING_BATCH_MAX_ITEMS = int(os.getenv("EMBEDDING_BATCH_MAX_ITEMS", "256"))
+EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "60000"))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))  # batches in flight
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "6"))
+EMBEDDING_RPM = float(os.getenv("EMBEDDING_RPM", "2100"))
+EMBEDDING_TPM = float(os.getenv("EMBEDDING_TPM", "350000"))
+EMBEDDING_LOCAL_MODEL = os.getenv("EMBEDDING_LOCAL_MODEL", "BAAI/bge-small-en-v1.5")  # any sentence-transformers model
+EMBEDDING_LOCAL_DEVICE = os.getenv("EMBEDDING_LOCAL_DEVICE", "cpu")
+EMBEDDING_LOCAL_BATCH_SIZE = int(os.getenv("EMBEDDING_LOCAL_BATCH_SIZE", "64"))
+EMBEDDING_LOCAL_THREADS = int(os.getenv("EMBEDDING_LOCAL_THREADS", "0"))  # 0 uses every core
+
+# Local vector store (VECTOR_STORE=local), kept under INDEX_DIR/<owner_repo>/vectors
+LOCAL_STORE_DTYPE = os.getenv("LOCAL_STORE_DTYPE", "float32").lower()  # values: float32|float16
+LOCAL_STORE_MAX_SEGMENTS = int(os.getenv("LOCAL_STORE_MAX_SEGMENTS", "16"))  # compact beyond this many files
+LOCAL_STORE_COMPACT_RATIO = float(os.getenv("LOCAL_STORE_COMPACT_RATIO", "0.3"))  # ...or this share of deleted rows
+
+# Retrieval
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"  # BM25 + vector, fused; false is vector only
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))  # hits taken from each leg before fusion
+RRF_K = int(os.getenv("RRF_K", "60"))  # reciprocal rank fusion constant
+RETRIEVAL_CACHE_TTL = float(os.getenv("RETRIEVAL_CACHE_TTL", "300"))  # seconds a cached query vector/result lives
+RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "1024"))  # per cache, 0 disables
+
+# Semantic answer cache for first questions in a topic (/api/chat)
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))  # cosine similarity needed for a hit
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "86400"))  # seconds
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2000"))  # LRU beyond this, 0 disables
+
+# Agent
+AGENT_VERBOSE = os.getenv("AGENT_VERBOSE", "false").lower() == "true"  # log every agent step to the console
+SSE_TOOL_PREVIEW_CHARS = int(os.getenv("SSE_TOOL_PREVIEW_CHARS", "300"))  # tool output shown in streamed tool_end events
+
+# Conversation memory (/api/chat): recent turns verbatim, older ones as a rolling summary on the topic
+HISTORY_MAX_TURNS = int(os.getenv("HISTORY_MAX_TURNS", "8"))  # question/answer pairs loaded from a topic
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "4000"))  # summary + recent messages; oldest dropped first
+HISTORY_SUMMARY_ENABLED = os.getenv("HISTORY_SUMMARY_ENABLED", "true").lower() == "true"
+HISTORY_SUMMARY_EVERY = int(os.getenv("HISTORY_SUMMARY_EVERY", "4"))  # turns folded into the summary per LLM call
+HISTORY_SUMMARY_MAX_WORDS = int(os.getenv("HISTORY_SUMMARY_MAX_WORDS", "250"))
+TOPIC_MESSAGES_PAGE_SIZE = int(os.getenv("TOPIC_MESSAGES_PAGE_SIZE", "50"))  # default page of /messages
+TOPIC_MESSAGES_MAX_PAGE_SIZE = int(os.getenv("TOPIC_MESSAGES_MAX_PAGE_SIZE", "200"))
+
+# read_folder_structure tool
+FOLDER_LIST_PAGE_SIZE = int(os.getenv("FOLDER_LIST_PAGE_SIZE", "200"))  # entries per page when the agent gives no limit
+FOLDER_LIST_MAX_PAGE_SIZE = int(os.getenv("FOLDER_LIST_MAX_PAGE_SIZE", "500"))
+
+# read_files_content tool
+READ_FILE_MAX_BYTES = int(os.getenv("READ_FILE_MAX_BYTES", "65536"))  # per file; longer reads end with a continue note
+READ_CALL_MAX_BYTES = int(os.getenv("READ_CALL_MAX_BYTES", "196608"))  # all files of one call together
+
+# find_symbol / find_references tools
+SYMBOL_SEARCH_MAX_RESULTS = int(os.getenv("SYMBOL_SEARCH_MAX_RESULTS", "200"))  # cap on the limit the agent asks for
+
+# search_code tool
+SEARCH_CODE_PAGE_SIZE = int(os.getenv("SEARCH_CODE_PAGE_SIZE", "50"))  # matches per page when the agent gives no limit
+SEARCH_CODE_MAX_PAGE_SIZE = int(os.getenv("SEARCH_CODE_MAX_PAGE_SIZE", "200"))
+SEARCH_CODE_MAX_PER_FILE = int(os.getenv("SEARCH_CODE_MAX_PER_FILE", "20"))  # so one file can't fill a page
+SEARCH_CODE_MAX_CONTEXT = int(os.getenv("SEARCH_CODE_MAX_CONTEXT", "10"))  # lines around each match
+
+# Repository catalogue (/repos)
+REPO_LIST_PAGE_SIZE = int(os.getenv("REPO_LIST_PAGE_SIZE", "50"))
+REPO_LIST_MAX_PAGE_SIZE = int(os.getenv("REPO_LIST_MAX_PAGE_SIZE", "200"))
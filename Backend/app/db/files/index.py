@@ -0,0 +1,298 @@
+import bisect
+import fnmatch
+import hashlib
+import json
+import os
+import threading
+from app.core.config import INDEX_DIR, REPOS_DIR
+from app.utils.chunker import detect_language
+from app.utils.file_filters import should_skip
+
+
+def index_path(repo_key: str) -> str:
+    return os.path.join(INDEX_DIR, repo_key, "files.json")
+
+
+def git_blob_sha(data: bytes) -> str:
+    """The SHA GitHub's tree API reports for a file with this content."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def file_stats(rel_path: str, data: bytes, content: str | None = None) -> dict:
+    """
+    Size, language and line count of one file. `content` is the decoded text
+    when the caller has it already; binary and undecodable files count 0 lines.
+    """
+    if content is None:
+        try:
+            content = data.decode("utf-8")
+        except UnicodeDecodeError:
+            content = ""
+    lines = content.count("\n") + (1 if content and not content.endswith("\n") else 0)
+    return {"size": len(data), "language": detect_language(rel_path), "lines": lines}
+
+
+class FileIndex:
+    """
+    Every file of one ingested repo with its size, language, blob SHA and line count.
+
+    Stored as one JSON document of parallel columns sorted by path, with the
+    language names interned, so a large repo costs a few bytes per file. The
+    files of a folder are one contiguous slice of the sorted paths, found by
+    bisection; filters are applied while walking that slice and the walk
+    stops as soon as the page is full. Per-directory totals are added up
+    once, on first use.
+    """
+
+    def __init__(self, paths: list[str], sizes: list[int], languages: list[str], shas: list[str],
+                 lines: list[int]):
+        self.paths = paths
+        self.sizes = sizes
+        self.languages = languages
+        self.shas = shas
+        self.lines = lines
+        self._dirs = None  # sorted directory paths, built lazily
+        self._dir_totals = None  # directory -> [files, bytes, lines], including subdirectories
+        self._positions = None  # path -> position, built lazily
+        self._by_name = None  # file name -> positions
+
+    @classmethod
+    def from_files(cls, files: dict[str, dict]) -> "FileIndex":
+        """Build from {path: {"size", "language", "sha", "lines"}}."""
+        paths = sorted(files)
+        return cls(
+            paths,
+            [files[p].get("size", 0) for p in paths],
+            [files[p].get("language", "text") for p in paths],
+            [files[p].get("sha", "") for p in paths],
+            [files[p].get("lines", 0) for p in paths],
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "FileIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+        names = doc["language_names"]
+        return cls(doc["paths"], doc["sizes"], [names[i] for i in doc["languages"]], doc["shas"], doc["lines"])
+
+    def save(self, path: str):
+        """Write atomically so readers never see a half-written index."""
+        names = sorted(set(self.languages))
+        ids = {name: i for i, name in enumerate(names)}
+        doc = {
+            "language_names": names,
+            "paths": self.paths,
+            "sizes": self.sizes,
+            "languages": [ids[name] for name in self.languages],
+            "shas": self.shas,
+            "lines": self.lines,
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(doc, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def files(self) -> dict[str, dict]:
+        """{path: {"size", "language", "sha", "lines"}}, the input of from_files()."""
+        return {
+            path: {"size": size, "language": language, "sha": sha, "lines": lines}
+            for path, size, language, sha, lines in zip(self.paths, self.sizes, self.languages, self.shas, self.lines)
+        }
+
+    def entry(self, i: int) -> dict:
+        return {"path": self.paths[i], "language": self.languages[i], "lines": self.lines[i], "size": self.sizes[i]}
+
+    def _build_lookups(self):
+        by_name = {}
+        for i, path in enumerate(self.paths):
+            by_name.setdefault(path.rsplit("/", 1)[-1], []).append(i)
+        self._positions = {path: i for i, path in enumerate(self.paths)}
+        self._by_name = by_name
+
+    def position(self, path: str) -> int | None:
+        """Position of an exact repo-relative path, or None."""
+        if self._positions is None:
+            self._build_lookups()
+        return self._positions.get(path)
+
+    def match(self, path: str) -> list[int]:
+        """
+        Positions of the files a possibly partial path refers to: the exact
+        path if it exists, otherwise every file whose path ends with it
+        ('Button.tsx', 'components/Button.tsx'). Costs one hash lookup plus
+        the files sharing its name.
+        """
+        exact = self.position(path)
+        if exact is not None:
+            return [exact]
+        name = path.rsplit("/", 1)[-1]
+        suffix = "/" + path
+        return [i for i in self._by_name.get(name, []) if self.paths[i].endswith(suffix)]
+
+    def _range(self, sorted_paths: list[str], folder: str) -> tuple[int, int]:
+        if not folder:
+            return 0, len(sorted_paths)
+        prefix = folder + "/"
+        # '0' is the character right after '/', so this ends the range after the last path in the folder
+        return bisect.bisect_left(sorted_paths, prefix), bisect.bisect_left(sorted_paths, folder + "0")
+
+    def list_files(self, folder: str = "", pattern: str | None = None, max_depth: int | None = None,
+                   offset: int = 0, limit: int = 200) -> tuple[list[int], int | None]:
+        """
+        Files under a folder, in path order.
+        Args:
+            folder: Repo-relative folder, '' for the root.
+            pattern: Glob matched against the path relative to the folder; a
+                     pattern without '/' is matched against the file name only.
+            max_depth: 1 lists the folder's own files, 2 adds its subfolders' files, ...
+            offset: Matching files to skip.
+            limit: Page size.
+        Returns: (indexes of the files in this page, offset of the next page or None)
+        """
+        start, end = self._range(self.paths, folder)
+        skip = len(folder) + 1 if folder else 0
+        by_name = pattern is not None and "/" not in pattern
+        if pattern is None and max_depth is None:
+            page = list(range(start + offset, min(start + offset + limit, end)))
+            return page, (offset + limit if start + offset + limit < end else None)
+
+        page, matched = [], 0
+        for i in range(start, end):
+            rel = self.paths[i][skip:]
+            if max_depth is not None and rel.count("/") >= max_depth:
+                continue
+            if pattern is not None and not fnmatch.fnmatchcase(rel.rsplit("/", 1)[-1] if by_name else rel, pattern):
+                continue
+            matched += 1
+            if matched <= offset:
+                continue
+            if len(page) == limit:
+                return page, offset + limit
+            page.append(i)
+        return page, None
+
+    def _build_dirs(self):
+        totals = {"": [0, 0, 0]}
+        for path, size, lines in zip(self.paths, self.sizes, self.lines):
+            parts = path.split("/")[:-1]
+            for depth in range(len(parts) + 1):
+                total = totals.setdefault("/".join(parts[:depth]), [0, 0, 0])
+                total[0] += 1
+                total[1] += size
+                total[2] += lines
+        self._dir_totals = totals
+        self._dirs = sorted(d for d in totals if d)
+
+    def folder_totals(self, folder: str = "") -> dict | None:
+        """{"files", "bytes", "lines"} of a folder and everything below it, or None if it has no files."""
+        if self._dir_totals is None:
+            self._build_dirs()
+        total = self._dir_totals.get(folder)
+        return {"files": total[0], "bytes": total[1], "lines": total[2]} if total else None
+
+    def tree(self, folder: str = "", max_depth: int = 2, offset: int = 0,
+             limit: int = 200) -> tuple[list[dict], int | None]:
+        """
+        Subfolders of a folder down to max_depth levels, each with its totals.
+        Returns: ([{"path", "files", "bytes", "lines"}], offset of the next page or None)
+        """
+        if self._dirs is None:
+            self._build_dirs()
+        start, end = self._range(self._dirs, folder)
+        skip = len(folder) + 1 if folder else 0
+        page, matched = [], 0
+        for i in range(start, end):
+            directory = self._dirs[i]
+            if directory[skip:].count("/") >= max_depth:
+                continue
+            matched += 1
+            if matched <= offset:
+                continue
+            if len(page) == limit:
+                return page, offset + limit
+            page.append({"path": directory, **self.folder_totals(directory)})
+        return page, None
+
+    def language_counts(self, folder: str = "") -> dict[str, int]:
+        """Files per language under a folder, most common first."""
+        start, end = self._range(self.paths, folder)
+        counts = {}
+        for language in self.languages[start:end]:
+            counts[language] = counts.get(language, 0) + 1
+        return dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
+
+
+_indexes = {}  # repo_key -> (mtime_ns, FileIndex)
+_indexes_lock = threading.Lock()
+
+
+def save_file_index(repo_key: str, files: dict[str, dict]) -> FileIndex:
+    """Replace the repo's file index with {path: {"size", "language", "sha", "lines"}}."""
+    index = FileIndex.from_files(files)
+    path = index_path(repo_key)
+    index.save(path)
+    with _indexes_lock:
+        _indexes[repo_key] = (os.stat(path).st_mtime_ns, index)
+    return index
+
+
+def load_file_index(repo_key: str) -> FileIndex | None:
+    """The repo's file index from disk, or None if it was never built."""
+    try:
+        return FileIndex.load(index_path(repo_key))
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return None
+
+
+def build_file_index_from_disk(repo_key: str, folder: str) -> FileIndex:
+    """Index a repo downloaded before file indexes existed, from its files on disk."""
+    files = {}
+    for root, dirs, names in os.walk(folder):
+        for name in names:
+            rel_path = os.path.relpath(os.path.join(root, name), folder).replace(os.sep, "/")
+            if should_skip(rel_path):
+                continue
+            try:
+                with open(os.path.join(root, name), "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            files[rel_path] = {**file_stats(rel_path, data), "sha": git_blob_sha(data)}
+    return save_file_index(repo_key, files)
+
+
+def repo_file_index(repo_key: str) -> FileIndex | None:
+    """
+    The repo's file index; built from the local copy for repos ingested
+    before file indexes existed. None if the repo isn't downloaded.
+    """
+    index = get_file_index(repo_key)
+    if index is None:
+        repo_root = os.path.join(REPOS_DIR, repo_key)
+        if os.path.isdir(repo_root):
+            index = build_file_index_from_disk(repo_key, repo_root)
+    return index
+
+
+def get_file_index(repo_key: str) -> FileIndex | None:
+    """
+    The repo's file index, loaded once per process and reloaded when an
+    ingest rewrites it. None if the repo has none.
+    """
+    try:
+        mtime = os.stat(index_path(repo_key)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _indexes_lock:
+        cached = _indexes.get(repo_key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    index = load_file_index(repo_key)
+    if index is not None:
+        with _indexes_lock:
+            _indexes[repo_key] = (mtime, index)
+    return index
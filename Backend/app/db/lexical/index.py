@@ -0,0 +1,204 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from qdrant_client.models import ScoredPoint
+from app.core.config import INDEX_DIR
+from app.db.sqlite_transaction import transaction
+
+_WORD = re.compile(r"[A-Za-z0-9_]+")
+# Boundaries inside an identifier: fooBar, HTTPServer, utf8Decode
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+# Question words that would otherwise match every comment and docstring
+_QUERY_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i", "in",
+    "is", "it", "of", "on", "or", "the", "this", "to", "what", "where", "which", "who", "why", "with",
+}
+
+
+def code_terms(text: str) -> list[str]:
+    """
+    Lowercased search terms for code: every identifier as written plus its
+    camelCase / snake_case parts, so 'normalize_messages' and
+    'normalizeMessages' both match a query for 'normalize messages'.
+    """
+    terms = []
+    for word in _WORD.findall(text):
+        lower = word.lower().strip("_")
+        if not lower:
+            continue
+        terms.append(lower)
+        parts = [p.lower() for piece in word.split("_") for p in _CAMEL.findall(piece)]
+        if len(parts) > 1:
+            terms.extend(parts)
+    return terms
+
+
+def index_path(repo_key: str) -> str:
+    return os.path.join(INDEX_DIR, repo_key, "lexical.sqlite3")
+
+
+class LexicalIndex:
+    """
+    BM25 index over one repo's chunks, in an SQLite FTS5 table.
+
+    FTS5's own tokenizer doesn't know about identifiers, so chunks are run
+    through code_terms() first and the table only sees space-separated
+    terms. Rows carry the same point ID and payload as the vector store, so
+    results from both can be fused per point.
+
+    FTS5 can't index its UNINDEXED columns, so the point ID and path of each
+    row are also kept in the chunk_keys table, whose ID is the FTS rowid:
+    replacing a point or dropping a file's chunks is an index lookup plus
+    deletes by rowid, not a scan of the whole table.
+    """
+
+    # Relative BM25 weight of chunk text vs. the file path
+    TEXT_WEIGHT = 1.0
+    PATH_WEIGHT = 0.5
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+                point_id UNINDEXED,
+                path UNINDEXED,
+                payload UNINDEXED,
+                terms,
+                path_terms,
+                tokenize = 'unicode61 remove_diacritics 0 tokenchars ''_'''
+            )
+            """
+        )
+        has_keys = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunk_keys'"
+        ).fetchone()
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chunk_keys (id INTEGER PRIMARY KEY, point_id TEXT UNIQUE, path TEXT);
+            CREATE INDEX IF NOT EXISTS chunk_keys_path ON chunk_keys (path);
+        """)
+        if not has_keys:
+            # Index written before chunk_keys existed
+            self._conn.execute(
+                "INSERT OR IGNORE INTO chunk_keys (id, point_id, path) SELECT rowid, point_id, path FROM chunks"
+            )
+        # Set by clear(): nothing can be replaced until the next full ingest is done
+        self._empty = False
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def add(self, points: list):
+        """Index PointStructs (or anything with .id and .payload), replacing rows with the same ID."""
+        rows = [
+            (
+                str(point.id),
+                point.payload.get("path", ""),
+                json.dumps(point.payload),
+                " ".join(code_terms(point.payload.get("text", ""))),
+                " ".join(code_terms(point.payload.get("path", ""))),
+            )
+            for point in points
+        ]
+        with self._lock, transaction(self._conn):
+            for row in rows:
+                try:
+                    if self._empty:
+                        # Just cleared: no old row to look for
+                        row_id = self._conn.execute(
+                            "INSERT INTO chunk_keys (point_id, path) VALUES (?, ?)", row[:2]
+                        ).lastrowid
+                    else:
+                        row_id = self._replace_key(row[0], row[1])
+                except sqlite3.IntegrityError:
+                    # The same point added twice since the clear (a retried batch)
+                    row_id = self._replace_key(row[0], row[1])
+                self._conn.execute(
+                    "INSERT INTO chunks (rowid, point_id, path, payload, terms, path_terms) VALUES (?, ?, ?, ?, ?, ?)",
+                    (row_id, *row)
+                )
+
+    def _replace_key(self, point_id: str, path: str) -> int:
+        """Drop the point's old row, if any, and return the rowid for its new one."""
+        self._conn.execute(
+            "DELETE FROM chunks WHERE rowid = (SELECT id FROM chunk_keys WHERE point_id = ?)", (point_id,)
+        )
+        self._conn.execute("DELETE FROM chunk_keys WHERE point_id = ?", (point_id,))
+        return self._conn.execute("INSERT INTO chunk_keys (point_id, path) VALUES (?, ?)", (point_id, path)).lastrowid
+
+    def delete_paths(self, paths: list[str]):
+        with self._lock, transaction(self._conn):
+            for path in paths:
+                self._conn.execute(
+                    "DELETE FROM chunks WHERE rowid IN (SELECT id FROM chunk_keys WHERE path = ?)", (path,)
+                )
+                self._conn.execute("DELETE FROM chunk_keys WHERE path = ?", (path,))
+
+    def clear(self):
+        with self._lock:
+            with transaction(self._conn):
+                self._conn.execute("DELETE FROM chunks")
+                self._conn.execute("DELETE FROM chunk_keys")
+            self._empty = True
+
+    def done_loading(self):
+        """End the bulk load started by clear(); later adds check for the rows they replace."""
+        with self._lock:
+            self._empty = False
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def search(self, query: str, limit: int = 10, paths: list[str] | None = None) -> list[ScoredPoint]:
+        """
+        Best BM25 matches for any of the query's terms.
+        Returns: ScoredPoint list, best first; score is -bm25 (higher is better)
+        """
+        terms = list(dict.fromkeys(t for t in code_terms(query) if t not in _QUERY_STOPWORDS))
+        if not terms:
+            return []
+        match = " OR ".join(f'"{term}"' for term in terms)
+        sql = (
+            f"SELECT point_id, payload, bm25(chunks, 0, 0, 0, {self.TEXT_WEIGHT}, {self.PATH_WEIGHT}) AS rank "
+            "FROM chunks WHERE chunks MATCH ?"
+        )
+        params = [match]
+        if paths is not None:
+            if not paths:
+                return []
+            sql += f" AND path IN ({','.join('?' * len(paths))})"
+            params.extend(paths)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            ScoredPoint(id=point, version=0, score=-rank, payload=json.loads(payload))
+            for point, payload, rank in rows
+        ]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_lexical_index(repo_key: str) -> LexicalIndex:
+    """Open (once per process) the lexical index of a repo, creating it if needed."""
+    with _indexes_lock:
+        index = _indexes.get(repo_key)
+        if index is None:
+            index = _indexes[repo_key] = LexicalIndex(index_path(repo_key))
+        return index
+
+
+def lexical_index_exists(repo_key: str) -> bool:
+    return repo_key in _indexes or os.path.exists(index_path(repo_key))
@@ -0,0 +1,315 @@
+import json
+import os
+import shutil
+import threading
+import numpy as np
+from qdrant_client.models import ScoredPoint
+from app.core.config import INDEX_DIR, LOCAL_STORE_DTYPE, LOCAL_STORE_MAX_SEGMENTS, LOCAL_STORE_COMPACT_RATIO
+from app.db.vector_base import VectorStore
+from app.utils.embeddor import embedding_dimensions
+
+
+# Rows scored per matrix product when a segment isn't stored as float32
+SCORE_BLOCK_ROWS = 8192
+# A merge of the newest segments also takes in an older one while that holds at
+# most this many times the rows gathered so far, so a row is rewritten
+# O(log n) times over an ingest instead of on every merge
+MERGE_FACTOR = 2
+
+
+def collection_dir(collection_name: str) -> str:
+    return os.path.join(INDEX_DIR, collection_name, "vectors")
+
+
+def _scores(matrix: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """(rows x queries) dot products, computed in float32 (NumPy has no fast float16 matmul)."""
+    if matrix.dtype == np.float32:
+        return matrix @ queries.T
+    scores = np.empty((len(matrix), len(queries)), dtype=np.float32)
+    for i in range(0, len(matrix), SCORE_BLOCK_ROWS):
+        scores[i:i + SCORE_BLOCK_ROWS] = matrix[i:i + SCORE_BLOCK_ROWS].astype(np.float32) @ queries.T
+    return scores
+
+
+class _Segment:
+    """
+    One immutable batch of rows: '<name>.npy' holds the (rows x dims) matrix,
+    memory-mapped, and '<name>.jsonl' one {"id", "payload"} line per row.
+    Deletes only flip the row off in `alive`.
+    """
+
+    def __init__(self, directory: str, name: str, deleted: list[int] = ()):
+        self.name = name
+        self.matrix = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+        self.ids = []
+        self.payloads = []
+        with open(os.path.join(directory, f"{name}.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                self.ids.append(row["id"])
+                self.payloads.append(row["payload"])
+        self.alive = np.ones(len(self.ids), dtype=bool)
+        self.alive[list(deleted)] = False
+
+
+class _Collection:
+    """In-memory view of one collection directory plus its ID and path indexes."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.lock = threading.RLock()
+        with open(os.path.join(directory, "state.json"), "r", encoding="utf-8") as f:
+            state = json.load(f)
+        self.dims = state["dims"]
+        self.dtype = state["dtype"]
+        self.next_segment = state["next_segment"]
+        self.segments = [_Segment(directory, s["name"], s["deleted"]) for s in state["segments"]]
+        self.locations = {}  # point id -> (segment, row)
+        self.by_path = {}  # payload path -> point ids
+        for segment in self.segments:
+            for row in np.flatnonzero(segment.alive):
+                self._index(segment, int(row))
+
+    def _index(self, segment: _Segment, row: int):
+        point = segment.ids[row]
+        self.locations[point] = (segment, row)
+        self.by_path.setdefault(segment.payloads[row].get("path"), set()).add(point)
+
+    def _drop(self, point):
+        segment, row = self.locations.pop(point)
+        segment.alive[row] = False
+        ids = self.by_path.get(segment.payloads[row].get("path"))
+        if ids is not None:
+            ids.discard(point)
+            if not ids:
+                del self.by_path[segment.payloads[row].get("path")]
+
+    def save_state(self):
+        """Write state.json atomically; it is the only file that says which segments and rows are live."""
+        state = {
+            "dims": self.dims,
+            "dtype": self.dtype,
+            "next_segment": self.next_segment,
+            "segments": [
+                {"name": s.name, "rows": len(s.ids), "deleted": np.flatnonzero(~s.alive).tolist()}
+                for s in self.segments
+            ],
+        }
+        path = os.path.join(self.directory, "state.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(f"{path}.tmp", path)
+
+    def write_segment(self, matrix: np.ndarray, ids: list, payloads: list[dict]) -> _Segment:
+        name = f"seg-{self.next_segment:06d}"
+        self.next_segment += 1
+        # np.save appends .npy to names that lack it, so write through a file object
+        with open(os.path.join(self.directory, f"{name}.npy.tmp"), "wb") as f:
+            np.save(f, matrix)
+        with open(os.path.join(self.directory, f"{name}.jsonl.tmp"), "w", encoding="utf-8") as f:
+            for point, payload in zip(ids, payloads):
+                f.write(json.dumps({"id": point, "payload": payload}) + "\n")
+        for ext in ("npy", "jsonl"):
+            os.replace(os.path.join(self.directory, f"{name}.{ext}.tmp"), os.path.join(self.directory, f"{name}.{ext}"))
+        return _Segment(self.directory, name)
+
+    def dead_ratio(self) -> float:
+        total = sum(len(s.ids) for s in self.segments)
+        return 1 - len(self.locations) / total if total else 0.0
+
+
+class LocalVectorStore(VectorStore):
+    """
+    Qdrant-free store for single-process deployments and tests.
+
+    Each collection is a directory of append-only segments (memory-mapped
+    .npy matrices of unit vectors with a JSONL payload sidecar) plus a
+    state.json listing live segments and deleted rows. Upserts append a
+    segment and deletes are tombstones. Past max_segments the newest, small
+    segments are merged (size-tiered, see MERGE_FACTOR); past compact_ratio
+    dead rows everything is rewritten into one segment.
+    Search is exact: one matrix product per segment and argpartition for
+    the top k, so recall is 100% and latency grows linearly with the repo.
+    """
+
+    name = "local"
+
+    def __init__(self, dtype: str = LOCAL_STORE_DTYPE, max_segments: int = LOCAL_STORE_MAX_SEGMENTS,
+                 compact_ratio: float = LOCAL_STORE_COMPACT_RATIO):
+        self.dtype = dtype
+        self.max_segments = max_segments
+        self.compact_ratio = compact_ratio
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def _get(self, collection_name: str) -> _Collection | None:
+        with self._lock:
+            collection = self._collections.get(collection_name)
+            if collection is None:
+                directory = collection_dir(collection_name)
+                if not os.path.exists(os.path.join(directory, "state.json")):
+                    return None
+                collection = self._collections[collection_name] = _Collection(directory)
+            return collection
+
+    def collection_matches(self, collection_name):
+        collection = self._get(collection_name)
+        return collection is not None and collection.dims == embedding_dimensions()
+
+    def ensure_collection(self, collection_name, recreate=False):
+        if self.collection_matches(collection_name) and not recreate:
+            return
+        self.delete_collection(collection_name)
+        directory = collection_dir(collection_name)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "state.json"), "w", encoding="utf-8") as f:
+            json.dump({"dims": embedding_dimensions(), "dtype": self.dtype, "next_segment": 1, "segments": []}, f)
+
+    def delete_collection(self, collection_name: str):
+        with self._lock:
+            self._collections.pop(collection_name, None)
+        shutil.rmtree(collection_dir(collection_name), ignore_errors=True)
+
+    def upsert(self, collection_name, points, batch_size=None, parallel=None):
+        if not points:
+            return
+        collection = self._get(collection_name)
+        if collection is None:
+            raise ValueError(f"Collection '{collection_name}' does not exist")
+        matrix = np.asarray([point.vector for point in points], dtype=np.float32)
+        if matrix.shape[1] != collection.dims:
+            raise ValueError(f"Expected {collection.dims}-dim vectors, got {matrix.shape[1]}")
+        # Store unit vectors so a dot product is the cosine similarity
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = (matrix / np.where(norms == 0, 1, norms)).astype(collection.dtype)
+        ids = [str(point.id) for point in points]
+        payloads = [point.payload or {} for point in points]
+
+        with collection.lock:
+            segment = collection.write_segment(matrix, ids, payloads)
+            for point in ids:
+                if point in collection.locations:
+                    collection._drop(point)
+            # A repeated ID inside the batch keeps its last row
+            last = {point: row for row, point in enumerate(ids)}
+            segment.alive[:] = False
+            segment.alive[list(last.values())] = True
+            collection.segments.append(segment)
+            for row in last.values():
+                collection._index(segment, row)
+            collection.save_state()
+            self._maybe_compact(collection)
+
+    def delete_paths(self, collection_name, paths):
+        collection = self._get(collection_name)
+        if collection is None or not paths:
+            return
+        with collection.lock:
+            for path in paths:
+                for point in list(collection.by_path.get(path, ())):
+                    collection._drop(point)
+            collection.save_state()
+            self._maybe_compact(collection)
+
+    def _maybe_compact(self, collection: _Collection):
+        if collection.dead_ratio() > self.compact_ratio:
+            self.compact(collection)
+        elif len(collection.segments) > self.max_segments:
+            self._merge(collection, self._merge_tail(collection))
+
+    @staticmethod
+    def _merge_tail(collection: _Collection) -> list[_Segment]:
+        """The newest segments to merge: at least two, plus older ones no bigger than MERGE_FACTOR x the rest."""
+        segments = collection.segments
+        start = len(segments) - 2
+        rows = int(segments[-1].alive.sum()) + int(segments[-2].alive.sum())
+        while start > 0:
+            older = int(segments[start - 1].alive.sum())
+            if older > MERGE_FACTOR * rows:
+                break
+            start -= 1
+            rows += older
+        return segments[start:]
+
+    def compact(self, collection: _Collection | str):
+        """Rewrite the live rows of every segment into one and delete the old files."""
+        if isinstance(collection, str):
+            collection = self._get(collection)
+            if collection is None:
+                return
+        with collection.lock:
+            self._merge(collection, list(collection.segments))
+
+    def _merge(self, collection: _Collection, merge: list[_Segment]):
+        """Rewrite the live rows of consecutive segments into one new segment in their place."""
+        with collection.lock:
+            if not merge:
+                return
+            first = next(i for i, s in enumerate(collection.segments) if s is merge[0])
+            live = [(s, np.flatnonzero(s.alive)) for s in merge]
+            merged = []
+            if sum(len(r) for _, r in live):
+                matrix = np.concatenate([np.asarray(s.matrix[r]) for s, r in live if len(r)])
+                ids = [s.ids[i] for s, r in live for i in r]
+                payloads = [s.payloads[i] for s, r in live for i in r]
+                merged = [collection.write_segment(matrix, ids, payloads)]
+            rest = [s for s in collection.segments if not any(s is m for m in merge)]
+            collection.segments = rest[:first] + merged + rest[first:]
+            # Every live row of the merged segments moves, so re-pointing them replaces their old locations
+            for segment in merged:
+                for row in range(len(segment.ids)):
+                    collection._index(segment, row)
+            collection.save_state()
+            for segment in merge:
+                for ext in ("npy", "jsonl"):
+                    try:
+                        os.remove(os.path.join(collection.directory, f"{segment.name}.{ext}"))
+                    except FileNotFoundError:
+                        pass
+
+    def search_batch(self, collection_name, query_vectors, limit=10, paths=None):
+        collection = self._get(collection_name)
+        if collection is None or not query_vectors:
+            return [[] for _ in query_vectors]
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        with collection.lock:
+            wanted = None
+            if paths is not None:
+                wanted = {point for path in paths for point in collection.by_path.get(path, ())}
+            segments = [(s, s.alive.copy()) for s in collection.segments]
+            if wanted is not None:
+                for segment, alive in segments:
+                    alive &= np.fromiter((point in wanted for point in segment.ids), dtype=bool, count=len(segment.ids))
+
+        # Best `limit` rows of each segment per query, then the best across segments
+        candidates = []  # (scores: queries x n, segment, rows: queries x n)
+        for segment, alive in segments:
+            if not alive.any():
+                continue
+            scores = _scores(segment.matrix, queries)
+            scores[~alive] = -np.inf
+            k = min(limit, len(alive))
+            top = np.argpartition(-scores, k - 1, axis=0)[:k]  # k x queries
+            candidates.append((np.take_along_axis(scores, top, axis=0).T, segment, top.T))
+
+        results = []
+        for q in range(len(queries)):
+            hits = [
+                (float(score), segment, int(row))
+                for scores, segment, rows in candidates
+                for score, row in zip(scores[q], rows[q])
+                if score != -np.inf
+            ]
+            hits.sort(key=lambda hit: hit[0], reverse=True)
+            results.append([
+                ScoredPoint(id=segment.ids[row], version=0, score=score, payload=segment.payloads[row])
+                for score, segment, row in hits[:limit]
+            ])
+        return results
+
+    def count(self, collection_name):
+        collection = self._get(collection_name)
+        return len(collection.locations) if collection is not None else 0
@@ -1,5 +1,5 @@
 from app.core.config import MONGODB_CONNECTION_STRING
-from pymongo import MongoClient
+from pymongo import MongoClient, AsyncMongoClient
 import certifi
 import logging
 import os
@@ -10,38 +10,45 @@ logger = logging.getLogger(__name__)
 
 URI = MONGODB_CONNECTION_STRING
 
+def client_options() -> dict:
+    """Connection options shared by the sync and async clients."""
+    # Determine TLS settings
+    tls_env = os.getenv("MONGODB_TLS", "auto").lower()  # values: auto|true|false
+    uri_lower = URI.lower()
+    should_use_tls = False
+    if tls_env == "true":
+        should_use_tls = True
+    elif tls_env == "false":
+        should_use_tls = False
+    else:
+        # auto: infer from URI
+        # Atlas SRV typically requires TLS; also respect query params if present
+        should_use_tls = (
+            URI.startswith("mongodb+srv://") or
+            "tls=true" in uri_lower or
+            "ssl=true" in uri_lower
+        )
+
+    client_kwargs = {
+        "serverSelectionTimeoutMS": 5000,  # 5 seconds
+        "connectTimeoutMS": 5000,
+    }
+    if should_use_tls:
+        client_kwargs.update({
+            "tls": True,
+            "tlsCAFile": certifi.where(),
+        })
+    return client_kwargs
+
+
 def get_mongodb_client():
     """Create and return MongoDB client with error handling"""
     if not URI:
         raise ValueError("MONGODB_CONNECTION_STRING environment variable is not set")
     
     try:
-        # Determine TLS settings
-        tls_env = os.getenv("MONGODB_TLS", "auto").lower()  # values: auto|true|false
-        uri_lower = URI.lower()
-        should_use_tls = False
-        if tls_env == "true":
-            should_use_tls = True
-        elif tls_env == "false":
-            should_use_tls = False
-        else:
-            # auto: infer from URI
-            # Atlas SRV typically requires TLS; also respect query params if present
-            should_use_tls = (
-                URI.startswith("mongodb+srv://") or
-                "tls=true" in uri_lower or
-                "ssl=true" in uri_lower
-            )
-
-        client_kwargs = {
-            "serverSelectionTimeoutMS": 5000,  # 5 seconds
-            "connectTimeoutMS": 5000,
-        }
-        if should_use_tls:
-            client_kwargs.update({
-                "tls": True,
-                "tlsCAFile": certifi.where(),
-            })
+        client_kwargs = client_options()
+        if client_kwargs.get("tls"):
             logger.info("MongoDB client TLS mode: ENABLED")
         else:
             logger.info("MongoDB client TLS mode: DISABLED")
@@ -72,6 +79,14 @@ try:
     db = get_database()
     topics_collection = db["topicss_collection"]
     repos_collection = db['reposs_collection']
+    jobs_collection = db['jobs_collection']
+    # The API handlers are async and use these; ingestion threads keep the sync ones.
+    # The async client connects lazily, on the event loop of its first request
+    async_client = AsyncMongoClient(URI, **client_options())
+    async_db = async_client["test"]
+    async_topics_collection = async_db["topicss_collection"]
+    async_repos_collection = async_db['reposs_collection']
+    async_jobs_collection = async_db['jobs_collection']
     logger.info("MongoDB collections initialized successfully")
 except Exception as e:
     logger.error(f"Failed to initialize MongoDB: {str(e)}")
@@ -79,4 +94,10 @@ except Exception as e:
     client = None
     db = None
     topics_collection = None
-    repos_collection = None
\ No newline at end of file
+    repos_collection = None
+    jobs_collection = None
+    async_client = None
+    async_db = None
+    async_topics_collection = None
+    async_repos_collection = None
+    async_jobs_collection = None
\ No newline at end of file
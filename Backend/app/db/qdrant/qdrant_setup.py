@@ -1,4 +1,4 @@
-from qdrant_client import QdrantClient
+from qdrant_client import QdrantClient, AsyncQdrantClient
 from app.core.config import QDRANT_API_KEY,QDRANT_ENDPOINT
 
 client = QdrantClient(
@@ -7,3 +7,10 @@ client = QdrantClient(
     timeout=60
 )
 
+
+# Same server for the async request path (queries), so no thread is held while Qdrant answers
+async_client = AsyncQdrantClient(
+    api_key=QDRANT_API_KEY,
+    url=QDRANT_ENDPOINT,
+    timeout=60
+)
@@ -0,0 +1,194 @@
+from qdrant_client.models import (
+    VectorParams, Distance, Filter, FieldCondition, MatchAny, FilterSelector, PayloadSchemaType, PointStruct,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, BinaryQuantization, BinaryQuantizationConfig,
+    Disabled, SearchParams, QuantizationSearchParams, QueryRequest
+)
+from app.db.qdrant.qdrant_setup import client, async_client
+from app.core.config import (
+    QDRANT_UPLOAD_BATCH_SIZE, QDRANT_UPLOAD_PARALLEL, QDRANT_QUANTIZATION, QDRANT_VECTORS_ON_DISK,
+    QDRANT_RESCORE, QDRANT_OVERSAMPLING
+)
+from app.db.vector_base import VectorStore
+from app.utils.embeddor import embedding_dimensions
+
+def quantization_config(kind: str = QDRANT_QUANTIZATION):
+    """
+    Quantized copy of the vectors kept in RAM for the HNSW search.
+    scalar: int8 per dimension, 4x smaller with near-lossless ranking.
+    binary: 1 bit per dimension, 32x smaller; needs rescoring and works best
+            on large (>= 1024-dim) embeddings like text-embedding-3-large.
+    """
+    if kind == "scalar":
+        return ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True))
+    if kind == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    if kind in ("", "none"):
+        return None
+    raise ValueError(f"Unknown QDRANT_QUANTIZATION '{kind}', expected none, scalar or binary")
+
+
+def search_params(kind: str = QDRANT_QUANTIZATION) -> SearchParams | None:
+    """Search with the quantized vectors, then rescore an oversampled candidate set with the originals."""
+    if quantization_config(kind) is None:
+        return None
+    return SearchParams(
+        quantization=QuantizationSearchParams(rescore=QDRANT_RESCORE, oversampling=QDRANT_OVERSAMPLING)
+    )
+
+
+def collection_matches(collection_name: str) -> bool:
+    """True when the collection exists with the vector size of the current embedding backend."""
+    if not client.collection_exists(collection_name=collection_name):
+        return False
+    vectors = client.get_collection(collection_name=collection_name).config.params.vectors
+    return getattr(vectors, "size", None) == embedding_dimensions()
+
+
+def ensure_collection(collection_name: str, recreate: bool = False):
+    """
+    Create the repo collection (and its 'path' payload index) if missing,
+    sized for the configured embedding backend. With recreate=True, or when
+    the existing collection has another vector size, it is dropped first.
+    An existing collection is switched to the configured quantization.
+    """
+    quantization = quantization_config()
+    exists = client.collection_exists(collection_name=collection_name)
+    if exists and (recreate or not collection_matches(collection_name)):
+        client.delete_collection(collection_name=collection_name)
+    elif exists:
+        current = client.get_collection(collection_name=collection_name).config.quantization_config
+        if _dump(current) != _dump(quantization):
+            # Qdrant re-quantizes in place; no need to re-embed
+            client.update_collection(
+                collection_name=collection_name,
+                quantization_config=quantization if quantization is not None else Disabled.DISABLED
+            )
+        return
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(
+            size=embedding_dimensions(),
+            distance=Distance.COSINE,
+            # With quantization on, searches hit the RAM copy and only
+            # rescoring reads the full vectors from disk
+            on_disk=QDRANT_VECTORS_ON_DISK
+        ),
+        quantization_config=quantization
+    )
+    # Refreshes delete by path, so keep that filter indexed
+    client.create_payload_index(
+        collection_name=collection_name,
+        field_name="path",
+        field_schema=PayloadSchemaType.KEYWORD
+    )
+
+
+def _dump(config) -> dict | None:
+    return config.model_dump(exclude_none=True) if config is not None else None
+
+
+def delete_paths(collection_name: str, paths: list[str], batch_size: int = 500):
+    """Delete every point whose payload 'path' is one of the given files."""
+    if not paths or not client.collection_exists(collection_name=collection_name):
+        return
+    for i in range(0, len(paths), batch_size):
+        client.delete(
+            collection_name=collection_name,
+            points_selector=FilterSelector(
+                filter=Filter(must=[FieldCondition(key="path", match=MatchAny(any=paths[i:i + batch_size]))])
+            ),
+            wait=True
+        )
+
+
+def upload_points(collection_name: str, points: list[PointStruct],
+                  batch_size: int = QDRANT_UPLOAD_BATCH_SIZE, parallel: int = QDRANT_UPLOAD_PARALLEL):
+    """Upload points in large batches, several batches at a time."""
+    if not points:
+        return
+    client.upload_points(
+        collection_name=collection_name,
+        points=points,
+        batch_size=batch_size,
+        parallel=parallel,
+        max_retries=3,
+        wait=True
+    )
+
+
+def _paths_filter(paths: list[str] | None) -> Filter | None:
+    if paths is None:
+        return None
+    return Filter(must=[FieldCondition(key="path", match=MatchAny(any=paths))])
+
+
+def search(collection_name: str, query_vector: list[float], limit: int = 10, paths: list[str] | None = None):
+    """Nearest chunks to a vector, using the collection's quantization settings."""
+    return client.query_points(
+        collection_name=collection_name,
+        query=query_vector,
+        query_filter=_paths_filter(paths),
+        search_params=search_params(),
+        limit=limit,
+        with_payload=True
+    ).points
+
+
+async def asearch(collection_name: str, query_vector: list[float], limit: int = 10, paths: list[str] | None = None):
+    """search() on the async client."""
+    response = await async_client.query_points(
+        collection_name=collection_name,
+        query=query_vector,
+        query_filter=_paths_filter(paths),
+        search_params=search_params(),
+        limit=limit,
+        with_payload=True
+    )
+    return response.points
+
+
+def search_batch(collection_name: str, query_vectors: list[list[float]], limit: int = 10,
+                 paths: list[str] | None = None):
+    """search() for several vectors in one request."""
+    responses = client.query_batch_points(
+        collection_name=collection_name,
+        requests=[
+            QueryRequest(query=vector, filter=_paths_filter(paths), params=search_params(), limit=limit,
+                         with_payload=True)
+            for vector in query_vectors
+        ]
+    )
+    return [response.points for response in responses]
+
+
+class QdrantVectorStore(VectorStore):
+    """Remote Qdrant collections (QDRANT_ENDPOINT)."""
+
+    name = "qdrant"
+
+    def collection_matches(self, collection_name):
+        return collection_matches(collection_name)
+
+    def ensure_collection(self, collection_name, recreate=False):
+        ensure_collection(collection_name, recreate)
+
+    def delete_paths(self, collection_name, paths):
+        delete_paths(collection_name, paths)
+
+    def upsert(self, collection_name, points, batch_size=None, parallel=None):
+        upload_points(collection_name, points,
+                      batch_size=batch_size or QDRANT_UPLOAD_BATCH_SIZE, parallel=parallel or QDRANT_UPLOAD_PARALLEL)
+
+    def search(self, collection_name, query_vector, limit=10, paths=None):
+        return search(collection_name, query_vector, limit, paths)
+
+    async def asearch(self, collection_name, query_vector, limit=10, paths=None):
+        return await asearch(collection_name, query_vector, limit, paths)
+
+    def search_batch(self, collection_name, query_vectors, limit=10, paths=None):
+        return search_batch(collection_name, query_vectors, limit, paths)
+
+    def count(self, collection_name):
+        if not client.collection_exists(collection_name=collection_name):
+            return 0
+        return client.count(collection_name=collection_name, exact=True).count
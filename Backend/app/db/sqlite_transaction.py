@@ -0,0 +1,19 @@
+import sqlite3
+from contextlib import contextmanager
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection):
+    """
+    BEGIN ... COMMIT on a connection opened with isolation_level=None. If the
+    body or the COMMIT fails the transaction is rolled back, so the connection
+    isn't left inside it and later BEGINs keep working.
+    """
+    conn.execute("BEGIN")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
@@ -0,0 +1,192 @@
+import os
+import sqlite3
+import threading
+from app.core.config import INDEX_DIR, REPOS_DIR
+from app.db.files.index import repo_file_index
+from app.db.sqlite_transaction import transaction
+from app.utils.symbols import extract_symbols
+
+
+def index_path(repo_key: str) -> str:
+    return os.path.join(INDEX_DIR, repo_key, "symbols.sqlite3")
+
+
+class SymbolIndex:
+    """
+    Definitions and references (calls, imports) of one repo, in SQLite.
+
+    Both tables are indexed on the name (case-insensitively) and on the
+    path, so a lookup by name is one index range scan and re-indexing a file
+    replaces just its rows.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS definitions (
+                path TEXT, name TEXT, kind TEXT, line INTEGER, end_line INTEGER, container TEXT, signature TEXT
+            );
+            CREATE INDEX IF NOT EXISTS definitions_name ON definitions (name COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS definitions_path ON definitions (path);
+            CREATE TABLE IF NOT EXISTS refs (
+                path TEXT, name TEXT, kind TEXT, line INTEGER, container TEXT, detail TEXT, text TEXT
+            );
+            CREATE INDEX IF NOT EXISTS refs_name ON refs (name COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS refs_path ON refs (path);
+        """)
+
+    def replace_file(self, path: str, definitions: list[dict], references: list[dict]):
+        """Store the symbols of one file in place of what it had before."""
+        with self._lock, transaction(self._conn):
+            self._conn.execute("DELETE FROM definitions WHERE path = ?", (path,))
+            self._conn.execute("DELETE FROM refs WHERE path = ?", (path,))
+            self._conn.executemany(
+                "INSERT INTO definitions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(path, d["name"], d["kind"], d["line"], d["end_line"], d["container"], d["signature"])
+                 for d in definitions]
+            )
+            self._conn.executemany(
+                "INSERT INTO refs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(path, r["name"], r["kind"], r["line"], r["container"], r["detail"], r["text"]) for r in references]
+            )
+
+    def delete_paths(self, paths: list[str]):
+        with self._lock, transaction(self._conn):
+            self._conn.executemany("DELETE FROM definitions WHERE path = ?", [(path,) for path in paths])
+            self._conn.executemany("DELETE FROM refs WHERE path = ?", [(path,) for path in paths])
+
+    def clear(self):
+        with self._lock, transaction(self._conn):
+            self._conn.execute("DELETE FROM definitions")
+            self._conn.execute("DELETE FROM refs")
+
+    def count(self) -> dict:
+        with self._lock:
+            return {
+                "definitions": self._conn.execute("SELECT COUNT(*) FROM definitions").fetchone()[0],
+                "references": self._conn.execute("SELECT COUNT(*) FROM refs").fetchone()[0],
+            }
+
+    @staticmethod
+    def _split(name: str) -> tuple[str, str | None]:
+        """'Class.method' -> ('method', 'Class'); plain names have no container."""
+        name = name.strip()
+        if "." in name:
+            container, _, name = name.rpartition(".")
+            return name, container
+        return name, None
+
+    def find_definitions(self, name: str, kind: str | None = None, limit: int = 20) -> list[dict]:
+        """
+        Where a symbol is defined: exact-case matches first, then other
+        casings, then names starting with it if nothing matched exactly.
+        'Class.method' narrows the match to that container.
+        """
+        name, container = self._split(name)
+        filters, params = "", []
+        if kind:
+            filters += " AND kind = ?"
+            params.append(kind)
+        if container:
+            filters += " AND (container = ? OR container LIKE ?)"
+            params += [container, f"%.{container}"]
+        columns = ("path", "name", "kind", "line", "end_line", "container", "signature")
+        rows = []
+        with self._lock:
+            # LIKE is case-insensitive too, so both passes can use the NOCASE index
+            for match, value in (("name = ? COLLATE NOCASE", name), ("name LIKE ? ESCAPE '\\'", _like_prefix(name))):
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(columns)} FROM definitions WHERE {match}{filters} "
+                    "ORDER BY name = ? DESC, length(name), path, line LIMIT ?",
+                    [value] + params + [name, limit]
+                ).fetchall()
+                if rows:
+                    break
+        return [dict(zip(columns, row)) for row in rows]
+
+    def find_references(self, name: str, kind: str | None = None, offset: int = 0,
+                        limit: int = 50) -> tuple[list[dict], int]:
+        """
+        Call sites and imports of a name (case-insensitive). Calls aren't
+        resolved to a class, so 'Class.method' finds every call of 'method'.
+        Returns: (one page of references in path/line order, total number of references)
+        """
+        name, _ = self._split(name)
+        filters, params = "", []
+        if kind:
+            filters += " AND kind = ?"
+            params.append(kind)
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM refs WHERE name = ? COLLATE NOCASE{filters}", [name] + params
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                "SELECT path, line, kind, container, detail, text FROM refs "
+                f"WHERE name = ? COLLATE NOCASE{filters} ORDER BY path, line LIMIT ? OFFSET ?",
+                [name] + params + [limit, offset]
+            ).fetchall()
+        columns = ("path", "line", "kind", "container", "detail", "text")
+        return [dict(zip(columns, row)) for row in rows], total
+
+
+def _like_prefix(name: str) -> str:
+    escaped = name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_symbol_index(repo_key: str) -> SymbolIndex:
+    """Open (once per process) the symbol index of a repo, creating it if needed."""
+    with _indexes_lock:
+        index = _indexes.get(repo_key)
+        if index is None:
+            index = _indexes[repo_key] = SymbolIndex(index_path(repo_key))
+        return index
+
+
+def symbol_index_exists(repo_key: str) -> bool:
+    return repo_key in _indexes or os.path.exists(index_path(repo_key))
+
+
+def build_symbol_index_from_disk(repo_key: str) -> SymbolIndex | None:
+    """Index the symbols of every file of a downloaded repo. None if it isn't downloaded."""
+    files = repo_file_index(repo_key)
+    if files is None:
+        return None
+    index = get_symbol_index(repo_key)
+    index.clear()
+    root = os.path.join(REPOS_DIR, repo_key)
+    for rel_path in files.paths:
+        try:
+            with open(os.path.join(root, *rel_path.split("/")), "r", encoding="utf-8") as f:
+                content = f.read()
+        except (OSError, UnicodeDecodeError):
+            continue
+        index.replace_file(rel_path, *extract_symbols(rel_path, content))
+    return index
+
+
+_building = set()
+_build_lock = threading.Lock()
+
+
+def repo_symbol_index(repo_key: str) -> SymbolIndex | None:
+    """The repo's symbol index, built from the local copy if the repo was ingested before it existed."""
+    if symbol_index_exists(repo_key) and repo_key not in _building:
+        return get_symbol_index(repo_key)
+    # Callers arriving during a build wait for it instead of reading a half-filled index
+    with _build_lock:
+        if symbol_index_exists(repo_key):
+            return get_symbol_index(repo_key)
+        _building.add(repo_key)
+        try:
+            return build_symbol_index_from_disk(repo_key)
+        finally:
+            _building.discard(repo_key)
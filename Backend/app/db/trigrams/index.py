@@ -0,0 +1,199 @@
+import os
+import sqlite3
+import threading
+from array import array
+from app.core.config import INDEX_DIR, REPOS_DIR
+from app.db.files.index import repo_file_index
+from app.db.sqlite_transaction import transaction
+from app.utils.trigrams import trigrams
+
+
+def index_path(repo_key: str) -> str:
+    return os.path.join(INDEX_DIR, repo_key, "trigrams.sqlite3")
+
+
+class TrigramIndex:
+    """
+    Which files of one repo contain each trigram (case-insensitive), in SQLite.
+
+    Each trigram's posting list is one blob of sorted uint32 file IDs.
+    File IDs are never reused, so new files only ever append to a list
+    (an SQL blob concatenation, no decoding) and a re-indexed or deleted
+    file is dropped from the files table; its stale IDs are filtered out
+    at query time until the next compaction rebuilds the index. Postings
+    are buffered in memory during ingestion and written in batches.
+    """
+
+    # Buffered file IDs (across all trigrams, 4 bytes each) before the buffer is
+    # written out; fewer, larger flushes rewrite the long posting lists less often
+    FLUSH_POSTINGS = 8_000_000
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending = {}  # trigram -> array of file IDs not yet written
+        self._pending_count = 0
+        self._live = None  # (data_version, {file ID: path}), cached between searches
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY AUTOINCREMENT, path TEXT UNIQUE);
+            CREATE TABLE IF NOT EXISTS postings (trigram BLOB PRIMARY KEY, ids BLOB) WITHOUT ROWID;
+        """)
+
+    def add_file(self, path: str, content: str):
+        """Index a file's text, replacing what was indexed for that path before."""
+        grams = trigrams(content)
+        with self._lock:
+            self._live = None
+            self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            file_id = self._conn.execute("INSERT INTO files (path) VALUES (?)", (path,)).lastrowid
+            for gram in grams:
+                ids = self._pending.get(gram)
+                if ids is None:
+                    ids = self._pending[gram] = array("I")
+                ids.append(file_id)
+            self._pending_count += len(grams)
+            if self._pending_count >= self.FLUSH_POSTINGS:
+                self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        # The buffer is kept until the write commits, so a failed flush can be retried
+        with transaction(self._conn):
+            self._conn.executemany(
+                "INSERT INTO postings (trigram, ids) VALUES (?, ?) "
+                "ON CONFLICT (trigram) DO UPDATE SET ids = CAST(ids || excluded.ids AS BLOB)",
+                ((gram, ids.tobytes()) for gram, ids in self._pending.items())
+            )
+        self._pending, self._pending_count = {}, 0
+
+    def flush(self):
+        """Write buffered postings; searches only see files indexed before the last flush."""
+        with self._lock:
+            self._flush()
+
+    def delete_paths(self, paths: list[str]):
+        with self._lock:
+            self._live = None
+            self._conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in paths])
+
+    def clear(self):
+        with self._lock:
+            with transaction(self._conn):
+                self._conn.execute("DELETE FROM files")
+                self._conn.execute("DELETE FROM postings")
+                self._conn.execute("DELETE FROM sqlite_sequence WHERE name = 'files'")
+            self._pending, self._pending_count, self._live = {}, 0, None
+
+    def needs_compaction(self) -> bool:
+        """True once the posting lists hold more stale file IDs than live ones."""
+        with self._lock:
+            live, last = self._conn.execute(
+                "SELECT COUNT(*), (SELECT seq FROM sqlite_sequence WHERE name = 'files') FROM files"
+            ).fetchone()
+        return bool(last) and last - live > max(live, 1000)
+
+    def paths(self) -> dict[int, str]:
+        """{file ID: path} of every indexed file, reloaded only after the files table changed."""
+        with self._lock:
+            # data_version moves when another process commits; this connection's writes reset the cache
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._live is None or self._live[0] != version:
+                self._live = (version, dict(self._conn.execute("SELECT id, path FROM files")))
+            return self._live[1]
+
+    def candidates(self, query: list[set[bytes]] | None) -> list[str]:
+        """
+        Paths of the files that can match a query from query_trigrams(): the
+        union over its alternatives of the files holding every trigram of
+        the alternative, intersected rarest list first. None means no
+        narrowing: every file. Returns paths in path order.
+        """
+        live = self.paths()
+        if query is None:
+            return sorted(live.values())
+        grams = sorted(set().union(*query))
+        postings = {}
+        with self._lock:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for i in range(0, len(grams), 500):
+                part = grams[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT trigram, ids FROM postings WHERE trigram IN ({', '.join('?' * len(part))})", part
+                )
+                for gram, blob in rows:
+                    ids = array("I")
+                    ids.frombytes(blob)
+                    postings[gram] = ids
+
+        matched = set()
+        for needed in query:
+            lists = sorted((postings.get(gram, ()) for gram in needed), key=len)
+            if not lists[0]:
+                continue
+            found = set(lists[0])
+            for ids in lists[1:]:
+                found.intersection_update(ids)
+                if not found:
+                    break
+            matched |= found
+        return sorted(live[file_id] for file_id in matched if file_id in live)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_trigram_index(repo_key: str) -> TrigramIndex:
+    """Open (once per process) the trigram index of a repo, creating it if needed."""
+    with _indexes_lock:
+        index = _indexes.get(repo_key)
+        if index is None:
+            index = _indexes[repo_key] = TrigramIndex(index_path(repo_key))
+        return index
+
+
+def trigram_index_exists(repo_key: str) -> bool:
+    return repo_key in _indexes or os.path.exists(index_path(repo_key))
+
+
+def build_trigram_index_from_disk(repo_key: str) -> TrigramIndex | None:
+    """Index the text of every file of a downloaded repo. None if it isn't downloaded."""
+    files = repo_file_index(repo_key)
+    if files is None:
+        return None
+    index = get_trigram_index(repo_key)
+    index.clear()
+    root = os.path.join(REPOS_DIR, repo_key)
+    for rel_path in files.paths:
+        try:
+            with open(os.path.join(root, *rel_path.split("/")), "r", encoding="utf-8") as f:
+                content = f.read()
+        except (OSError, UnicodeDecodeError):
+            continue
+        index.add_file(rel_path, content)
+    index.flush()
+    return index
+
+
+_building = set()
+_build_lock = threading.Lock()
+
+
+def repo_trigram_index(repo_key: str) -> TrigramIndex | None:
+    """The repo's trigram index, built from the local copy if the repo was ingested before it existed."""
+    if trigram_index_exists(repo_key) and repo_key not in _building:
+        return get_trigram_index(repo_key)
+    # Callers arriving during a build wait for it instead of reading a half-filled index
+    with _build_lock:
+        if trigram_index_exists(repo_key):
+            return get_trigram_index(repo_key)
+        _building.add(repo_key)
+        try:
+            return build_trigram_index_from_disk(repo_key)
+        finally:
+            _building.discard(repo_key)
@@ -0,0 +1,58 @@
+import asyncio
+import uuid
+
+# Fixed namespace so the same chunk always maps to the same point ID
+POINT_NAMESPACE = uuid.UUID("6f1c7b5e-2a4d-5c3e-9b8f-0d1e2f3a4b5c")
+
+
+def point_id(repo_key: str, ref: str, path: str, chunk_index: int) -> str:
+    """
+    Deterministic point ID for one chunk, so retries and re-ingests of the
+    same file overwrite their points instead of adding duplicates.
+    """
+    return str(uuid.uuid5(POINT_NAMESPACE, f"{repo_key}\0{ref}\0{path}\0{chunk_index}"))
+
+
+class VectorStore:
+    """
+    Where repo chunks and their vectors live. One collection per repo
+    ('owner_repo'); points are qdrant_client PointStruct and searches return
+    ScoredPoint whichever backend is used, so callers never branch on it.
+    """
+
+    name = ""
+
+    def collection_matches(self, collection_name: str) -> bool:
+        """True when the collection exists with the vector size of the current embedding backend."""
+        raise NotImplementedError
+
+    def ensure_collection(self, collection_name: str, recreate: bool = False):
+        """Create the collection if missing; recreate=True (or a size mismatch) starts it empty."""
+        raise NotImplementedError
+
+    def delete_paths(self, collection_name: str, paths: list[str]):
+        """Delete every point whose payload 'path' is one of the given files."""
+        raise NotImplementedError
+
+    def upsert(self, collection_name: str, points: list, batch_size: int | None = None,
+               parallel: int | None = None):
+        """Insert points, replacing any with the same ID."""
+        raise NotImplementedError
+
+    def search(self, collection_name: str, query_vector: list[float], limit: int = 10,
+               paths: list[str] | None = None) -> list:
+        """Nearest points to a vector, optionally only among the given files."""
+        return self.search_batch(collection_name, [query_vector], limit, paths)[0]
+
+    async def asearch(self, collection_name: str, query_vector: list[float], limit: int = 10,
+                      paths: list[str] | None = None) -> list:
+        """search() for coroutines. Stores without an async client run it in a worker thread."""
+        return await asyncio.to_thread(self.search, collection_name, query_vector, limit, paths)
+
+    def search_batch(self, collection_name: str, query_vectors: list[list[float]], limit: int = 10,
+                     paths: list[str] | None = None) -> list[list]:
+        """search() for several vectors at once."""
+        raise NotImplementedError
+
+    def count(self, collection_name: str) -> int:
+        raise NotImplementedError
@@ -0,0 +1,31 @@
+import threading
+from app.core.config import VECTOR_STORE
+from app.db.vector_base import VectorStore, point_id  # noqa: F401  (re-exported for callers)
+
+
+def get_vector_store(name: str) -> VectorStore:
+    """Instantiate the store selected by VECTOR_STORE (imported lazily so 'local' never loads Qdrant)."""
+    if name == "qdrant":
+        from app.db.qdrant.store import QdrantVectorStore
+        return QdrantVectorStore()
+    if name == "local":
+        from app.db.local.store import LocalVectorStore
+        return LocalVectorStore()
+    raise ValueError(f"Unknown VECTOR_STORE '{name}', expected qdrant or local")
+
+
+vector_store = get_vector_store(VECTOR_STORE)
+
+# Bumped whenever a collection's contents change, so caches keyed on it go stale.
+# In-process only: ingestion jobs run in the API process (see ingestion/jobs.py)
+_versions = {}
+_versions_lock = threading.Lock()
+
+
+def collection_version(collection_name: str) -> int:
+    return _versions.get(collection_name, 0)
+
+
+def bump_collection_version(collection_name: str):
+    with _versions_lock:
+        _versions[collection_name] = _versions.get(collection_name, 0) + 1
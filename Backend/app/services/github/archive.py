@@ -0,0 +1,93 @@
+import os
+import shutil
+import tarfile
+import requests
+from app.core.config import GITHUB_API_URL
+from app.services.github.session import github_get
+from app.utils.file_filters import should_skip
+
+
+class ArchiveUnavailable(Exception):
+    """Raised when a ref cannot be ingested from its tarball."""
+
+
+def _safe_relpath(member_name: str) -> str | None:
+    """
+    Strip the '<owner>-<repo>-<sha>/' prefix GitHub puts in front of every
+    entry and reject anything that would escape the extraction directory.
+    """
+    parts = member_name.replace("\\", "/").split("/", 1)
+    if len(parts) < 2 or not parts[1]:
+        return None
+    rel_path = os.path.normpath(parts[1])
+    if os.path.isabs(rel_path) or rel_path.startswith(".."):
+        return None
+    return rel_path
+
+
+def fetch_archive(owner: str, repo: str, ref: str, local_dir: str, progress=None, on_file=None) -> dict:
+    """
+    Download a whole ref as one tarball and extract it while it streams in.
+    Entries are filtered on the fly, so excluded files are never written.
+    Args:
+        owner: GitHub username or organization
+        repo: Repository name
+        ref: Branch, tag or commit to download
+        local_dir: Directory that will hold the extracted repository
+        progress: Optional IngestProgress updated per extracted file
+        on_file: Optional callback(rel_path, data) run for every file as soon as it is written
+    Returns: A dict with the saved relative paths, total bytes and the commit SHA
+    """
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/tarball/{ref}"
+    # Extract next to the target and swap at the end so a failed download
+    # never leaves a half-written repo behind (the tree fetcher can still run)
+    tmp_dir = f"{local_dir}.partial"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    saved = []
+    total_bytes = 0
+    commit_sha = None
+    try:
+        with github_get(url, stream=True, timeout=(10, 300)) as resp:
+            if resp.status_code != 200:
+                raise ArchiveUnavailable(f"Tarball request failed ({resp.status_code}): {url}")
+            resp.raw.decode_content = True
+            # "r|gz" reads the response sequentially: nothing is buffered to disk first
+            with tarfile.open(fileobj=resp.raw, mode="r|gz") as tar:
+                for member in tar:
+                    if commit_sha is None:
+                        # git archive stores the commit id in the pax global header
+                        commit_sha = tar.pax_headers.get("comment")
+                    if not member.isfile():
+                        continue
+                    rel_path = _safe_relpath(member.name)
+                    if rel_path is None or should_skip(rel_path, member.size):
+                        continue
+                    file_local_path = os.path.join(tmp_dir, rel_path)
+                    os.makedirs(os.path.dirname(file_local_path), exist_ok=True)
+                    # Files are capped by INGEST_MAX_FILE_BYTES, so reading one whole is fine
+                    with tar.extractfile(member) as src:
+                        data = src.read()
+                    with open(file_local_path, "wb") as dst:
+                        dst.write(data)
+                    rel_path = rel_path.replace(os.sep, "/")
+                    saved.append(rel_path)
+                    total_bytes += member.size
+                    if progress is not None:
+                        progress.add(files_fetched=1, bytes_fetched=member.size)
+                    if on_file is not None:
+                        on_file(rel_path, data)
+                    if progress is not None:
+                        progress.check_cancelled()
+    except (requests.RequestException, tarfile.TarError) as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise ArchiveUnavailable(f"Tarball ingestion failed for {owner}/{repo}@{ref}: {e}") from e
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    shutil.rmtree(local_dir, ignore_errors=True)
+    os.replace(tmp_dir, local_dir)
+    print(f"Extracted {len(saved)} files ({total_bytes} bytes) from {owner}/{repo}@{ref}")
+    return {"files": saved, "bytes": total_bytes, "commit_sha": commit_sha}
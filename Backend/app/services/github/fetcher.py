@@ -0,0 +1,143 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app.core.config import GITHUB_API_URL, GITHUB_FETCH_CONCURRENCY
+from app.services.github.session import github_get
+from app.services.ingestion.progress import IngestionCancelled
+from app.utils.file_filters import should_skip
+
+
+class GitHubFetchError(Exception):
+    """Raised when GitHub can't list or serve a repository's files."""
+
+
+def resolve_ref(owner: str, repo: str, ref: str) -> dict:
+    """
+    Pin a branch or tag to its current commit so the tree listing and the
+    download both see the same snapshot.
+    Returns: {"commit_sha": str, "tree_sha": str}
+    """
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits/{ref}"
+    resp = github_get(url)
+    if resp.status_code != 200:
+        raise GitHubFetchError(f"Resolving {ref} failed ({resp.status_code}): {url}")
+    commit = resp.json()
+    return {"commit_sha": commit["sha"], "tree_sha": commit["commit"]["tree"]["sha"]}
+
+
+def list_tree(owner: str, repo: str, ref: str) -> dict:
+    """
+    List every blob of a ref with a single recursive git trees call.
+    Returns: {"tree_sha": str, "blobs": [{"path", "sha", "size"}, ...]}
+    """
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/git/trees/{ref}?recursive=1"
+    resp = github_get(url)
+    if resp.status_code != 200:
+        raise GitHubFetchError(f"Tree listing failed ({resp.status_code}): {url}")
+    tree = resp.json()
+    if tree.get("truncated"):
+        # GitHub caps recursive listings (~100k entries / 7 MB); walk subtrees instead
+        blobs = _walk_tree(owner, repo, tree["sha"])
+    else:
+        blobs = [
+            {"path": item["path"], "sha": item["sha"], "size": item.get("size", 0)}
+            for item in tree.get("tree", [])
+            if item.get("type") == "blob"
+        ]
+    return {"tree_sha": tree["sha"], "blobs": blobs}
+
+
+def _walk_tree(owner: str, repo: str, tree_sha: str, prefix: str = "") -> list[dict]:
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/git/trees/{tree_sha}"
+    resp = github_get(url)
+    if resp.status_code != 200:
+        raise GitHubFetchError(f"Tree listing failed ({resp.status_code}): {url}")
+    blobs = []
+    for item in resp.json().get("tree", []):
+        path = f"{prefix}{item['path']}"
+        if item["type"] == "blob":
+            blobs.append({"path": path, "sha": item["sha"], "size": item.get("size", 0)})
+        elif item["type"] == "tree" and not should_skip(f"{path}/_"):
+            blobs.extend(_walk_tree(owner, repo, item["sha"], f"{path}/"))
+    return blobs
+
+
+def fetch_blob(owner: str, repo: str, sha: str) -> bytes:
+    """Download one blob's raw bytes."""
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/git/blobs/{sha}"
+    resp = github_get(url, headers={"Accept": "application/vnd.github.raw"})
+    if resp.status_code != 200:
+        raise GitHubFetchError(f"Blob download failed ({resp.status_code}): {url}")
+    return resp.content
+
+
+def fetch_blobs(owner: str, repo: str, blobs: list[dict], local_dir: str,
+                concurrency: int = GITHUB_FETCH_CONCURRENCY, progress=None, on_file=None) -> dict:
+    """
+    Download blobs in parallel on the pooled session and write them as bytes,
+    so binary and non-UTF-8 files are stored untouched.
+    Args:
+        blobs: Entries from list_tree (path, sha, size)
+        local_dir: Repository root to write into
+        concurrency: Maximum number of downloads in flight
+        progress: Optional IngestProgress updated per downloaded file
+        on_file: Optional callback(rel_path, data) run for every file once it is written
+    Returns: A dict with the saved relative paths, total bytes and failed paths
+    """
+    def download(blob):
+        if progress is not None:
+            progress.check_cancelled()
+        data = fetch_blob(owner, repo, blob["sha"])
+        file_local_path = os.path.join(local_dir, *blob["path"].split("/"))
+        os.makedirs(os.path.dirname(file_local_path), exist_ok=True)
+        with open(file_local_path, "wb") as f:
+            f.write(data)
+        if on_file is not None:
+            on_file(blob["path"], data)
+        return len(data)
+
+    saved, failed = [], []
+    total_bytes = 0
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+        futures = {pool.submit(download, blob): blob["path"] for blob in blobs}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                size = future.result()
+                total_bytes += size
+                saved.append(path)
+                if progress is not None:
+                    progress.add(files_fetched=1, bytes_fetched=size)
+            except IngestionCancelled:
+                raise
+            except Exception as e:
+                print(f"Failed to download {path}: {e}")
+                failed.append(path)
+    return {"files": sorted(saved), "bytes": total_bytes, "failed": failed}
+
+
+def fetch_tree(owner: str, repo: str, ref: str, local_dir: str,
+               concurrency: int = GITHUB_FETCH_CONCURRENCY, blobs: list[dict] | None = None,
+               progress=None, on_file=None) -> dict:
+    """
+    Fetch a ref file by file: one tree listing, then concurrent blob downloads.
+    Used when the tarball can't be downloaded.
+    Args:
+        blobs: Already-filtered listing to download; skips the tree call when given
+    Returns: A dict with the saved relative paths, total bytes and failed paths
+    """
+    if blobs is None:
+        tree = list_tree(owner, repo, ref)
+        blobs = [b for b in tree["blobs"] if not should_skip(b["path"], b["size"])]
+    tmp_dir = f"{local_dir}.partial"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        result = fetch_blobs(owner, repo, blobs, tmp_dir, concurrency, progress, on_file)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    shutil.rmtree(local_dir, ignore_errors=True)
+    os.replace(tmp_dir, local_dir)
+    print(f"Fetched {len(result['files'])} files ({result['bytes']} bytes) from {owner}/{repo}@{ref}")
+    return result
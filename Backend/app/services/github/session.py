@@ -0,0 +1,149 @@
+import asyncio
+import random
+import threading
+import time
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from app.core.config import GITHUB_TOKEN, GITHUB_FETCH_CONCURRENCY, GITHUB_MAX_RETRIES
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+_async_client = None
+
+# Epoch second until which every caller should hold off (primary rate limit hit)
+_rate_limited_until = 0.0
+_rate_limit_lock = threading.Lock()
+
+
+def github_headers() -> dict:
+    """Headers shared by every GitHub API call."""
+    headers = {"Accept": "application/vnd.github+json"}
+    if GITHUB_TOKEN:
+        headers["Authorization"] = f"Bearer {GITHUB_TOKEN}"
+    return headers
+
+
+def get_session() -> requests.Session:
+    """
+    Process-wide session so every GitHub call reuses pooled keep-alive
+    connections. The pool is sized for the fetcher's concurrency.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(GITHUB_FETCH_CONCURRENCY, 10))
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(github_headers())
+                _session = session
+    return _session
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Pooled async client for GitHub calls made from request handlers."""
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(
+            headers=github_headers(),
+            timeout=httpx.Timeout(60, connect=10),
+            limits=httpx.Limits(max_connections=max(GITHUB_FETCH_CONCURRENCY, 10)),
+            follow_redirects=True
+        )
+    return _async_client
+
+
+def _retry_delay(resp: requests.Response | httpx.Response | None, attempt: int) -> float:
+    """Seconds to wait before the next attempt, preferring server hints."""
+    if resp is not None:
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        if resp.headers.get("X-RateLimit-Remaining") == "0":
+            reset = resp.headers.get("X-RateLimit-Reset")
+            if reset and reset.isdigit():
+                return max(float(reset) - time.time(), 0.0) + 1
+    # Exponential backoff with jitter: ~1s, 2s, 4s ... capped at 60s
+    return min(2 ** attempt, 60) * (0.5 + random.random() / 2)
+
+
+def _is_rate_limited(resp: requests.Response | httpx.Response) -> bool:
+    if resp.status_code in RETRY_STATUSES:
+        return True
+    # GitHub answers 403 (not 429) when the primary rate limit is exhausted
+    return resp.status_code == 403 and (
+        resp.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in resp.headers
+    )
+
+
+def _wait_for_rate_limit():
+    delay = _rate_limited_until - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def _note_rate_limit(resp: requests.Response | httpx.Response):
+    """Pause all workers when GitHub reports the quota is used up."""
+    global _rate_limited_until
+    if resp.headers.get("X-RateLimit-Remaining") != "0":
+        return
+    reset = resp.headers.get("X-RateLimit-Reset")
+    if reset and reset.isdigit():
+        with _rate_limit_lock:
+            _rate_limited_until = max(_rate_limited_until, float(reset))
+
+
+def github_get(url: str, max_retries: int = GITHUB_MAX_RETRIES, **kwargs) -> requests.Response:
+    """
+    GET through the pooled session, retrying 5xx/429 (and rate-limited 403)
+    with backoff that honours Retry-After and X-RateLimit-* headers.
+    Returns the last response; callers still check status_code.
+    """
+    kwargs.setdefault("timeout", (10, 60))
+    session = get_session()
+    resp = None
+    for attempt in range(max_retries + 1):
+        _wait_for_rate_limit()
+        try:
+            resp = session.get(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == max_retries:
+                raise
+            time.sleep(_retry_delay(None, attempt))
+            continue
+        _note_rate_limit(resp)
+        if not _is_rate_limited(resp) or attempt == max_retries:
+            return resp
+        delay = _retry_delay(resp, attempt)
+        print(f"GitHub returned {resp.status_code} for {url}, retrying in {delay:.1f}s")
+        resp.close()
+        time.sleep(delay)
+    return resp
+
+
+async def agithub_get(url: str, max_retries: int = GITHUB_MAX_RETRIES, **kwargs) -> httpx.Response:
+    """github_get() on the async client, with the same retries and shared rate-limit pause."""
+    client = get_async_client()
+    resp = None
+    for attempt in range(max_retries + 1):
+        delay = _rate_limited_until - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            resp = await client.get(url, **kwargs)
+        except (httpx.ConnectError, httpx.TimeoutException):
+            if attempt == max_retries:
+                raise
+            await asyncio.sleep(_retry_delay(None, attempt))
+            continue
+        _note_rate_limit(resp)
+        if not _is_rate_limited(resp) or attempt == max_retries:
+            return resp
+        delay = _retry_delay(resp, attempt)
+        print(f"GitHub returned {resp.status_code} for {url}, retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+    return resp
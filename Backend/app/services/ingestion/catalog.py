@@ -0,0 +1,195 @@
+import datetime
+import itertools
+import logging
+from pymongo import ASCENDING
+from app.db.mongoDB.mongo import repos_collection, async_repos_collection
+
+logger = logging.getLogger(__name__)
+
+# Catalogue entry status: ingesting -> ready | failed | cancelled (the last
+# ingestion's outcome; commit_sha and the stats stay those of the last success)
+STATUSES = ["ingesting", "ready", "failed", "cancelled"]
+SORTS = ["updated_at", "added_at", "name"]
+
+REPO_KEY = ["repo_owner", "repo_name"]
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _as_date(value) -> datetime.datetime | None:
+    """A stored timestamp as a datetime: ISO strings are parsed, anything unreadable is None."""
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _listing_index(owner: str | None, status: str | None, sort: str) -> list[str]:
+    """
+    Fields of the index that answers a listing on its own: equality filters
+    first, then the sort key, then the repo key so the page can be projected
+    from index keys without reading documents. An owner filter on a
+    status-first index is checked against the index keys too.
+    """
+    order = REPO_KEY if sort == "name" else [sort] + REPO_KEY
+    if status:
+        return ["status"] + order
+    if owner and sort != "name":
+        return ["repo_owner", sort, "repo_name"]
+    return order
+
+
+def _index_name(fields: list[str]) -> str:
+    return "_".join(f"{field}_1" for field in fields)
+
+
+def ensure_repo_catalog():
+    """
+    Create the catalogue's indexes, after bringing entries written by older
+    versions in line: duplicate entries of a repo (every fetch used to
+    insert one) are dropped keeping the oldest, added_at / updated_at
+    stored as ISO strings become dates, missing or unreadable ones are
+    taken from the ObjectId time, and entries without a status count as
+    ready.
+    """
+    if repos_collection is None:
+        return
+    duplicates = repos_collection.aggregate([
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": {"owner": "$repo_owner", "repo": "$repo_name"}, "ids": {"$push": "$_id"}}},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ])
+    for group in duplicates:
+        repos_collection.delete_many({"_id": {"$in": group["ids"][1:]}})
+        logger.info(f"Removed {len(group['ids']) - 1} duplicate catalogue entries of "
+                    f"{group['_id']['owner']}/{group['_id']['repo']}")
+    # One entry per repo, so this is a short loop; parsing here means one bad
+    # string can't fail the whole update the way a server-side $toDate would
+    legacy = repos_collection.find(
+        {"$or": [{field: {"$not": {"$type": "date"}}} for field in ("added_at", "updated_at")]},
+        {"added_at": 1, "updated_at": 1}
+    )
+    for doc in legacy:
+        added_at = _as_date(doc.get("added_at")) or doc["_id"].generation_time
+        updated_at = _as_date(doc.get("updated_at")) or added_at
+        repos_collection.update_one({"_id": doc["_id"]}, {"$set": {"added_at": added_at, "updated_at": updated_at}})
+    repos_collection.update_many({"status": {"$exists": False}}, {"$set": {"status": "ready"}})
+
+    repos_collection.create_index([(field, ASCENDING) for field in REPO_KEY], unique=True,
+                                  name=_index_name(REPO_KEY))
+    listings = {
+        tuple(_listing_index(owner, status, sort))
+        for owner, status, sort in itertools.product((None, "owner"), (None, "status"), SORTS)
+    }
+    for fields in sorted(listings):
+        if list(fields) != REPO_KEY:
+            repos_collection.create_index([(field, ASCENDING) for field in fields], name=_index_name(fields))
+
+
+def mark_repo(owner: str, repo: str, branch: str, status: str, job_id=None, error: str | None = None):
+    """Create the repo's catalogue entry if needed and set the status of its current ingestion."""
+    now = _now()
+    fields = {"default_branch": branch, "status": status, "updated_at": now, "error": error}
+    if job_id is not None:
+        fields["last_job_id"] = str(job_id)
+    repos_collection.update_one(
+        {"repo_owner": owner, "repo_name": repo},
+        {"$set": fields, "$setOnInsert": {"added_at": now}},
+        upsert=True
+    )
+
+
+def record_repo(owner: str, repo: str, branch: str, summary: dict, job_id=None):
+    """Store a finished ingestion: the commit, file/chunk/byte counts, embedding model and timings."""
+    now = _now()
+    fields = {
+        "default_branch": branch,
+        "status": "ready",
+        "error": None,
+        "commit_sha": summary["commit_sha"],
+        "tree_sha": summary["tree_sha"],
+        "ingest_mode": summary.get("mode"),
+        "updated_at": now,
+        "ingested_at": now,
+        **summary.get("stats", {}),
+    }
+    if summary.get("timings"):
+        fields["timings"] = summary["timings"]
+    if job_id is not None:
+        fields["last_job_id"] = str(job_id)
+    repos_collection.update_one(
+        {"repo_owner": owner, "repo_name": repo},
+        {"$set": fields, "$setOnInsert": {"added_at": now}},
+        upsert=True
+    )
+
+
+def serialize_repo(doc: dict) -> dict:
+    """Shape a catalogue entry for API responses."""
+    def iso(value):
+        return value.isoformat() if isinstance(value, datetime.datetime) else value
+
+    return {
+        "owner": doc.get("repo_owner"),
+        "repo": doc.get("repo_name"),
+        "default_branch": doc.get("default_branch"),
+        "status": doc.get("status"),
+        "error": doc.get("error"),
+        "commit_sha": doc.get("commit_sha"),
+        "files": doc.get("files"),
+        "chunks": doc.get("chunks"),
+        "bytes": doc.get("bytes"),
+        "lines": doc.get("lines"),
+        "embedding_model": doc.get("embedding_model"),
+        "embedding_dimensions": doc.get("embedding_dimensions"),
+        "timings": doc.get("timings"),
+        "last_job_id": doc.get("last_job_id"),
+        "added_at": iso(doc.get("added_at")),
+        "updated_at": iso(doc.get("updated_at")),
+        "ingested_at": iso(doc.get("ingested_at")),
+    }
+
+
+async def list_repos(owner: str | None = None, status: str | None = None, sort: str = "updated_at",
+                     descending: bool = True, offset: int = 0, limit: int = 50) -> tuple[list[dict], int]:
+    """
+    One page of the catalogue. Filtering, sorting, skipping and counting
+    run on a covering index (hinted, and projected to its keys only), so
+    they never read documents; only the page's own entries are fetched,
+    by the unique repo key.
+    Returns: (catalogue entries of the page, number of entries matching the filters)
+    """
+    fields = _listing_index(owner, status, sort)
+    query = {}
+    if owner:
+        query["repo_owner"] = owner
+    if status:
+        query["status"] = status
+    # Fields pinned by a leading equality filter add nothing to the order
+    leading = len(list(itertools.takewhile(lambda field: field in query, fields)))
+    direction = -1 if descending else 1
+    hint = _index_name(fields)
+    total = await async_repos_collection.count_documents(query, hint=hint)
+    keys = await async_repos_collection.find(
+        query, {"_id": 0, "repo_owner": 1, "repo_name": 1}
+    ).hint(hint).sort([(field, direction) for field in fields[leading:]]).skip(offset).limit(limit).to_list()
+    if not keys:
+        return [], total
+    docs = await async_repos_collection.find({"$or": keys}).to_list()
+    by_key = {(doc["repo_owner"], doc["repo_name"]): doc for doc in docs}
+    page = [by_key.get((key["repo_owner"], key["repo_name"])) for key in keys]
+    return [doc for doc in page if doc is not None], total
+
+
+async def list_repo_names() -> list[dict]:
+    """Every catalogued repo's owner, name and added_at, oldest first, read from the added_at index alone."""
+    fields = _listing_index(None, None, "added_at")
+    return await async_repos_collection.find(
+        {}, {"_id": 0, "repo_owner": 1, "repo_name": 1, "added_at": 1}
+    ).hint(_index_name(fields)).sort([(field, ASCENDING) for field in fields]).to_list()
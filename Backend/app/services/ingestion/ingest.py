@@ -0,0 +1,243 @@
+import os
+import time
+from app.db.files.index import get_file_index, save_file_index
+from app.db.lexical.index import get_lexical_index, lexical_index_exists
+from app.db.symbols.index import get_symbol_index, symbol_index_exists, build_symbol_index_from_disk
+from app.db.trigrams.index import get_trigram_index, trigram_index_exists, build_trigram_index_from_disk
+from app.db.vector_store import vector_store, bump_collection_version
+from app.services.github.archive import fetch_archive, ArchiveUnavailable
+from app.services.github.fetcher import fetch_tree, fetch_blobs, list_tree, resolve_ref, GitHubFetchError
+from app.services.github.session import agithub_get
+from app.services.ingestion.manifest import load_manifest, save_manifest, delete_manifest, diff_files
+from app.services.ingestion.pipeline import IngestPipeline
+from app.utils.embeddor import embedding_cache, backend
+from app.utils.chunker import detect_language
+from app.utils.file_filters import should_skip
+from app.core.config import GITHUB_API_URL, GITHUB_INGEST_MODE, REPOS_DIR, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+
+
+class RepoNotFound(Exception):
+    """Raised when GitHub has no repository with the given owner/name."""
+
+
+async def get_default_branch(owner: str, repo: str) -> str:
+    """Look the repository up on GitHub and return its default branch."""
+    repo_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}"
+    repo_resp = await agithub_get(repo_url)
+    if repo_resp.status_code == 404:
+        raise RepoNotFound(f"Repository {owner}/{repo} not found")
+    elif repo_resp.status_code != 200:
+        raise GitHubFetchError(f"GitHub returned {repo_resp.status_code}: {repo_resp.text}")
+    return repo_resp.json().get("default_branch", "main")
+
+
+def download_repo(owner, repo, ref, local_dir, blobs=None, progress=None, on_file=None):
+    """
+    Download a repo into local_dir. The whole ref is pulled as a single tarball;
+    the per-file tree fetch only runs when the archive can't be used. on_file
+    sees each path once: files the tarball delivered before it broke off are
+    downloaded again by the tree fetch but not handed over a second time.
+    """
+    delivered = set()
+
+    def deliver(rel_path, data):
+        # Paths are unique within one fetch, so only the fallback can repeat one
+        if rel_path not in delivered:
+            delivered.add(rel_path)
+            on_file(rel_path, data)
+
+    if GITHUB_INGEST_MODE == "archive":
+        try:
+            return fetch_archive(owner, repo, ref, local_dir, progress=progress,
+                                 on_file=deliver if on_file is not None else None)
+        except ArchiveUnavailable as e:
+            print(f"{e}. Falling back to the tree fetcher")
+            if progress is not None:
+                progress.set(files_fetched=0, bytes_fetched=0)
+    return fetch_tree(owner, repo, ref, local_dir, blobs=blobs, progress=progress,
+                      on_file=deliver if on_file is not None else None)
+
+
+def create_embeddings(folder_name: str, collection_name: str, ref: str, paths: list[str] | None = None,
+                      max_tokens: int = CHUNK_MAX_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+                      progress=None) -> list[str]:
+    """
+    Embed files that are already on disk, split into syntax-aware chunks.
+    Fresh downloads don't go through here: refresh_repo streams them straight
+    into the pipeline as they are fetched.
+
+    Args:
+        folder_name: Root folder of the downloaded repo.
+        collection_name: Vector store collection of the repo ('owner_repo').
+        ref: Branch being ingested; part of every deterministic point ID.
+        paths: Repo-relative files to embed; the whole folder when omitted.
+        max_tokens: Token budget per chunk.
+        overlap_tokens: Overlap when a block has to be cut between lines.
+        progress: Optional IngestProgress updated as chunks are embedded.
+    Returns: Relative paths that failed to embed
+    """
+    if paths is None:
+        paths = []
+        # Walk through all files recursively
+        for root, dirs, files in os.walk(folder_name):
+            for file_name in files:
+                rel = os.path.relpath(os.path.join(root, file_name), folder_name)
+                paths.append(rel.replace(os.sep, "/"))
+    if progress is not None:
+        progress.set(files_to_embed=len(paths))
+
+    with IngestPipeline(collection_name, ref, progress=progress,
+                        max_tokens=max_tokens, overlap_tokens=overlap_tokens) as pipeline:
+        for rel_path in paths:
+            if progress is not None:
+                progress.check_cancelled()
+            file_path = os.path.join(folder_name, *rel_path.split("/"))
+            try:
+                with open(file_path, "rb") as f:
+                    pipeline.submit(rel_path, f.read())
+            except FileNotFoundError as e:
+                print(f"Skipped {file_path}: {e}")
+                pipeline.submit(rel_path, b"")
+    return pipeline.failed
+
+
+def _file_entries(repo_key: str, files: dict, blobs: dict, fresh: dict, mode: str) -> dict:
+    """
+    File index entries for the ingested files: stats of the files chunked
+    in this run, the previous entry for files an incremental run didn't touch.
+    """
+    previous = {}
+    if mode == "incremental":
+        index = get_file_index(repo_key)
+        previous = index.files() if index is not None else {}
+    entries = {}
+    for rel_path, sha in files.items():
+        if rel_path in fresh:
+            entries[rel_path] = {**fresh[rel_path], "sha": sha}
+        elif rel_path in previous:
+            entries[rel_path] = {**previous[rel_path], "sha": sha}
+        else:
+            entries[rel_path] = {"size": blobs[rel_path]["size"], "language": detect_language(rel_path),
+                                 "sha": sha, "lines": 0}
+    return entries
+
+
+def repo_stats(repo_key: str) -> dict:
+    """File, byte, line and chunk totals of an ingested repo, and the embedding model it was indexed with."""
+    index = get_file_index(repo_key)
+    return {
+        "files": len(index) if index is not None else 0,
+        "bytes": sum(index.sizes) if index is not None else 0,
+        "lines": sum(index.lines) if index is not None else 0,
+        "chunks": get_lexical_index(repo_key).count(),
+        "embedding_model": backend.model,
+        "embedding_dimensions": backend.dimensions,
+    }
+
+
+def refresh_repo(owner: str, repo: str, ref: str, progress=None) -> dict:
+    """
+    Bring the local copy and the repo's vector collection in line with a ref.
+    The first run downloads everything; later runs diff the git tree against
+    the stored manifest and only fetch, re-embed and replace changed files.
+    Files are chunked, embedded and upserted while the download is still
+    running (see IngestPipeline).
+    Returns: A summary with the commit/tree SHAs, what was touched, repo_stats() and timings
+    """
+    started = time.monotonic()
+    repo_key = f"{owner}_{repo}"
+    local_dir = os.path.join(REPOS_DIR, repo_key)
+
+    if progress is not None:
+        progress.set_stage("resolving")
+    head = resolve_ref(owner, repo, ref)
+    manifest = load_manifest(repo_key)
+    # Vectors from another embedding model can't be mixed with new ones, and
+    # repos ingested before the BM25 index existed need a full pass to build it
+    if manifest and (manifest.get("embedding_model") != backend.model or not vector_store.collection_matches(repo_key)
+                     or not lexical_index_exists(repo_key)):
+        manifest = None
+    if manifest and manifest.get("tree_sha") == head["tree_sha"] and os.path.isdir(local_dir):
+        return {**head, "mode": "unchanged", "changed": 0, "removed": 0, "failed": [],
+                "stats": repo_stats(repo_key), "timings": {"total_seconds": round(time.monotonic() - started, 2)}}
+    tree = list_tree(owner, repo, head["tree_sha"])
+
+    blobs = {b["path"]: b for b in tree["blobs"] if not should_skip(b["path"], b["size"])}
+    files = {path: b["sha"] for path, b in blobs.items()}
+
+    if manifest and os.path.isdir(local_dir):
+        mode = "incremental"
+        changed, removed = diff_files(manifest.get("files", {}), files)
+        for rel_path in removed:
+            try:
+                os.remove(os.path.join(local_dir, *rel_path.split("/")))
+            except FileNotFoundError:
+                pass
+        # Old points go first so the new chunks can stream in behind them
+        vector_store.ensure_collection(repo_key)
+        vector_store.delete_paths(repo_key, changed + removed)
+        get_lexical_index(repo_key).delete_paths(changed + removed)
+        if not symbol_index_exists(repo_key):
+            # Downloaded before symbols were indexed: cover the untouched files from disk
+            build_symbol_index_from_disk(repo_key)
+        get_symbol_index(repo_key).delete_paths(changed + removed)
+        if not trigram_index_exists(repo_key):
+            build_trigram_index_from_disk(repo_key)
+        get_trigram_index(repo_key).delete_paths(changed + removed)
+        bump_collection_version(repo_key)
+    else:
+        mode = "full"
+        changed, removed = sorted(files), []
+        # Start from an empty collection so points from older ingests can't linger.
+        # The old manifest no longer describes it, so drop that too
+        delete_manifest(repo_key)
+        vector_store.ensure_collection(repo_key, recreate=True)
+        get_lexical_index(repo_key).clear()
+        get_symbol_index(repo_key).clear()
+        get_trigram_index(repo_key).clear()
+        bump_collection_version(repo_key)
+
+    if progress is not None:
+        progress.set(files_total=len(changed), files_to_embed=len(changed))
+        progress.set_stage("ingesting")
+    with IngestPipeline(repo_key, ref, progress=progress) as pipeline:
+        if mode == "incremental":
+            fetched = fetch_blobs(owner, repo, [blobs[p] for p in changed], local_dir, progress=progress,
+                                  on_file=pipeline.submit)
+        else:
+            fetched = download_repo(owner, repo, head["commit_sha"], local_dir, blobs=list(blobs.values()),
+                                    progress=progress, on_file=pipeline.submit)
+    get_lexical_index(repo_key).done_loading()
+    failed = set(fetched.get("failed", [])) | set(pipeline.failed)
+
+    if progress is not None:
+        progress.set_stage("finalizing")
+    # Failed files keep their previous SHA (or none) so the next refresh retries them
+    old_files = manifest.get("files", {}) if manifest and mode == "incremental" else {}
+    for rel_path in failed:
+        if rel_path in old_files:
+            files[rel_path] = old_files[rel_path]
+        else:
+            files.pop(rel_path, None)
+    save_file_index(repo_key, _file_entries(repo_key, files, blobs, pipeline.file_stats, mode))
+    trigram_index = get_trigram_index(repo_key)
+    trigram_index.flush()
+    if trigram_index.needs_compaction():
+        # Re-indexed and deleted files leave stale IDs in the posting lists
+        build_trigram_index_from_disk(repo_key)
+    save_manifest(repo_key, {
+        "ref": ref,
+        "commit_sha": head["commit_sha"],
+        "tree_sha": head["tree_sha"] if not failed else None,
+        "embedding_model": backend.model,
+        "files": files
+    })
+    if embedding_cache is not None:
+        print(f"Embedding cache: {embedding_cache.stats()}")
+    print(f"Embedding backend: {backend.stats()}")
+    timings = {
+        "total_seconds": round(time.monotonic() - started, 2),
+        "pipeline_seconds": pipeline.stats()["elapsed_seconds"],
+    }
+    return {**head, "mode": mode, "changed": len(changed), "removed": len(removed), "failed": sorted(failed),
+            "stats": repo_stats(repo_key), "timings": timings}
@@ -0,0 +1,243 @@
+import datetime
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from app.core.config import INGEST_MAX_CONCURRENT_JOBS, INGEST_PROGRESS_INTERVAL
+from app.db.mongoDB.mongo import jobs_collection, async_jobs_collection
+from app.services.ingestion.catalog import mark_repo, record_repo
+from app.services.ingestion.ingest import refresh_repo
+from app.services.ingestion.progress import IngestProgress, IngestionCancelled
+
+logger = logging.getLogger(__name__)
+
+# Job lifecycle: queued -> running -> completed | failed | cancelled
+ACTIVE_STATUSES = ["queued", "running", "cancelling"]
+# Jobs in an active status also carry active: true; a partial unique index on
+# (owner, repo) over those lets only one job per repo be in flight
+ACTIVE_INDEX = "one_active_job_per_repo"
+# Marks the jobs this process started, so a job it has inserted but not yet
+# started isn't mistaken for one orphaned by an earlier process
+_PROCESS = str(ObjectId())
+
+_executor = ThreadPoolExecutor(max_workers=max(INGEST_MAX_CONCURRENT_JOBS, 1), thread_name_prefix="ingest")
+# Live progress of the jobs owned by this process, keyed by job id
+_active: dict[str, IngestProgress] = {}
+_active_lock = threading.Lock()
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def serialize_job(job: dict) -> dict:
+    """Shape a job document for API responses."""
+    def iso(value):
+        return value.isoformat() if isinstance(value, datetime.datetime) else value
+
+    return {
+        "job_id": str(job["_id"]),
+        "owner": job.get("owner"),
+        "repo": job.get("repo"),
+        "branch": job.get("branch"),
+        "status": job.get("status"),
+        "progress": job.get("progress", {}),
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "attempts": job.get("attempts", 1),
+        "created_at": iso(job.get("created_at")),
+        "started_at": iso(job.get("started_at")),
+        "finished_at": iso(job.get("finished_at")),
+        "updated_at": iso(job.get("updated_at")),
+    }
+
+
+def _update(job_id: ObjectId, fields: dict, settle: bool = False):
+    """Set fields on a job; settle=True also clears its active flag, for a final status."""
+    update = {"$set": {**fields, "updated_at": _now()}}
+    if settle:
+        update["$unset"] = {"active": ""}
+    jobs_collection.update_one({"_id": job_id}, update)
+
+
+def _progress_writer(job_id: ObjectId):
+    """on_change callback that persists progress at most every INGEST_PROGRESS_INTERVAL seconds."""
+    last_write = [0.0]
+    lock = threading.Lock()
+
+    def write(progress: IngestProgress):
+        now = time.monotonic()
+        with lock:
+            if now - last_write[0] < INGEST_PROGRESS_INTERVAL:
+                return
+            last_write[0] = now
+        try:
+            _update(job_id, {"progress": progress.snapshot()})
+        except Exception as e:
+            logger.warning(f"Failed to persist progress for job {job_id}: {e}")
+
+    return write
+
+
+def _run(job_id: ObjectId, owner: str, repo: str, branch: str, progress: IngestProgress):
+    key = str(job_id)
+    started = False
+    try:
+        if progress.cancel_event.is_set():
+            raise IngestionCancelled("Cancelled before start")
+        _update(job_id, {"status": "running", "started_at": _now()})
+        started = True
+        mark_repo(owner, repo, branch, "ingesting", job_id)
+        progress.on_change = _progress_writer(job_id)
+        summary = refresh_repo(owner, repo, branch, progress=progress)
+        record_repo(owner, repo, branch, summary, job_id)
+        final = {"status": "completed", "result": summary}
+    except IngestionCancelled:
+        final = {"status": "cancelled"}
+    except Exception as e:
+        logger.error(f"Ingestion job {key} for {owner}/{repo} failed: {e}")
+        final = {"status": "failed", "error": str(e)}
+    progress.on_change = None
+    try:
+        _update(job_id, {**final, "progress": progress.snapshot(), "finished_at": _now()}, settle=True)
+    except Exception as e:
+        logger.error(f"Failed to persist final state of job {key}: {e}")
+    # A job cancelled while still queued never touched the repo: leave the catalogue alone
+    if started and final["status"] != "completed":
+        try:
+            mark_repo(owner, repo, branch, final["status"], job_id, final.get("error"))
+        except Exception as e:
+            logger.error(f"Failed to update the catalogue entry of {owner}/{repo}: {e}")
+    # Only now: until the final state is stored, submit_job and cancel_job must still see the job as live
+    with _active_lock:
+        _active.pop(key, None)
+
+
+def _start(job: dict):
+    progress = IngestProgress()
+    with _active_lock:
+        _active[str(job["_id"])] = progress
+    _executor.submit(_run, job["_id"], job["owner"], job["repo"], job["branch"], progress)
+
+
+async def submit_job(owner: str, repo: str, branch: str) -> dict:
+    """
+    Queue an ingestion and return its job document right away.
+    A repo that already has an ingestion in flight gets that job back; the
+    unique index on active jobs settles concurrent submits, so only one
+    of them inserts a job.
+    """
+    now = _now()
+    job = {
+        "owner": owner,
+        "repo": repo,
+        "branch": branch,
+        "status": "queued",
+        "active": True,
+        "process": _PROCESS,
+        "progress": IngestProgress().snapshot(),
+        "result": None,
+        "error": None,
+        "attempts": 1,
+        "created_at": now,
+        "updated_at": now,
+    }
+    for _ in range(3):
+        try:
+            await async_jobs_collection.insert_one(job)
+        except DuplicateKeyError:
+            existing = await async_jobs_collection.find_one({"owner": owner, "repo": repo, "active": True})
+            if existing is None:
+                continue  # finished in the meantime
+            if existing.get("process") == _PROCESS or str(existing["_id"]) in _active:
+                return existing
+            # Left behind by a previous process that never finished it
+            await async_jobs_collection.update_one(
+                {"_id": existing["_id"], "active": True},
+                {"$set": {"status": "failed", "error": "Superseded", "updated_at": _now()}, "$unset": {"active": ""}}
+            )
+            continue
+        _start(job)
+        return job
+    raise RuntimeError(f"Could not queue an ingestion of {owner}/{repo}: another job keeps taking its place")
+
+
+async def get_job(job_id: str) -> dict | None:
+    """Job document with live progress when this process is running it."""
+    job = await async_jobs_collection.find_one({"_id": ObjectId(job_id)})
+    if job is None:
+        return None
+    progress = _active.get(job_id)
+    if progress is not None:
+        job["progress"] = progress.snapshot()
+    return job
+
+
+async def list_jobs(owner: str | None = None, repo: str | None = None, limit: int = 20) -> list[dict]:
+    query = {}
+    if owner:
+        query["owner"] = owner
+    if repo:
+        query["repo"] = repo
+    jobs = await async_jobs_collection.find(query).sort("created_at", -1).limit(limit).to_list()
+    for job in jobs:
+        progress = _active.get(str(job["_id"]))
+        if progress is not None:
+            job["progress"] = progress.snapshot()
+    return jobs
+
+
+async def cancel_job(job_id: str) -> dict | None:
+    """Ask a queued or running job to stop at its next checkpoint."""
+    job = await async_jobs_collection.find_one({"_id": ObjectId(job_id)})
+    if job is None or job["status"] not in ACTIVE_STATUSES:
+        return job
+    progress = _active.get(job_id)
+    if progress is not None:
+        progress.cancel()
+        fields = {"status": "cancelling"}
+    else:
+        # Nobody is running it (e.g. orphaned by a restart): settle it now
+        fields = {"status": "cancelled", "finished_at": _now()}
+    update = {"$set": {**fields, "updated_at": _now()}}
+    if fields["status"] == "cancelled":
+        update["$unset"] = {"active": ""}
+    # Only while the job is still active: it may have reached its final state since it was read,
+    # and then the stored state stands
+    await async_jobs_collection.update_one({"_id": job["_id"], "active": True}, update)
+    return await async_jobs_collection.find_one({"_id": job["_id"]})
+
+
+def resume_jobs():
+    """
+    Pick up jobs a previous process left queued or running. Ingestion is
+    incremental and point IDs are deterministic, so re-running is safe and
+    only redoes the work that never completed.
+    """
+    if jobs_collection is None:
+        return
+    jobs_collection.create_index([("owner", 1), ("repo", 1), ("status", 1)])
+    jobs_collection.create_index([("created_at", -1)])
+    # Active jobs from before the active flag: the newest per repo gets it, older ones are superseded
+    flagged = {(job["owner"], job["repo"]) for job in jobs_collection.find({"active": True}, {"owner": 1, "repo": 1})}
+    legacy = jobs_collection.find({"status": {"$in": ACTIVE_STATUSES}, "active": {"$exists": False}})
+    for job in legacy.sort("created_at", -1):
+        if (job["owner"], job["repo"]) in flagged:
+            _update(job["_id"], {"status": "failed", "error": "Superseded"})
+        else:
+            flagged.add((job["owner"], job["repo"]))
+            _update(job["_id"], {"active": True})
+    jobs_collection.create_index([("owner", 1), ("repo", 1)], unique=True, name=ACTIVE_INDEX,
+                                 partialFilterExpression={"active": True})
+
+    for job in jobs_collection.find({"active": True}):
+        if str(job["_id"]) in _active:
+            continue
+        if job["status"] == "cancelling":
+            _update(job["_id"], {"status": "cancelled", "finished_at": _now()}, settle=True)
+            continue
+        logger.info(f"Resuming ingestion job {job['_id']} for {job['owner']}/{job['repo']}")
+        _update(job["_id"], {"status": "queued", "process": _PROCESS, "attempts": job.get("attempts", 1) + 1})
+        _start(job)
@@ -0,0 +1,48 @@
+import json
+import os
+from app.core.config import INDEX_DIR
+
+
+def manifest_path(repo_key: str) -> str:
+    """Location of the manifest for a repo stored as 'owner_repo'."""
+    return os.path.join(INDEX_DIR, repo_key, "manifest.json")
+
+
+def load_manifest(repo_key: str) -> dict | None:
+    """
+    Load what was ingested last time for this repo.
+    Returns: {"commit_sha", "tree_sha", "embedding_model", "files": {path: blob_sha}} or None
+    """
+    try:
+        with open(manifest_path(repo_key), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def save_manifest(repo_key: str, manifest: dict):
+    """Write the manifest atomically so a crash never leaves it half-written."""
+    path = manifest_path(repo_key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def diff_files(old_files: dict, new_files: dict) -> tuple[list[str], list[str]]:
+    """
+    Compare two {path: blob_sha} maps.
+    Returns: (changed, removed) where changed holds added and modified paths
+    """
+    changed = sorted(path for path, sha in new_files.items() if old_files.get(path) != sha)
+    removed = sorted(path for path in old_files if path not in new_files)
+    return changed, removed
+
+
+def delete_manifest(repo_key: str):
+    """Forget the last ingest, so the next refresh starts from scratch."""
+    try:
+        os.remove(manifest_path(repo_key))
+    except FileNotFoundError:
+        pass
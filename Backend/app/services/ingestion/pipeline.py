@@ -0,0 +1,361 @@
+import os
+import queue
+import threading
+import time
+from qdrant_client.models import PointStruct
+from app.core.config import (
+    EMBEDDING_BATCH_MAX_ITEMS, EMBEDDING_BATCH_MAX_TOKENS, QDRANT_UPLOAD_PARALLEL,
+    INGEST_CHUNK_WORKERS, INGEST_FILE_QUEUE_SIZE, INGEST_CHUNK_QUEUE_SIZE, INGEST_BATCH_QUEUE_SIZE,
+    INGEST_BATCH_LINGER, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+)
+from app.db.files.index import file_stats
+from app.db.lexical.index import get_lexical_index
+from app.db.symbols.index import get_symbol_index
+from app.db.trigrams.index import get_trigram_index
+from app.db.vector_store import vector_store, point_id, bump_collection_version
+from app.utils.chunker import chunk_text
+from app.utils.embeddor import create_embeddings_batch, backend
+from app.utils.file_filters import EXCLUDED_EXTS
+from app.utils.symbols import extract_symbols
+
+# Queued after the last real item; each worker that takes one exits
+_DONE = object()
+
+
+class Stage:
+    """
+    A pool of worker threads that take items from one queue and emit into the next.
+
+    handle(item, emit) processes one item and returns how many units (files,
+    chunks, points) it covered. on_idle(emit) runs when nothing arrived for
+    `linger` seconds and finish(emit) once after the last item; both exist for
+    stages that hold state between items. When the last worker exits, the end
+    marker is forwarded to every worker of the next stage.
+    """
+
+    def __init__(self, name: str, unit: str, handle, workers: int, inbox: queue.Queue,
+                 outbox: queue.Queue | None = None, on_idle=None, finish=None, linger: float | None = None):
+        self.name = name
+        self.unit = unit
+        self.handle = handle
+        self.workers = max(workers, 1)
+        self.inbox = inbox
+        self.outbox = outbox
+        self.on_idle = on_idle
+        self.finish = finish
+        self.linger = linger
+        self.next_workers = 0
+        self.stopped = lambda: False
+
+        self._lock = threading.Lock()
+        self._running = 0
+        self._threads = []
+        self.items = 0
+        self.units = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.queue_peak = 0
+        self.started_at = None
+        self.finished_at = None
+
+    def emit(self, item):
+        # Blocks while the next stage is full: this is the backpressure
+        self.outbox.put(item)
+
+    def start(self):
+        self.started_at = time.monotonic()
+        self._running = self.workers
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"ingest-{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self):
+        while True:
+            try:
+                item = self.inbox.get(timeout=self.linger) if self.on_idle else self.inbox.get()
+            except queue.Empty:
+                if not self.stopped():
+                    self._run(lambda: self.on_idle(self.emit) or 0, item=None)
+                continue
+            if item is _DONE:
+                break
+            with self._lock:
+                self.queue_peak = max(self.queue_peak, self.inbox.qsize() + 1)
+            if self.stopped():
+                continue  # keep draining so upstream puts never block
+            self._run(lambda: self.handle(item, self.emit), item=item)
+
+        with self._lock:
+            self._running -= 1
+            last = self._running == 0
+        if not last:
+            return
+        if self.finish is not None and not self.stopped():
+            self._run(lambda: self.finish(self.emit) or 0, item=None)
+        if self.outbox is not None:
+            for _ in range(self.next_workers):
+                self.outbox.put(_DONE)
+        self.finished_at = time.monotonic()
+
+    def _run(self, call, item):
+        start = time.perf_counter()
+        try:
+            units = call()
+        except Exception as e:
+            print(f"Ingestion stage '{self.name}' failed on an item: {e}")
+            units, failed = 0, True
+        else:
+            failed = False
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.busy += elapsed
+            if item is not None:
+                self.items += 1
+                self.units += 1 if units is None else units
+            if failed:
+                self.errors += 1
+
+    def stats(self) -> dict:
+        end = self.finished_at or time.monotonic()
+        elapsed = max(end - self.started_at, 1e-9) if self.started_at else 0.0
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "items": self.items,
+                self.unit: self.units,
+                f"{self.unit}_per_second": round(self.units / elapsed, 1) if elapsed else 0.0,
+                "errors": self.errors,
+                "utilization": round(self.busy / (elapsed * self.workers), 2) if elapsed else 0.0,
+                "queue_depth": self.inbox.qsize(),
+                "queue_peak": self.queue_peak,
+                "queue_size": self.inbox.maxsize,
+            }
+
+
+class IngestPipeline:
+    """
+    Streams fetched files through chunking, embedding and vector store upserts.
+
+        fetcher -> files -> chunk (chunk_text) -> chunks -> batch -> batches -> embed -> points -> upsert
+
+    The upsert stage writes each point to the vector store and the repo's BM25 index.
+
+    Every hop is a bounded queue, so the network, the embedding API and the vector store
+    are busy at the same time, a slow stage holds back the ones before it
+    (down to the fetcher) and memory is capped by the queue sizes rather than
+    by the size of the repo.
+
+    Usage:
+        with IngestPipeline("owner_repo", "main") as pipeline:
+            fetch_archive(..., on_file=pipeline.submit)
+        pipeline.failed  # paths whose chunks did not all reach the vector store
+    """
+
+    def __init__(self, collection_name: str, ref: str, progress=None,
+                 max_tokens: int = CHUNK_MAX_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS):
+        self.collection_name = collection_name
+        self.ref = ref
+        self.progress = progress
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.failed = []
+        self.file_stats = {}  # path -> {"size", "language", "lines"} of every file chunked
+
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._remaining = {}  # path -> chunks not yet upserted
+        self._failed = set()
+        self._batch = []
+        self._batch_tokens = 0
+
+        files_q = queue.Queue(INGEST_FILE_QUEUE_SIZE)
+        chunks_q = queue.Queue(INGEST_CHUNK_QUEUE_SIZE)
+        batches_q = queue.Queue(INGEST_BATCH_QUEUE_SIZE)
+        points_q = queue.Queue(INGEST_BATCH_QUEUE_SIZE)
+        self.stages = [
+            Stage("chunk", "files", self._chunk, INGEST_CHUNK_WORKERS, files_q, chunks_q),
+            # One batcher: it owns the batch being filled
+            Stage("batch", "chunks", self._add_to_batch, 1, chunks_q, batches_q,
+                  on_idle=self._flush_batch, finish=self._flush_batch, linger=INGEST_BATCH_LINGER),
+            Stage("embed", "chunks", self._embed, backend.concurrency, batches_q, points_q),
+            Stage("upsert", "points", self._upsert, QDRANT_UPLOAD_PARALLEL, points_q),
+        ]
+        for stage, next_stage in zip(self.stages, self.stages[1:]):
+            stage.next_workers = next_stage.workers
+        for stage in self.stages:
+            stage.stopped = self._stopped
+        self._started_at = None
+        self._finished_at = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # The fetch failed: drop what is queued and let the error propagate
+            self._stop.set()
+            self._shutdown()
+        return False
+
+    def _stopped(self) -> bool:
+        return self._stop.is_set() or (self.progress is not None and self.progress.cancel_event.is_set())
+
+    def start(self):
+        self._started_at = time.monotonic()
+        for stage in self.stages:
+            stage.start()
+        if self.progress is not None:
+            self.progress.pipeline = self
+
+    def submit(self, rel_path: str, data: bytes):
+        """Hand one fetched file to the pipeline; blocks while the chunkers are behind."""
+        if self._stopped():
+            return
+        self.stages[0].inbox.put((rel_path, data))
+
+    def close(self) -> list[str]:
+        """
+        Wait for everything submitted to reach the vector store and stop the workers.
+        Raises IngestionCancelled when the ingestion was cancelled meanwhile.
+        Returns: Relative paths that failed to embed or upsert
+        """
+        self._shutdown()
+        if self.progress is not None:
+            self.progress.check_cancelled()
+        return self.failed
+
+    def _shutdown(self):
+        first = self.stages[0]
+        for _ in range(first.workers):
+            first.inbox.put(_DONE)
+        for stage in self.stages:
+            stage.join()
+        self._finished_at = time.monotonic()
+        self.failed = sorted(self._failed)
+        print(f"Ingestion pipeline: {self.stats()}")
+
+    def stats(self) -> dict:
+        """Per-stage throughput, utilization and queue depth."""
+        end = self._finished_at or time.monotonic()
+        return {
+            "elapsed_seconds": round(end - self._started_at, 2) if self._started_at else 0.0,
+            "stages": {stage.name: stage.stats() for stage in self.stages},
+        }
+
+    def _file_done(self, rel_path: str, chunks: int, failed: bool = False):
+        """Count chunks of a file as settled; the file is done once all of them are."""
+        with self._lock:
+            if failed:
+                self._failed.add(rel_path)
+            remaining = self._remaining.get(rel_path, 0) - chunks
+            if remaining > 0:
+                self._remaining[rel_path] = remaining
+                return
+            self._remaining.pop(rel_path, None)
+        if self.progress is not None:
+            self.progress.add(files_embedded=1)
+
+    def _chunk(self, item, emit):
+        rel_path, data = item
+        ext = os.path.splitext(rel_path)[1].lower()
+        try:
+            # Same newline handling as reading the file in text mode
+            content = "" if ext in EXCLUDED_EXTS else data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+        except UnicodeDecodeError as e:
+            print(f"Skipped {rel_path}: {e}")
+            content = ""
+        try:
+            stats = file_stats(rel_path, data, content)
+            with self._lock:
+                self.file_stats[rel_path] = stats
+            try:
+                get_symbol_index(self.collection_name).replace_file(rel_path, *extract_symbols(rel_path, content))
+            except Exception as e:
+                print(f"Symbol extraction failed for {rel_path}: {e}")
+            if content:
+                get_trigram_index(self.collection_name).add_file(rel_path, content)
+            chunks = chunk_text(rel_path, content, self.max_tokens, self.overlap_tokens) if content.strip() else []
+        except Exception as e:
+            print(f"Failed to chunk {rel_path}: {e}")
+            self._file_done(rel_path, 1, failed=True)
+            raise
+        if not chunks:
+            self._file_done(rel_path, 0)
+            return 1
+
+        with self._lock:
+            self._remaining[rel_path] = len(chunks)
+        for i, chunk in enumerate(chunks):
+            emit((rel_path, i, chunk))
+        return 1
+
+    def _add_to_batch(self, chunk, emit):
+        tokens = chunk[2]["tokens"]
+        if self._batch and self._batch_tokens + tokens > EMBEDDING_BATCH_MAX_TOKENS:
+            self._flush_batch(emit)
+        self._batch.append(chunk)
+        self._batch_tokens += tokens
+        if len(self._batch) >= EMBEDDING_BATCH_MAX_ITEMS:
+            self._flush_batch(emit)
+        return 1
+
+    def _flush_batch(self, emit):
+        if not self._batch:
+            return 0
+        batch = self._batch
+        self._batch, self._batch_tokens = [], 0
+        emit(batch)
+        return 0
+
+    def _embed(self, batch, emit):
+        try:
+            vectors = create_embeddings_batch([chunk["text"] for _, _, chunk in batch])
+        except Exception as e:
+            print(f"Failed to embed {len(batch)} chunks: {e}")
+            for rel_path, _, _ in batch:
+                self._file_done(rel_path, 1, failed=True)
+            raise
+        emit([
+            PointStruct(
+                id=point_id(self.collection_name, self.ref, rel_path, i),
+                vector=vector,
+                payload={
+                    "text" : chunk["text"],
+                    "chunk" : i,
+                    "path" : rel_path,
+                    "language" : chunk["language"],
+                    "start_line" : chunk["start_line"],
+                    "end_line" : chunk["end_line"],
+                    "tokens" : chunk["tokens"],
+                    "content_hash" : chunk["content_hash"]
+                }
+            )
+            for (rel_path, i, chunk), vector in zip(batch, vectors)
+        ])
+        if self.progress is not None:
+            self.progress.add(chunks_embedded=len(batch))
+        return len(batch)
+
+    def _upsert(self, points, emit):
+        try:
+            vector_store.upsert(self.collection_name, points, batch_size=len(points), parallel=1)
+            get_lexical_index(self.collection_name).add(points)
+            bump_collection_version(self.collection_name)
+        except Exception as e:
+            print(f"Failed to upsert {len(points)} points: {e}")
+            for point in points:
+                self._file_done(point.payload["path"], 1, failed=True)
+            raise
+        if self.progress is not None:
+            self.progress.add(points_upserted=len(points))
+        for point in points:
+            self._file_done(point.payload["path"], 1)
+        return len(points)
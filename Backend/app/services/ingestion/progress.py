@@ -0,0 +1,89 @@
+import threading
+import time
+
+
+class IngestionCancelled(Exception):
+    """Raised inside an ingestion once its job has been cancelled."""
+
+
+class IngestProgress:
+    """
+    Thread-safe per-stage counters for one ingestion, plus its cancel flag.
+
+    Fetchers and the embedder call add() as work completes; on_change (if set)
+    is invoked after every update so the owner can persist a snapshot. While
+    an IngestPipeline runs it registers itself as `pipeline` and its per-stage
+    stats are included in snapshots.
+    """
+
+    COUNTERS = (
+        "files_total", "files_fetched", "bytes_fetched",
+        "files_to_embed", "files_embedded", "chunks_embedded", "points_upserted",
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cancel_event = threading.Event()
+        self.on_change = None
+        self.pipeline = None
+        self.stage = "queued"
+        self.started_at = None
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+
+    def set_stage(self, stage: str):
+        with self._lock:
+            if self.started_at is None:
+                self.started_at = time.time()
+            self.stage = stage
+        self._changed()
+
+    def set(self, **values):
+        with self._lock:
+            self.counters.update(values)
+        self._changed()
+
+    def add(self, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self.counters[key] += value
+        self._changed()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise IngestionCancelled("Ingestion cancelled")
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change(self)
+
+    def snapshot(self) -> dict:
+        """Counters plus overall percent and a naive ETA from the elapsed time."""
+        with self._lock:
+            counters = dict(self.counters)
+            stage = self.stage
+            started_at = self.started_at
+
+        # Fetching is cheap next to embedding, so weigh it as a fifth of the work
+        fetch_frac = counters["files_fetched"] / counters["files_total"] if counters["files_total"] else 0.0
+        embed_frac = counters["files_embedded"] / counters["files_to_embed"] if counters["files_to_embed"] else 0.0
+        if stage == "finalizing":
+            fetch_frac = embed_frac = 1.0
+        fraction = min(0.2 * fetch_frac + 0.8 * embed_frac, 1.0)
+
+        eta = None
+        if started_at and 0 < fraction < 1:
+            elapsed = time.time() - started_at
+            eta = round(elapsed * (1 - fraction) / fraction, 1)
+
+        snapshot = {
+            "stage": stage,
+            **counters,
+            "percent": round(fraction * 100, 1),
+            "eta_seconds": eta,
+        }
+        if self.pipeline is not None:
+            snapshot["pipeline"] = self.pipeline.stats()
+        return snapshot
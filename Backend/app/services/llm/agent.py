@@ -1,89 +1,81 @@
+import asyncio
+import re
 from langchain.tools.base import StructuredTool
 from pydantic import BaseModel
 import os
 from typing import List, Dict, Optional 
-from pathlib import Path
-from app.db.qdrant.qdrant_setup import client
-from app.utils.embeddor import create_embedding
+from app.core.config import (
+    FOLDER_LIST_PAGE_SIZE, FOLDER_LIST_MAX_PAGE_SIZE, READ_FILE_MAX_BYTES, READ_CALL_MAX_BYTES,
+    SYMBOL_SEARCH_MAX_RESULTS, SEARCH_CODE_PAGE_SIZE, SEARCH_CODE_MAX_PAGE_SIZE, SEARCH_CODE_MAX_PER_FILE,
+    SEARCH_CODE_MAX_CONTEXT
+)
+from app.db.files.index import FileIndex, repo_file_index
+from app.db.symbols.index import repo_symbol_index
+from app.db.trigrams.index import repo_trigram_index
+from app.services.llm.code_search import search_code as search_repo_code
+from app.services.llm.file_reader import FileResolveError, resolve_file, read_range, repo_relative
+from app.services.llm.retrieval import hybrid_search, ahybrid_search
+from app.utils.chunker import detect_language
+from app.utils.file_filters import should_skip
+
+# 'src/app.py:100-160' or 'src/app.py#L100-L160' asks for lines 100 to 160 of one file
+_LINE_RANGE = re.compile(r"^(?P<path>.+?)(?::(?P<start>\d+)(?:-(?P<end>\d+))?|#L(?P<lstart>\d+)(?:-L?(?P<lend>\d+))?)$")
+
+
+def _split_range(file: str) -> tuple[str, int | None, int | None]:
+    match = _LINE_RANGE.match(file)
+    if not match:
+        return file, None, None
+    start = match.group("start") or match.group("lstart")
+    end = match.group("end") or match.group("lend")
+    return match.group("path"), int(start), int(end) if end else None
 
-def read_files_content(filesName: List[str], repo_context: Optional[str] = None) -> Dict[str, str]:
+
+def read_files_content(filesName: List[str], repo_context: Optional[str] = None, start_line: Optional[int] = None,
+                       end_line: Optional[int] = None, byte_offset: Optional[int] = None,
+                       byte_length: Optional[int] = None) -> Dict[str, str]:
     """
     Use this tool for getting the content from the files.
     Args:
-        filesName: List of file paths (absolute or relative to repository root)
+        filesName: List of file paths (absolute or relative to repository root). Append ':100-160'
+                   or '#L100-L160' to a path to read only those lines of it.
         repo_context: Optional repository context in format 'owner_repo'. When provided,
                       relative paths are resolved under 'Repos/{owner_repo}'.
-    Returns: A dict of file name and file content
+        start_line, end_line: Line range (1-based, inclusive) for files without their own range
+        byte_offset, byte_length: Byte range, for files without a line range
+    Returns: A dict of file name and file content; long content ends with a note on how to read on
     """
     file_content = {}
     # Define excluded extensions (images, pdf, etc)
     excluded_exts = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg', '.webp', '.ico', '.pdf'}
-    
+    budget = READ_CALL_MAX_BYTES
+
     for file in filesName:
-        ext = os.path.splitext(file)[1].lower()
+        name, first, last = _split_range(file)
+        if first is None:
+            first, last = start_line, end_line
+        ext = os.path.splitext(name)[1].lower()
         if ext in excluded_exts:
             file_content[file] = f"Skipped: {ext} files are not supported"
             continue
-            
+
         try:
-            # Handle both absolute and relative paths
-            file_path = file
-            
-            # If the path doesn't exist as-is, try repo-aware resolution then CWD
-            if not os.path.isabs(file_path) and repo_context:
-                repo_root = os.path.join("Repos", repo_context)
-                candidate = os.path.join(repo_root, file)
-                if os.path.exists(candidate):
-                    file_path = candidate
-                else:
-                    # Also try normalizing removing leading './' or '/' artifacts
-                    candidate2 = os.path.normpath(os.path.join(repo_root, file.lstrip("/\\")))
-                    if os.path.exists(candidate2):
-                        file_path = candidate2
-            
-            # If repo_context is not provided, try to auto-detect by searching under Repos/*
-            if not os.path.exists(file_path) and not os.path.isabs(file_path) and not repo_context:
-                repos_dir = "Repos"
-                if os.path.isdir(repos_dir):
-                    matches = []
-                    try:
-                        for entry in os.listdir(repos_dir):
-                            repo_root = os.path.join(repos_dir, entry)
-                            if not os.path.isdir(repo_root):
-                                continue
-                            candidate = os.path.join(repo_root, file)
-                            if os.path.exists(candidate):
-                                matches.append(candidate)
-                            else:
-                                candidate2 = os.path.normpath(os.path.join(repo_root, file.lstrip("/\\")))
-                                if os.path.exists(candidate2):
-                                    matches.append(candidate2)
-                    except Exception:
-                        # ignore auto-detect errors and fall back to default behavior
-                        matches = []
-                    if len(matches) == 1:
-                        file_path = matches[0]
-                    elif len(matches) > 1:
-                        file_content[file] = (
-                            "Error: File path is ambiguous across multiple repositories. "
-                            f"Found {len(matches)} matches under 'Repos/*'. Please specify repo_context."
-                        )
-                        continue
-            
-            if not os.path.exists(file_path):
-                # Try current working directory as a fallback
-                cwd_candidate = os.path.join(".", file)
-                if os.path.exists(cwd_candidate):
-                    file_path = cwd_candidate
-                else:
-                    file_content[file] = f"Error: File not found. Looked for '{file}' and under repo_context '{repo_context}'"
-                    continue
-            
-            # Read file with proper encoding handling
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
-                file_content[file] = content
-                
+            file_path, _, total_lines = resolve_file(name, repo_context)
+        except FileResolveError as e:
+            file_content[file] = str(e)
+            continue
+        if budget <= 0:
+            file_content[file] = (
+                f"Skipped: this call already returned {READ_CALL_MAX_BYTES} bytes; read this file in another call"
+            )
+            continue
+
+        try:
+            content = read_range(file_path, first, last, byte_offset, byte_length,
+                                 max_bytes=min(READ_FILE_MAX_BYTES, budget), total_lines=total_lines)
+            budget -= len(content.encode("utf-8"))
+            file_content[file] = content
+
         except PermissionError:
             file_content[file] = f"Error: Permission denied for file '{file}'"
         except IsADirectoryError:
@@ -94,83 +86,229 @@ def read_files_content(filesName: List[str], repo_context: Optional[str] = None)
     return file_content
 
 
-def read_folder_structure(folderPath: str = ".", repo_context: str = None) -> List[str]:
+def _scan_folder(folderPath: str) -> FileIndex:
+    """A throwaway index of a folder outside Repos/, from file names and sizes only."""
+    files = {}
+    for root, dirs, names in os.walk(folderPath):
+        for name in names:
+            rel_path = os.path.relpath(os.path.join(root, name), folderPath).replace(os.sep, "/")
+            if name.startswith(".") or should_skip(rel_path):
+                continue
+            try:
+                size = os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+            files[rel_path] = {"size": size, "language": detect_language(rel_path)}
+    return FileIndex.from_files(files)
+
+
+def read_folder_structure(folderPath: str = ".", repo_context: str = None, pattern: Optional[str] = None,
+                          max_depth: Optional[int] = None, offset: int = 0, limit: int = FOLDER_LIST_PAGE_SIZE,
+                          summary: bool = False, details: bool = False) -> Dict:
     """
     Use this tool for listing the files in the given folder.
     Args: 
-        folderPath: Folder Path to traverse (defaults to current directory)
+        folderPath: Folder to list; relative to the repository root when repo_context is given
         repo_context: Repository context in format 'owner_repo' to use Repos folder
-    Returns: List of file paths
+        pattern: Optional glob such as '*.py' (matched against file names) or 'src/**/test_*.py'
+        max_depth: 1 lists only the folder's own files, 2 adds one level of subfolders, ...
+        offset: Number of matching entries to skip (pagination)
+        limit: Maximum number of entries to return
+        summary: Return subfolders with their file/line totals instead of files
+        details: Include language, line count and size for every file
+    Returns: The folder's totals, a page of files (or subfolders) and next_offset for the next page
     """
-    # If repo_context is provided, use the Repos folder structure
+    limit = max(1, min(limit, FOLDER_LIST_MAX_PAGE_SIZE))
+    offset = max(offset, 0)
     if repo_context:
-        folderPath = os.path.join("Repos", repo_context)
-        if not os.path.exists(folderPath):
-            return [f"Repository '{repo_context}' not found in Repos folder"]
-    
-    folderPath = Path(folderPath)
+        index = repo_file_index(repo_context)
+        if index is None:
+            return {"error": f"Repository '{repo_context}' not found in Repos folder"}
+        folder = repo_relative(folderPath, repo_context)
+    else:
+        if not os.path.isdir(folderPath):
+            return {"error": f"Folder '{folderPath}' not found"}
+        index = _scan_folder(folderPath)
+        folder = ""
 
-    exclude_dirs = {'.env', '.venv', 'venv', '__pycache__', '.gitignore', '.git', '.vscode'}
+    totals = index.folder_totals(folder)
+    if totals is None:
+        return {"error": f"Folder '{folder}' has no files in the index"}
+    result = {"folder": folder or ".", "totals": totals}
 
-    files_list = []
+    if summary:
+        result["languages"] = index.language_counts(folder)
+        result["folders"], result["next_offset"] = index.tree(folder, max_depth or 2, offset, limit)
+        return result
 
-    for root, dirs, files in os.walk(folderPath):
-        for file in files:
-            if any(ex in root for ex in exclude_dirs):
-                continue
-            if file.startswith('.'):
-                continue
-            files_list.append(os.path.join(root, file))
+    page, result["next_offset"] = index.list_files(folder, pattern, max_depth, offset, limit)
+    result["files"] = [index.entry(i) for i in page] if details else [index.paths[i] for i in page]
+    return result
 
-    return files_list
 
+def find_symbol(repo_context: str, name: str, kind: Optional[str] = None, limit: int = 20) -> Dict:
+    """
+    Use this tool to find where a function, class, method or variable is defined.
+    Args:
+        repo_context: Repository in format 'owner_repo'
+        name: Symbol name; 'Class.method' narrows to methods of that class
+        kind: Optional filter: function, method, class, interface, type, enum or variable
+        limit: Maximum number of definitions to return
+    Returns: Definitions with path, line range, kind, container and the defining line
+    """
+    index = repo_symbol_index(repo_context)
+    if index is None:
+        return {"error": f"Repository '{repo_context}' not found in Repos folder"}
+    definitions = index.find_definitions(name, kind, max(1, min(limit, SYMBOL_SEARCH_MAX_RESULTS)))
+    return {"name": name, "definitions": definitions}
 
-def get_context(collection_name: str, query: str, k: int = 3) -> List[str]:
+
+def find_references(repo_context: str, name: str, kind: Optional[str] = None, offset: int = 0,
+                    limit: int = 50) -> Dict:
     """
-    Retrieve top-k relevant contexts from ChromaDB for the given query.
+    Use this tool to find where a symbol is called or imported.
+    Args:
+        repo_context: Repository in format 'owner_repo'
+        name: Symbol name
+        kind: Optional filter: 'call' or 'import'
+        offset: Number of references to skip (pagination)
+        limit: Maximum number of references to return
+    Returns: References with path, line, enclosing function and the source line, plus the total count
     """
+    index = repo_symbol_index(repo_context)
+    if index is None:
+        return {"error": f"Repository '{repo_context}' not found in Repos folder"}
+    limit = max(1, min(limit, SYMBOL_SEARCH_MAX_RESULTS))
+    references, total = index.find_references(name, kind, max(offset, 0), limit)
+    next_offset = offset + limit if offset + limit < total else None
+    return {"name": name, "total": total, "references": references, "next_offset": next_offset}
+
+
+def search_code(repo_context: str, pattern: str, ignore_case: bool = False, path_pattern: Optional[str] = None,
+                context: int = 2, offset: int = 0, limit: int = SEARCH_CODE_PAGE_SIZE) -> Dict:
+    """
+    Use this tool to grep a repository with a regular expression.
+    Args:
+        repo_context: Repository in format 'owner_repo'
+        pattern: Python regular expression, e.g. 'def \\w+_tool' or 'useState\\('
+        ignore_case: Match case-insensitively
+        path_pattern: Optional glob limiting the files searched ('*.py', 'src/components/*')
+        context: Lines to include before and after each match
+        offset: Number of matches to skip (pagination)
+        limit: Maximum number of matches to return
+    Returns: Matches with path, line number, the line and its context, the files whose matches
+             were capped (truncated_files), plus next_offset
+    """
+    index = repo_trigram_index(repo_context)
+    if index is None:
+        return {"error": f"Repository '{repo_context}' not found in Repos folder"}
     try:
-        # Load the collection
-        collection = client.get_collection(collection_name=collection_name)
+        result = search_repo_code(index, repo_context, pattern, ignore_case, path_pattern,
+                                  max(0, min(context, SEARCH_CODE_MAX_CONTEXT)), max(offset, 0),
+                                  max(1, min(limit, SEARCH_CODE_MAX_PAGE_SIZE)), SEARCH_CODE_MAX_PER_FILE)
+    except re.error as e:
+        return {"error": f"Invalid regular expression '{pattern}': {e}"}
+    return {"pattern": pattern, **result}
 
-        # Convert query to embedding
-        query_vector = create_embedding(query)
 
-        # Query Qdrant
-        results = client.search(
-            collection_name=collection_name,
-            query_vector=query_vector,
-            limit=k,
-            with_payload=True,
-        )
+def get_context(collection_name: str, query: str, k: int = 3) -> List[str]:
+    """
+    Retrieve top-k relevant contexts for the given query, by BM25 and vector similarity.
+    """
+    try:
+        # Exact identifier matches (BM25) fused with semantic matches (vectors)
+        return hybrid_search(collection_name, query, limit=k)
 
-        # Extract documents (contexts)
-        # contexts = results.get("documents", [[]])[0]
+    except Exception as e:
+        print(f"Error retrieving context: {e}")
+        return []
 
-        return results
+
+async def aget_context(collection_name: str, query: str, k: int = 3) -> List[str]:
+    """
+    Retrieve top-k relevant contexts for the given query, by BM25 and vector similarity.
+    """
+    try:
+        return await ahybrid_search(collection_name, query, limit=k)
 
     except Exception as e:
         print(f"Error retrieving context: {e}")
         return []
 
 
+# File system tools have no async API; run them off the event loop
+async def aread_files_content(filesName: List[str], repo_context: Optional[str] = None,
+                              start_line: Optional[int] = None, end_line: Optional[int] = None,
+                              byte_offset: Optional[int] = None, byte_length: Optional[int] = None) -> Dict[str, str]:
+    return await asyncio.to_thread(read_files_content, filesName, repo_context, start_line, end_line, byte_offset,
+                                   byte_length)
+
+
+async def afind_symbol(repo_context: str, name: str, kind: Optional[str] = None, limit: int = 20) -> Dict:
+    return await asyncio.to_thread(find_symbol, repo_context, name, kind, limit)
+
+
+async def afind_references(repo_context: str, name: str, kind: Optional[str] = None, offset: int = 0,
+                           limit: int = 50) -> Dict:
+    return await asyncio.to_thread(find_references, repo_context, name, kind, offset, limit)
+
+
+async def asearch_code(repo_context: str, pattern: str, ignore_case: bool = False,
+                       path_pattern: Optional[str] = None, context: int = 2, offset: int = 0,
+                       limit: int = SEARCH_CODE_PAGE_SIZE) -> Dict:
+    return await asyncio.to_thread(search_code, repo_context, pattern, ignore_case, path_pattern, context, offset,
+                                   limit)
+
+
+async def aread_folder_structure(folderPath: str = ".", repo_context: str = None, pattern: Optional[str] = None,
+                                 max_depth: Optional[int] = None, offset: int = 0,
+                                 limit: int = FOLDER_LIST_PAGE_SIZE, summary: bool = False,
+                                 details: bool = False) -> Dict:
+    return await asyncio.to_thread(read_folder_structure, folderPath, repo_context, pattern, max_depth, offset,
+                                   limit, summary, details)
+
+
 # Wrap functions as StructuredTool
 get_context_tool = StructuredTool.from_function(
     name="get_context",
     func=get_context,
-    description="Retrieve the most relevant text snippets from a ChromaDB collection for a given natural language query."
+    coroutine=aget_context,
+    description="Retrieve the most relevant text snippets from the repository's collection for a natural language query or an identifier (function, class or variable names are matched exactly as well as by meaning). Each snippet's payload has the file 'path', 'language' and 'start_line'/'end_line', so you can cite or read just that part of the file."
 )
 
 read_files_content_tool = StructuredTool.from_function(
     name="read_files_content",
     func=read_files_content,
-    description="Read and return the content of files from given file paths. Handles both absolute and relative paths, provides detailed error messages for inaccessible files, and skips unsupported file types. If reading files from a downloaded repository under 'Repos/{owner_repo}', pass repo_context='owner_repo' so relative paths resolve correctly. If repo_context is omitted, the tool will attempt to auto-detect the correct repo under 'Repos/' and will error if multiple matches are found."
+    coroutine=aread_files_content,
+    description="Read and return the content of files from given file paths. Paths are relative to the repository root; a unique file name or path ending ('Button.tsx', 'components/Button.tsx') is resolved too. If reading files from a downloaded repository under 'Repos/{owner_repo}', pass repo_context='owner_repo' so relative paths resolve correctly. If repo_context is omitted, the tool will attempt to auto-detect the correct repo under 'Repos/' and will error if multiple matches are found. Read only what you need: append ':100-160' to a path for lines 100-160 (get_context results carry start_line/end_line), or pass start_line/end_line, or byte_offset/byte_length. Long files are cut at a size limit and end with a note telling you where to continue; unsupported file types are skipped."
 )
 
 read_folder_structure_tool = StructuredTool.from_function(
     name="read_folder_structure",
     func=read_folder_structure,
-    description="List all file paths inside a given folder (excluding hidden/system files and common ignored folders). Use repo_context parameter with 'owner_repo' format to list files from downloaded repositories (under 'Repos/{owner_repo}')."
+    coroutine=aread_folder_structure,
+    description="List files of a downloaded repository from its file index: pass repo_context='owner_repo' and a folderPath relative to the repository root ('.' for the root). Paths are returned relative to the root, ready for read_files_content with the same repo_context. Narrow large listings with pattern (glob such as '*.py'), max_depth (1 = only the folder's own files) and page with offset/limit using next_offset. summary=true returns the subfolders with file and line counts instead, which is the best first call on an unfamiliar or large repo; details=true adds language, line count and size per file."
+)
+
+find_symbol_tool = StructuredTool.from_function(
+    name="find_symbol",
+    func=find_symbol,
+    coroutine=afind_symbol,
+    description="Find where a function, class, method, type or variable is defined in a downloaded repository, from its symbol index: pass repo_context='owner_repo' and the name ('Class.method' to narrow to a class). Returns each definition's path, start/end line and the defining line, so you can answer 'where is X defined' directly or read just those lines with read_files_content. Falls back to names starting with the given one when nothing matches exactly."
+)
+
+find_references_tool = StructuredTool.from_function(
+    name="find_references",
+    func=find_references,
+    coroutine=afind_references,
+    description="Find where a symbol is used in a downloaded repository: every call site (including JSX elements such as <Sidebar />) and import of the name, with path, line, the enclosing function and the source line. Pass repo_context='owner_repo' and the name; kind='call' or kind='import' narrows the results. Use it for 'who calls X' or 'where is X used'; page with offset/limit using next_offset."
+)
+
+search_code_tool = StructuredTool.from_function(
+    name="search_code",
+    func=search_code,
+    coroutine=asearch_code,
+    description="Search a downloaded repository with a regular expression, like grep: pass repo_context='owner_repo' and a Python regex. Returns each matching line with its path, line number and a few lines of context (context=N), in path order. Use it for exact text such as error messages, config keys, string literals or every use of an API, where get_context's semantic search is too fuzzy. Include a literal of 3 or more characters in the pattern so the search can use the index; narrow with path_pattern ('*.py', 'src/*'), ignore_case=true for case-insensitive matching, and page with offset/limit using next_offset. At most " + str(SEARCH_CODE_MAX_PER_FILE) + " matches are returned per file; files with more are listed in truncated_files, so search those again with a narrower path_pattern or pattern."
 )
 
 
@@ -178,7 +316,10 @@ read_folder_structure_tool = StructuredTool.from_function(
 TOOLS = [
     get_context_tool,
     read_files_content_tool,
-    read_folder_structure_tool
+    read_folder_structure_tool,
+    find_symbol_tool,
+    find_references_tool,
+    search_code_tool
 ]
 
 TOOLS_DESC = [{'name': t.name, 'description': t.description} for t in TOOLS]
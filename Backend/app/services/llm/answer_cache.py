@@ -0,0 +1,128 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from app.core.config import ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL, ANSWER_CACHE_MAX_ENTRIES
+
+
+class _Entry:
+    __slots__ = ("key", "query", "vector", "answer", "expires_at", "hits")
+
+    def __init__(self, key, query, vector, answer, expires_at):
+        self.key = key
+        self.query = query
+        self.vector = vector
+        self.answer = answer
+        self.expires_at = expires_at
+        self.hits = 0
+
+
+class SemanticAnswerCache:
+    """
+    Answers to first questions about a repo, found again by meaning.
+
+    Entries are grouped by (owner_repo, commit_sha): a lookup compares the
+    query vector with every answer cached for that repo at that commit and
+    returns the closest one if its cosine similarity reaches the threshold.
+    Storing an answer for a new commit drops the repo's older answers.
+    Entries expire after ttl seconds; past max_entries the least recently
+    used one is evicted.
+    """
+
+    def __init__(self, threshold: float = ANSWER_CACHE_THRESHOLD, ttl: float = ANSWER_CACHE_TTL,
+                 max_entries: int = ANSWER_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # entry id -> _Entry, least recently used first
+        self._buckets = {}  # (owner_repo, commit_sha) -> [entry id]
+        self._matrices = {}  # (owner_repo, commit_sha) -> stacked unit vectors of the bucket
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        bucket = self._buckets[entry.key]
+        bucket.remove(entry_id)
+        self._matrices.pop(entry.key, None)
+        if not bucket:
+            del self._buckets[entry.key]
+
+    def lookup(self, key: tuple[str, str], vector: list[float]) -> dict | None:
+        """
+        Best cached answer for the key above the similarity threshold.
+        Returns: {"answer", "query", "similarity"} or None
+        """
+        query = self._unit(vector)
+        now = time.monotonic()
+        with self._lock:
+            for entry_id in [i for i in self._buckets.get(key, []) if self._entries[i].expires_at <= now]:
+                self._remove(entry_id)
+            bucket = self._buckets.get(key)
+            if not bucket:
+                self.misses += 1
+                return None
+            matrix = self._matrices.get(key)
+            if matrix is None:
+                matrix = self._matrices[key] = np.stack([self._entries[i].vector for i in bucket])
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+            entry_id = bucket[best]
+            entry = self._entries[entry_id]
+            self._entries.move_to_end(entry_id)
+            entry.hits += 1
+            self.hits += 1
+            return {"answer": entry.answer, "query": entry.query, "similarity": round(float(scores[best]), 4)}
+
+    def store(self, key: tuple[str, str], query: str, vector: list[float], answer: str):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            # Answers about an older commit of the same repo can't be served any more
+            for stale in [k for k in self._buckets if k[0] == key[0] and k != key]:
+                for entry_id in list(self._buckets[stale]):
+                    self._remove(entry_id)
+            entry_id = next(self._ids)
+            self._entries[entry_id] = _Entry(key, query, self._unit(vector), answer, time.monotonic() + self.ttl)
+            self._buckets.setdefault(key, []).append(entry_id)
+            self._matrices.pop(key, None)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._matrices.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "repos": len(self._buckets),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl,
+            }
+
+
+answer_cache = SemanticAnswerCache()
@@ -0,0 +1,106 @@
+import fnmatch
+import os
+import re
+import time
+from app.core.config import REPOS_DIR
+from app.db.trigrams.index import TrigramIndex
+from app.utils.trigrams import query_trigrams
+
+# Longest line returned; minified files would otherwise flood the result
+LINE_CHARS = 300
+
+
+def _read_text(path: str) -> str | None:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().replace("\r\n", "\n").replace("\r", "\n")
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _matching_lines(regex: re.Pattern, content: str, limit: int) -> tuple[list[int], bool]:
+    """
+    0-based numbers of the first `limit` lines holding a match, each line
+    once, and whether more lines past those match too.
+    """
+    found, line, pos = [], 0, 0
+    for match in regex.finditer(content):
+        line += content.count("\n", pos, match.start())
+        pos = match.start()
+        if not found or found[-1] != line:
+            if len(found) == limit:
+                return found, True
+            found.append(line)
+    return found, False
+
+
+def search_code(index: TrigramIndex, repo_key: str, pattern: str, ignore_case: bool = False,
+                path_pattern: str | None = None, context: int = 2, offset: int = 0, limit: int = 50,
+                max_per_file: int = 20) -> dict:
+    """
+    Regex search over one repo's files. The trigram index narrows the files
+    to those containing every literal the pattern requires; only those are
+    read and matched, in path order, until the page is full.
+    Args:
+        index: The repo's trigram index.
+        repo_key: Repository folder under REPOS_DIR.
+        pattern: Python regex, matched per file with re.MULTILINE.
+        ignore_case: Match case-insensitively.
+        path_pattern: Glob on the repo-relative path ('*.py', 'src/*'); a
+                      pattern without '/' is matched against the file name.
+        context: Lines shown before and after each matching line.
+        offset: Matches to skip (pagination).
+        limit: Page size.
+        max_per_file: Most matches taken from one file; files with more are
+                      listed in "truncated_files" (their other matches are
+                      not paged over).
+    Returns: {"matches": [{"path", "line", "text", "before", "after"}], "truncated_files", "candidates",
+              "files_searched", "next_offset", "took_ms"}
+    Raises: re.error for an invalid pattern
+    """
+    started = time.perf_counter()
+    flags = re.IGNORECASE if ignore_case else 0
+    regex = re.compile(pattern, flags | re.MULTILINE)
+    paths = index.candidates(query_trigrams(pattern, flags))
+    if path_pattern:
+        by_name = "/" not in path_pattern
+        paths = [p for p in paths if fnmatch.fnmatchcase(p.rsplit("/", 1)[-1] if by_name else p, path_pattern)]
+
+    root = os.path.join(REPOS_DIR, repo_key)
+    matches, truncated, skipped, searched, next_offset = [], [], 0, 0, None
+    for rel_path in paths:
+        content = _read_text(os.path.join(root, *rel_path.split("/")))
+        if content is None:
+            continue
+        searched += 1
+        found, more = _matching_lines(regex, content, max_per_file)
+        if not found:
+            continue
+        if skipped + len(found) <= offset:
+            skipped += len(found)
+            continue
+        lines = content.split("\n")
+        if more:
+            truncated.append(rel_path)
+        for line in found[offset - skipped:] if skipped < offset else found:
+            if len(matches) == limit:
+                next_offset = offset + limit
+                break
+            matches.append({
+                "path": rel_path,
+                "line": line + 1,
+                "text": lines[line][:LINE_CHARS],
+                "before": [text[:LINE_CHARS] for text in lines[max(line - context, 0):line]],
+                "after": [text[:LINE_CHARS] for text in lines[line + 1:line + 1 + context]],
+            })
+        skipped = offset
+        if next_offset is not None:
+            break
+    return {
+        "matches": matches,
+        "truncated_files": truncated,
+        "candidates": len(paths),
+        "files_searched": searched,
+        "next_offset": next_offset,
+        "took_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
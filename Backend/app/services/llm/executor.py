@@ -0,0 +1,43 @@
+import threading
+from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain.agents import create_tool_calling_agent, AgentExecutor
+from app.core.config import AGENT_VERBOSE
+from app.services.llm.prompt import PROMPT
+from app.services.llm.agent import TOOLS, TOOLS_DESC
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def build_prompt() -> ChatPromptTemplate:
+    """
+    The chat prompt with the static tool list already filled in.
+    Per-request inputs: query, conversation, collection_name, owner_repo.
+    """
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", PROMPT),
+        MessagesPlaceholder("conversation"),
+        ("human", "{query}"),
+        MessagesPlaceholder("agent_scratchpad"),
+    ])
+    return prompt.partial(TOOLS_DESC=str(TOOLS_DESC))
+
+
+def build_agent_executor(llm, tools: list = TOOLS, verbose: bool = AGENT_VERBOSE) -> AgentExecutor:
+    """
+    Assemble the tool-calling agent. The executor holds no per-request state,
+    so one instance can serve every request.
+    """
+    agent = create_tool_calling_agent(llm=llm, prompt=build_prompt(), tools=tools)
+    return AgentExecutor(agent=agent, tools=tools, verbose=verbose)
+
+
+def get_agent_executor() -> AgentExecutor:
+    """The process-wide executor around the configured Gemini model, built on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from app.services.llm.llm import llm
+                _executor = build_agent_executor(llm)
+    return _executor
@@ -0,0 +1,143 @@
+import mmap
+import os
+from app.core.config import REPOS_DIR
+from app.db.files.index import FileIndex, repo_file_index
+
+
+class FileResolveError(Exception):
+    """Raised when a path names no file, or more than one."""
+
+
+def repo_relative(path: str, repo_key: str) -> str:
+    """
+    A path as given by the agent, relative to the repo root: './', leading
+    slashes and a 'Repos/<repo>/' prefix (as the prompt words it, or the
+    configured REPOS_DIR, relative or absolute) are removed.
+    """
+    path = (path or "").replace("\\", "/").strip()
+    for root in (REPOS_DIR, os.path.abspath(REPOS_DIR), "Repos"):
+        prefix = f"{root}/{repo_key}".replace("\\", "/")
+        if path == prefix or path.startswith(prefix + "/"):
+            path = path[len(prefix):]
+            break
+    return "/".join(part for part in path.split("/") if part and part != ".")
+
+
+def _from_index(index: FileIndex, repo_key: str, rel_path: str) -> list[tuple[str, str, int | None]]:
+    return [
+        (os.path.join(REPOS_DIR, repo_key, *index.paths[i].split("/")), index.paths[i], index.lines[i])
+        for i in index.match(rel_path)
+    ]
+
+
+def resolve_file(path: str, repo_context: str | None = None) -> tuple[str, str, int | None]:
+    """
+    Find the file the agent means by `path`, from the repos' file indexes
+    instead of probing the disk: an exact repo-relative path first, then a
+    unique suffix or file name match ('Button.tsx').
+    Without repo_context every downloaded repo is searched, and a path that
+    matches nothing there is tried as a plain path.
+    Returns: (path on disk, path to show, line count if known)
+    Raises: FileResolveError if nothing or several files match
+    """
+    if repo_context:
+        rel_path = repo_relative(path, repo_context)
+        index = repo_file_index(repo_context)
+        matches = _from_index(index, repo_context, rel_path) if index is not None and rel_path else []
+        if not matches:
+            # Files left out of the index (skipped types, too large) can still be read
+            repo_root = os.path.normpath(os.path.join(REPOS_DIR, repo_context))
+            disk_path = os.path.normpath(os.path.join(repo_root, *rel_path.split("/")))
+            if rel_path and disk_path.startswith(repo_root + os.sep) and os.path.isfile(disk_path):
+                return disk_path, rel_path, None
+            raise FileResolveError(
+                f"Error: File not found. Looked for '{path}' and under repo_context '{repo_context}'"
+            )
+    else:
+        matches, repos_matched = [], 0
+        repos = sorted(os.listdir(REPOS_DIR)) if os.path.isdir(REPOS_DIR) else []
+        for repo_key in repos:
+            index = repo_file_index(repo_key)
+            rel_path = repo_relative(path, repo_key)
+            found = _from_index(index, repo_key, rel_path) if index is not None and rel_path else []
+            repos_matched += bool(found)
+            matches.extend(found)
+        if not matches:
+            if os.path.isfile(path):
+                return path, path, None
+            raise FileResolveError(f"Error: File not found. Looked for '{path}' and under repo_context 'None'")
+        if repos_matched > 1:
+            raise FileResolveError(
+                "Error: File path is ambiguous across multiple repositories. "
+                f"Found {len(matches)} matches under 'Repos/*'. Please specify repo_context."
+            )
+
+    if len(matches) > 1:
+        shown = ", ".join(m[1] for m in matches[:5])
+        raise FileResolveError(
+            f"Error: '{path}' matches {len(matches)} files ({shown}{', ...' if len(matches) > 5 else ''}). "
+            "Use the full path from the repository root."
+        )
+    return matches[0]
+
+
+def _line_start(mm, line: int) -> int:
+    """Byte offset where a 1-based line begins."""
+    pos = 0
+    for _ in range(line - 1):
+        pos = mm.find(b"\n", pos) + 1
+        if pos == 0:
+            return len(mm)
+    return pos
+
+
+def read_range(path: str, start_line: int | None = None, end_line: int | None = None,
+               byte_offset: int | None = None, byte_length: int | None = None,
+               max_bytes: int = 65536, total_lines: int | None = None) -> str:
+    """
+    Text of part of a file, mapped rather than read whole, so a slice of a
+    large file costs about as much as the slice.
+    Args:
+        path: File on disk.
+        start_line, end_line: 1-based inclusive line range; either end may be omitted.
+        byte_offset, byte_length: Byte range, used when no line range is given.
+        max_bytes: Most bytes returned; longer ranges are cut at a line break.
+        total_lines: Line count of the file if known, for the truncation note.
+    Returns: The text, followed by a '[... truncated ...]' note when the range was cut
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return ""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if start_line is not None or end_line is not None:
+            first = max(start_line or 1, 1)
+            begin = _line_start(mm, first)
+            if end_line is None:
+                end = size
+            else:
+                # Stop scanning once past the cap: the rest would be cut anyway
+                end = begin
+                for _ in range(max(end_line - first + 1, 0)):
+                    end = mm.find(b"\n", end, min(size, begin + max_bytes + 1)) + 1
+                    if end == 0:
+                        end = min(size, begin + max_bytes + 1)
+                        break
+        else:
+            first = None
+            begin = min(max(byte_offset or 0, 0), size)
+            end = size if byte_length is None else min(size, begin + max(byte_length, 0))
+
+        truncated = end - begin > max_bytes
+        if truncated:
+            cut = mm.rfind(b"\n", begin, begin + max_bytes)
+            end = cut + 1 if cut >= begin else begin + max_bytes
+        data = mm[begin:end]
+
+    text = data.decode("utf-8", errors="ignore")
+    if not truncated:
+        return text
+    if first is None and byte_offset is not None:
+        return text + f"\n[... truncated at byte {end} of {size}; pass byte_offset={end} to continue]"
+    shown_to = (first or 1) + data.count(b"\n") - 1
+    of = f" of {total_lines}" if total_lines else ""
+    return text + f"\n[... truncated after line {shown_to}{of}; pass start_line={shown_to + 1} to continue]"
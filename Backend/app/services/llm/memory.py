@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from bson import ObjectId
+from app.core.config import (
+    HISTORY_MAX_TURNS, HISTORY_TOKEN_BUDGET, HISTORY_SUMMARY_ENABLED, HISTORY_SUMMARY_EVERY,
+    HISTORY_SUMMARY_MAX_WORDS
+)
+from app.db.mongoDB.mongo import async_topics_collection
+from app.services.llm.llm import llm
+from app.utils.embeddor import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# A topic stores its history in `messages`, one {role, content} element per message,
+# two per turn. Only the last HISTORY_MAX_TURNS turns are read for the prompt; older
+# ones are folded into `summary`, and `summarized_messages` counts how many leading
+# messages the summary covers.
+
+SUMMARY_PROMPT = """You maintain the running summary of a conversation between a user and an assistant about the GitHub repository {owner_repo}.
+
+Current summary:
+{summary}
+
+New messages to fold in:
+{transcript}
+
+Write the updated summary in at most {max_words} words. Keep file paths, function and class names,
+decisions, facts the assistant established and questions still open. Leave out greetings and filler.
+Reply with the summary only."""
+
+_summarizing = set()  # topic ids with a summary update in flight
+_tasks = set()  # keeps background tasks referenced until they finish
+
+
+def normalize_messages(messages: list) -> list[dict]:
+    """
+    Ensure all messages are dicts with {role, content}.
+    Flattens nested arrays left by topics saved before messages were stored
+    flat (scripts/migrate_flat_messages.py rewrites those).
+    """
+    normalized = []
+    for msg in messages:
+        if isinstance(msg, dict):
+            normalized.append({
+                "role": msg.get("role"),
+                "content": msg.get("content")
+            })
+        elif isinstance(msg, list):  # handle bad nested arrays
+            for inner in msg:
+                if isinstance(inner, dict):
+                    normalized.append({
+                        "role": inner.get("role"),
+                        "content": inner.get("content")
+                    })
+    return normalized
+
+
+def _message_tokens(message: dict) -> int:
+    content = message.get("content")
+    return count_tokens(content if isinstance(content, str) else str(content)) + 4  # role and separators
+
+
+def fit_history(messages: list[dict], summary: str | None, budget: int = HISTORY_TOKEN_BUDGET) -> list[dict]:
+    """
+    Conversation for the prompt: the summary as a system message, then as many
+    of the most recent messages as fit in the token budget.
+    The summary is always kept; its tokens count against the budget.
+    """
+    history = [{"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"}] if summary else []
+    remaining = budget - sum(_message_tokens(m) for m in history)
+    recent = []
+    for message in reversed(messages):
+        remaining -= _message_tokens(message)
+        if remaining < 0:
+            break
+        recent.append(message)
+    # Never open with an answer whose question was cut off
+    while recent and recent[-1].get("role") != "human":
+        recent.pop()
+    return history + recent[::-1]
+
+
+async def load_history(owner: str, repo_name: str, topic_id: str) -> list[dict]:
+    """
+    Prompt history of a topic: its summary plus the last HISTORY_MAX_TURNS
+    turns, trimmed to HISTORY_TOKEN_BUDGET. Reads only those turns from MongoDB.
+    Returns: [] when the topic doesn't exist
+    """
+    topic = await async_topics_collection.find_one(
+        {"_id": ObjectId(topic_id), "owner": owner, "repo_name": repo_name},
+        {"messages": {"$slice": -2 * HISTORY_MAX_TURNS}, "summary": 1}
+    )
+    if not topic:
+        return []
+    return fit_history(normalize_messages(topic.get("messages", [])), topic.get("summary"))
+
+
+def schedule_summary(owner: str, repo_name: str, topic_id: str):
+    """Roll the topic's summary forward in the background, after the answer has been sent."""
+    if not HISTORY_SUMMARY_ENABLED or topic_id in _summarizing:
+        return
+    _summarizing.add(topic_id)
+    task = asyncio.get_running_loop().create_task(roll_summary(owner, repo_name, topic_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    task.add_done_callback(lambda _: _summarizing.discard(topic_id))
+
+
+async def roll_summary(owner: str, repo_name: str, topic_id: str) -> bool:
+    """
+    Fold turns into the summary once more than HISTORY_MAX_TURNS of them are
+    not covered by it. Everything but the newest HISTORY_MAX_TURNS -
+    HISTORY_SUMMARY_EVERY turns is folded in one LLM call, so the summary
+    always reaches into the window that load_history reads and no turn falls
+    between the two.
+    Returns: True if the summary was updated
+    """
+    try:
+        oid = ObjectId(topic_id)
+        # AsyncCollection.aggregate is a coroutine that returns the cursor
+        counts = await (await async_topics_collection.aggregate([
+            {"$match": {"_id": oid}},
+            {"$project": {"summary": 1, "summarized_messages": 1, "total": {"$size": {"$ifNull": ["$messages", []]}}}},
+        ])).to_list(None)
+        if not counts:
+            return False
+        total = counts[0]["total"]
+        summarized = counts[0].get("summarized_messages", 0)
+        if total - summarized <= 2 * HISTORY_MAX_TURNS:
+            return False
+
+        keep = HISTORY_MAX_TURNS - min(max(HISTORY_SUMMARY_EVERY, 1), HISTORY_MAX_TURNS)
+        upto = total - 2 * keep
+        topic = await async_topics_collection.find_one(
+            {"_id": oid}, {"messages": {"$slice": [summarized, upto - summarized]}}
+        )
+        transcript = "\n".join(
+            f"{m['role']}: {m['content']}" for m in normalize_messages(topic.get("messages", []))
+        )
+        reply = await llm.ainvoke(SUMMARY_PROMPT.format(
+            owner_repo=f"{owner}/{repo_name}",
+            summary=counts[0].get("summary") or "(none yet)",
+            transcript=transcript,
+            max_words=HISTORY_SUMMARY_MAX_WORDS,
+        ))
+        summary = reply.content if isinstance(reply.content, str) else str(reply.content)
+
+        # Only move forward from the state the summary was built on
+        covered = {"summarized_messages": summarized} if summarized else {
+            "$or": [{"summarized_messages": 0}, {"summarized_messages": {"$exists": False}}]
+        }
+        result = await async_topics_collection.update_one(
+            {"_id": oid, **covered},
+            {"$set": {"summary": summary.strip(), "summarized_messages": upto}}
+        )
+        return result.modified_count > 0
+    except Exception:
+        logger.exception(f"Failed to update summary of topic {topic_id}")
+        return False
@@ -0,0 +1,151 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from qdrant_client.models import ScoredPoint
+from app.core.config import (
+    HYBRID_SEARCH, HYBRID_CANDIDATES, RRF_K, RETRIEVAL_CACHE_TTL, RETRIEVAL_CACHE_MAX_ENTRIES
+)
+from app.db.lexical.index import get_lexical_index, lexical_index_exists
+from app.db.vector_store import vector_store, collection_version
+from app.utils.embeddor import create_embedding, acreate_embedding, backend
+from app.utils.ttl_cache import TTLCache
+
+# Runs the lexical leg while the calling thread embeds the query and searches vectors
+_lexical_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lexical")
+
+# The agent tends to ask the same thing several times within a run and across turns.
+# Query vectors don't depend on the repo; results are keyed on the collection version,
+# which ingestion bumps, so a re-ingest makes every older entry unreachable
+query_embedding_cache = TTLCache(RETRIEVAL_CACHE_MAX_ENTRIES, RETRIEVAL_CACHE_TTL)
+result_cache = TTLCache(RETRIEVAL_CACHE_MAX_ENTRIES, RETRIEVAL_CACHE_TTL)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split())
+
+
+def embed_query(query: str) -> list[float]:
+    key = (backend.model, backend.dimensions, query)
+    vector = query_embedding_cache.get(key)
+    if vector is None:
+        vector = create_embedding(query)
+        query_embedding_cache.put(key, vector)
+    return vector
+
+
+async def aembed_query(query: str) -> list[float]:
+    key = (backend.model, backend.dimensions, query)
+    vector = query_embedding_cache.get(key)
+    if vector is None:
+        vector = await acreate_embedding(query)
+        query_embedding_cache.put(key, vector)
+    return vector
+
+
+def vector_search(collection_name: str, query: str, limit: int) -> list[ScoredPoint]:
+    return vector_store.search(collection_name, embed_query(query), limit=limit)
+
+
+async def avector_search(collection_name: str, query: str, limit: int) -> list[ScoredPoint]:
+    return await vector_store.asearch(collection_name, await aembed_query(query), limit=limit)
+
+
+def lexical_search(collection_name: str, query: str, limit: int) -> list[ScoredPoint]:
+    if not lexical_index_exists(collection_name):
+        return []
+    return get_lexical_index(collection_name).search(query, limit=limit)
+
+
+def reciprocal_rank_fusion(rankings: list[list[ScoredPoint]], limit: int, k: int = RRF_K) -> list[ScoredPoint]:
+    """
+    Merge ranked lists by summing 1 / (k + rank) per point ID. Scores of
+    different retrievers aren't comparable, ranks are.
+    Returns: The top `limit` points, with the fused score as their score
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, point in enumerate(ranking, start=1):
+            entry = fused.setdefault(str(point.id), [0.0, point])
+            entry[0] += 1.0 / (k + rank)
+    best = sorted(fused.values(), key=lambda entry: entry[0], reverse=True)[:limit]
+    return [
+        ScoredPoint(id=point.id, version=point.version, score=score, payload=point.payload)
+        for score, point in best
+    ]
+
+
+def hybrid_search(collection_name: str, query: str, limit: int = 3,
+                  candidates: int = HYBRID_CANDIDATES) -> list[ScoredPoint]:
+    """
+    BM25 and dense search over a repo's chunks, fused with RRF. The two legs
+    run concurrently, so this takes about as long as the slower of them.
+    A failing leg is logged and the other one's ranking is used alone.
+    Results are served from result_cache while the collection is unchanged.
+    """
+    query = normalize_query(query)
+    key = (collection_name, collection_version(collection_name), query, limit, candidates)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return list(cached)
+    return _remember(key, _search(collection_name, query, limit, candidates))
+
+
+async def ahybrid_search(collection_name: str, query: str, limit: int = 3,
+                         candidates: int = HYBRID_CANDIDATES) -> list[ScoredPoint]:
+    """hybrid_search() for the async request path; the same caches are shared."""
+    query = normalize_query(query)
+    key = (collection_name, collection_version(collection_name), query, limit, candidates)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return list(cached)
+    return _remember(key, await _asearch(collection_name, query, limit, candidates))
+
+
+def _remember(key: tuple, results: list[ScoredPoint]) -> list[ScoredPoint]:
+    # An empty list may be a failed search; only real answers are cached
+    if results:
+        result_cache.put(key, tuple(results))
+    return results
+
+
+def _search(collection_name: str, query: str, limit: int, candidates: int) -> list[ScoredPoint]:
+    if not HYBRID_SEARCH:
+        return vector_search(collection_name, query, limit)
+
+    candidates = max(candidates, limit)
+    lexical = _lexical_pool.submit(lexical_search, collection_name, query, candidates)
+    try:
+        dense = vector_search(collection_name, query, candidates)
+    except Exception as e:
+        print(f"Vector search failed, using BM25 only: {e}")
+        dense = []
+    try:
+        sparse = lexical.result()
+    except Exception as e:
+        print(f"BM25 search failed, using vectors only: {e}")
+        sparse = []
+    return reciprocal_rank_fusion([dense, sparse], limit)
+
+
+async def _asearch(collection_name: str, query: str, limit: int, candidates: int) -> list[ScoredPoint]:
+    if not HYBRID_SEARCH:
+        return await avector_search(collection_name, query, limit)
+
+    candidates = max(candidates, limit)
+    # SQLite has no async driver; the BM25 leg is short and runs on the lexical pool
+    lexical = asyncio.get_running_loop().run_in_executor(
+        _lexical_pool, lexical_search, collection_name, query, candidates
+    )
+    dense, sparse = await asyncio.gather(avector_search(collection_name, query, candidates), lexical,
+                                         return_exceptions=True)
+    if isinstance(dense, Exception):
+        print(f"Vector search failed, using BM25 only: {dense}")
+        dense = []
+    if isinstance(sparse, Exception):
+        print(f"BM25 search failed, using vectors only: {sparse}")
+        sparse = []
+    return reciprocal_rank_fusion([dense, sparse], limit)
+
+
+def cache_stats() -> dict:
+    """Hit rates of the query-vector and result caches."""
+    return {"query_embeddings": query_embedding_cache.stats(), "results": result_cache.stats()}
@@ -0,0 +1,269 @@
+import ast
+import hashlib
+import os
+import re
+from app.core.config import CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+from app.utils.embeddor import count_tokens
+
+LANGUAGES = {
+    ".py": "python", ".pyi": "python",
+    ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript", ".cjs": "javascript",
+    ".ts": "typescript", ".tsx": "typescript",
+    ".java": "java", ".kt": "kotlin", ".scala": "scala",
+    ".go": "go", ".rs": "rust", ".rb": "ruby", ".php": "php", ".swift": "swift",
+    ".c": "c", ".h": "c", ".cpp": "cpp", ".cc": "cpp", ".hpp": "cpp", ".cs": "csharp",
+    ".sh": "shell", ".bash": "shell",
+    ".html": "html", ".css": "css", ".scss": "css", ".vue": "vue", ".svelte": "svelte",
+    ".sql": "sql",
+    ".md": "markdown", ".mdx": "markdown", ".rst": "rst",
+    ".json": "json", ".yaml": "yaml", ".yml": "yaml", ".toml": "toml", ".xml": "xml",
+    ".txt": "text",
+}
+
+# Lines that start a new top-level unit in brace/indent languages
+_DECLARATION = re.compile(
+    r"^(export\s+|public\s+|private\s+|protected\s+|static\s+|async\s+|default\s+|abstract\s+|final\s+)*"
+    r"(def|class|function|interface|type|enum|struct|impl|trait|fn|func|const|let|var|module|namespace|package|"
+    r"import|from|@\w+|#include|template)\b"
+)
+_MD_HEADING = re.compile(r"^(#{1,6}\s|=+\s*$|-+\s*$)")
+_MD_FENCE = re.compile(r"^\s*(```|~~~)")
+
+
+def detect_language(path: str) -> str:
+    """Language name for a file, from its extension."""
+    name = os.path.basename(path).lower()
+    if name == "dockerfile":
+        return "dockerfile"
+    if name == "makefile":
+        return "makefile"
+    return LANGUAGES.get(os.path.splitext(name)[1], "text")
+
+
+def _definition_start(node: ast.stmt, lines: list[str]) -> int:
+    """0-based first line of a statement, counting its decorators and the comments right above it."""
+    start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])]) - 1
+    while start > 0 and lines[start - 1].lstrip().startswith("#"):
+        start -= 1
+    return start
+
+
+def _python_structure(source: str, lines: list[str]):
+    """
+    Top-level boundaries of a Python file plus a splitter for oversized
+    definitions, or None when the file doesn't parse.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+    definitions = []
+    boundaries = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            definitions.append((_definition_start(node, lines), node.end_lineno or node.lineno, node))
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            boundaries.append(_definition_start(node, lines))
+            # Module code after a definition starts a new block too
+            boundaries.append(node.end_lineno or node.lineno)
+
+    def split(start: int, end: int) -> list[tuple[int, int]]:
+        """Cut a too-big function or class between the statements of its body."""
+        inside = [d for d in definitions if start <= d[0] < end]
+        if not inside:
+            return []
+        _, _, node = min(inside, key=lambda d: (d[0], -d[1]))
+        return _blocks(lines, [_definition_start(stmt, lines) for stmt in node.body], start, end)
+
+    return boundaries, split
+
+
+def _markdown_boundaries(lines: list[str]) -> list[int]:
+    """Lines that open a section (headings outside code fences)."""
+    boundaries = []
+    in_fence = False
+    for i, line in enumerate(lines):
+        if _MD_FENCE.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        if line.startswith("#") and _MD_HEADING.match(line):
+            boundaries.append(i)
+        elif i > 0 and lines[i - 1].strip() and _MD_HEADING.match(line) and not line.startswith("#"):
+            # Setext heading: the underline belongs to the line above
+            boundaries.append(i - 1)
+    return boundaries
+
+
+def _code_boundaries(lines: list[str]) -> list[int]:
+    """
+    Heuristic boundaries for languages without a parser here: a top-level
+    declaration (no indentation) that follows a blank line, a closing brace
+    or a comment block.
+    """
+    boundaries = []
+    for i, line in enumerate(lines):
+        if not line or line[0].isspace() or not _DECLARATION.match(line):
+            continue
+        start = i
+        while start > 0 and lines[start - 1].lstrip().startswith(("//", "/*", "*", "#", "--")):
+            start -= 1
+        prev = lines[start - 1].strip() if start > 0 else ""
+        if start == 0 or not prev or prev.endswith(("}", "};", ";")):
+            boundaries.append(start)
+    return boundaries
+
+
+def _paragraph_boundaries(lines: list[str]) -> list[int]:
+    return [i for i in range(1, len(lines)) if lines[i].strip() and not lines[i - 1].strip()]
+
+
+def _blocks(lines: list[str], boundaries: list[int], start: int = 0, end: int | None = None) -> list[tuple[int, int]]:
+    """Turn boundary lines into consecutive (start, end) line ranges within lines[start:end], end exclusive."""
+    end = len(lines) if end is None else end
+    cuts = sorted({b for b in boundaries if start < b < end})
+    edges = [start] + cuts + [end]
+    return [(a, b) for a, b in zip(edges, edges[1:]) if a < b]
+
+
+class _Packer:
+    """Greedily merges consecutive blocks into chunks that fit the token budget."""
+
+    def __init__(self, lines: list[str], max_tokens: int, overlap_tokens: int):
+        self.lines = lines
+        self.line_tokens = [count_tokens(line) + 1 if line else 1 for line in lines]
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.chunks = []
+        self._start = None
+        self._end = None
+        self._tokens = 0
+
+    def add(self, start: int, end: int, split=None):
+        """
+        Add lines[start:end]. A block over the budget is flushed on its own,
+        split further by `split` (a function returning inner blocks) when it
+        has structure, or else line by line with some overlap.
+        """
+        tokens = sum(self.line_tokens[start:end])
+        if tokens > self.max_tokens:
+            self.flush()
+            inner = split(start, end) if split else []
+            if len(inner) > 1:
+                for a, b in inner:
+                    self.add(a, b, split)
+                self.flush()
+            else:
+                self._split_lines(start, end)
+            return
+        if self._start is not None and self._tokens + tokens > self.max_tokens:
+            self.flush()
+        if self._start is None:
+            self._start = start
+        self._end = end
+        self._tokens += tokens
+
+    def flush(self):
+        if self._start is not None:
+            self.chunks.append((self._start, self._end))
+        self._start, self._end, self._tokens = None, None, 0
+
+    def _split_lines(self, start: int, end: int):
+        i = start
+        while i < end:
+            j, tokens = i, 0
+            while j < end and (j == i or tokens + self.line_tokens[j] <= self.max_tokens):
+                tokens += self.line_tokens[j]
+                j += 1
+            self.chunks.append((i, j))
+            if j >= end:
+                break
+            # Step back over the last few lines so context carries across the cut
+            back, k = 0, j
+            while k - 1 > i and back + self.line_tokens[k - 1] <= self.overlap_tokens:
+                k -= 1
+                back += self.line_tokens[k]
+            i = k
+
+
+def _split_long_line(text: str, max_tokens: int) -> list[str]:
+    """Cut a single line that alone exceeds the budget (minified code, data)."""
+    pieces = []
+    # Start from ~4 characters per token and shrink when a piece still tokenizes too long
+    width = max((max_tokens - 1) * 4, 1)
+    i = 0
+    while i < len(text):
+        piece = text[i:i + width]
+        while width > 1 and count_tokens(piece) > max_tokens:
+            width //= 2
+            piece = text[i:i + width]
+        pieces.append(piece)
+        i += len(piece)
+    return pieces
+
+
+def chunk_text(path: str, content: str, max_tokens: int = CHUNK_MAX_TOKENS,
+               overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> list[dict]:
+    """
+    Split a file into chunks on structural boundaries, sized by tokens.
+
+    Python is split on top-level functions and classes (and on methods when
+    a class is too big), Markdown on headings, other code on top-level
+    declarations and everything else on blank-line paragraphs. Neighbouring
+    small blocks are merged up to max_tokens; only a block with no usable
+    boundary left is cut between lines, with overlap_tokens of overlap.
+    Args:
+        path: Repo-relative path, used to pick the language
+        content: File text
+        max_tokens: Token budget per chunk
+        overlap_tokens: Overlap when a block has to be cut between lines
+    Returns: [{"text", "language", "start_line", "end_line", "tokens", "content_hash"}]
+             with 1-based inclusive line numbers
+    """
+    language = detect_language(path)
+    lines = content.split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+    if not lines:
+        return []
+
+    split = None
+    structure = _python_structure(content, lines) if language == "python" else None
+    if structure is not None:
+        boundaries, split = structure
+    elif language == "python":
+        boundaries = _paragraph_boundaries(lines)
+    elif language in ("markdown", "rst"):
+        boundaries = _markdown_boundaries(lines)
+    elif language in ("text", "json", "yaml", "toml", "xml"):
+        boundaries = _paragraph_boundaries(lines)
+    else:
+        boundaries = _code_boundaries(lines)
+
+    packer = _Packer(lines, max_tokens, overlap_tokens)
+    for start, end in _blocks(lines, boundaries):
+        packer.add(start, end, split)
+    packer.flush()
+
+    chunks = []
+    for start, end in packer.chunks:
+        text = "\n".join(lines[start:end])
+        if not text.strip():
+            continue
+        tokens = sum(packer.line_tokens[start:end])
+        pieces = [(text, tokens)]
+        if end - start == 1 and tokens > max_tokens:
+            pieces = [(piece, count_tokens(piece)) for piece in _split_long_line(text, max_tokens)]
+        for piece, piece_tokens in pieces:
+            chunks.append({
+                "text": piece,
+                "language": language,
+                "start_line": start + 1,
+                "end_line": end,
+                "tokens": piece_tokens,
+                "content_hash": hashlib.sha256(piece.encode("utf-8")).hexdigest(),
+            })
+    return chunks
@@ -0,0 +1,222 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from openai import AzureOpenAI, AsyncAzureOpenAI, RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
+from app.core.config import (
+    AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT,
+    EMBEDDING_MODEL, EMBEDDING_DIMENSIONS, EMBEDDING_CONCURRENCY, EMBEDDING_MAX_RETRIES, EMBEDDING_RPM, EMBEDDING_TPM,
+    EMBEDDING_LOCAL_MODEL, EMBEDDING_LOCAL_DEVICE, EMBEDDING_LOCAL_BATCH_SIZE, EMBEDDING_LOCAL_THREADS
+)
+from app.utils.rate_limiter import AdaptiveRateLimiter, retry_after_seconds
+
+
+class EmbeddingBackend:
+    """
+    Something that turns a batch of texts into vectors.
+
+    Attributes:
+        name: Backend name as used in EMBEDDING_BACKEND
+        model: Model identifier; together with dimensions it keys cached vectors
+        concurrency: How many embed() calls are worth running at once
+    """
+
+    name = ""
+    model = ""
+    concurrency = 1
+
+    @property
+    def dimensions(self) -> int:
+        raise NotImplementedError
+
+    def embed(self, texts: list[str], tokens: int | None = None) -> list[list[float]]:
+        """Embed one batch. tokens is the batch's token count when the caller knows it."""
+        raise NotImplementedError
+
+    async def aembed(self, texts: list[str], tokens: int | None = None) -> list[list[float]]:
+        """embed() for coroutines; runs the blocking call in a worker thread unless overridden."""
+        return await asyncio.to_thread(self.embed, texts, tokens)
+
+    def stats(self) -> dict:
+        return {}
+
+
+class AzureEmbeddingBackend(EmbeddingBackend):
+    """Azure OpenAI embeddings behind the shared adaptive rate limiter."""
+
+    name = "azure"
+
+    # Output sizes of the OpenAI embedding models
+    MODEL_DIMENSIONS = {
+        "text-embedding-3-large": 3072,
+        "text-embedding-3-small": 1536,
+        "text-embedding-ada-002": 1536,
+    }
+
+    def __init__(self, model: str = EMBEDDING_MODEL, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.model = model
+        # text-embedding-3 models are Matryoshka-trained: the API can return
+        # a shorter (re-normalized) vector that keeps most of the quality
+        self.truncate_dim = dimensions if dimensions and model.startswith("text-embedding-3") else None
+        self.concurrency = max(EMBEDDING_CONCURRENCY, 1)
+        # Retries are handled here so 429s can feed the shared rate limiter
+        self.client = AzureOpenAI(
+            api_key=AZURE_OPENAI_API_KEY,
+            api_version="2024-12-01-preview",
+            azure_endpoint=AZURE_OPENAI_ENDPOINT,
+            max_retries=0
+        )
+        self.async_client = AsyncAzureOpenAI(
+            api_key=AZURE_OPENAI_API_KEY,
+            api_version="2024-12-01-preview",
+            azure_endpoint=AZURE_OPENAI_ENDPOINT,
+            max_retries=0
+        )
+        self.rate_limiter = AdaptiveRateLimiter(EMBEDDING_RPM, EMBEDDING_TPM)
+
+    @property
+    def dimensions(self) -> int:
+        return self.truncate_dim or self.MODEL_DIMENSIONS.get(self.model, 3072)
+
+    def embed(self, texts: list[str], tokens: int | None = None) -> list[list[float]]:
+        """Send one batch, waiting on the rate limiter and retrying 429/5xx."""
+        if tokens is None:
+            tokens = sum(len(text) // 4 + 1 for text in texts)
+        for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+            self.rate_limiter.acquire(tokens)
+            try:
+                raw = self.client.embeddings.with_raw_response.create(
+                    model=self.model,
+                    input=texts,
+                    **({"dimensions": self.truncate_dim} if self.truncate_dim else {})
+                )
+            except RateLimitError as e:
+                if attempt == EMBEDDING_MAX_RETRIES:
+                    raise
+                self.rate_limiter.on_rate_limited(retry_after_seconds(e.response.headers))
+                continue
+            except (APIConnectionError, APITimeoutError, InternalServerError):
+                if attempt == EMBEDDING_MAX_RETRIES:
+                    raise
+                time.sleep(min(2 ** attempt, 30) * (0.5 + random.random() / 2))
+                continue
+            self.rate_limiter.on_response(raw.headers)
+            data = raw.parse().data
+            return [item.embedding for item in sorted(data, key=lambda item: item.index)]
+
+    async def aembed(self, texts: list[str], tokens: int | None = None) -> list[list[float]]:
+        """embed() on the async client; same rate limiter and retries, no thread held while waiting."""
+        if tokens is None:
+            tokens = sum(len(text) // 4 + 1 for text in texts)
+        for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+            await self.rate_limiter.aacquire(tokens)
+            try:
+                raw = await self.async_client.embeddings.with_raw_response.create(
+                    model=self.model,
+                    input=texts,
+                    **({"dimensions": self.truncate_dim} if self.truncate_dim else {})
+                )
+            except RateLimitError as e:
+                if attempt == EMBEDDING_MAX_RETRIES:
+                    raise
+                self.rate_limiter.on_rate_limited(retry_after_seconds(e.response.headers))
+                continue
+            except (APIConnectionError, APITimeoutError, InternalServerError):
+                if attempt == EMBEDDING_MAX_RETRIES:
+                    raise
+                await asyncio.sleep(min(2 ** attempt, 30) * (0.5 + random.random() / 2))
+                continue
+            self.rate_limiter.on_response(raw.headers)
+            data = raw.parse().data
+            return [item.embedding for item in sorted(data, key=lambda item: item.index)]
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "model": self.model, "rate_limiter": self.rate_limiter.stats()}
+
+
+class LocalEmbeddingBackend(EmbeddingBackend):
+    """
+    sentence-transformers model running in-process on the CPU (or a local GPU).
+
+    One encode() call at a time: torch already spreads each large batch over
+    EMBEDDING_LOCAL_THREADS cores, and concurrent calls would only fight
+    over them. The model is loaded on first use.
+    """
+
+    name = "local"
+    concurrency = 1
+
+    def __init__(self, model: str = EMBEDDING_LOCAL_MODEL, device: str = EMBEDDING_LOCAL_DEVICE,
+                 batch_size: int = EMBEDDING_LOCAL_BATCH_SIZE, threads: int = EMBEDDING_LOCAL_THREADS,
+                 dimensions: int = EMBEDDING_DIMENSIONS):
+        self.model = model
+        self.truncate_dim = dimensions or None
+        self.device = device
+        self.batch_size = batch_size
+        self.threads = threads or os.cpu_count() or 1
+        self._model = None
+        self._lock = threading.Lock()
+        self.texts = 0
+        self.seconds = 0.0
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                try:
+                    import torch
+                    from sentence_transformers import SentenceTransformer
+                except ImportError as e:
+                    raise RuntimeError(
+                        "EMBEDDING_BACKEND=local needs the sentence-transformers package"
+                    ) from e
+                torch.set_num_threads(self.threads)
+                print(f"Loading embedding model {self.model} on {self.device} ({self.threads} threads)")
+                self._model = SentenceTransformer(self.model, device=self.device, truncate_dim=self.truncate_dim)
+        return self._model
+
+    @property
+    def dimensions(self) -> int:
+        model = self._load()
+        # Renamed in sentence-transformers 6
+        get_dimension = getattr(model, "get_embedding_dimension", None) or model.get_sentence_embedding_dimension
+        return get_dimension()
+
+    def embed(self, texts: list[str], tokens: int | None = None) -> list[list[float]]:
+        model = self._load()
+        start = time.perf_counter()
+        with self._lock:
+            vectors = model.encode(
+                texts,
+                batch_size=self.batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+        elapsed = time.perf_counter() - start
+        self.texts += len(texts)
+        self.seconds += elapsed
+        return vectors.tolist()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "model": self.model,
+            "device": self.device,
+            "threads": self.threads,
+            "texts": self.texts,
+            "texts_per_second": round(self.texts / self.seconds, 1) if self.seconds else 0.0,
+        }
+
+
+BACKENDS = {
+    AzureEmbeddingBackend.name: AzureEmbeddingBackend,
+    LocalEmbeddingBackend.name: LocalEmbeddingBackend,
+}
+
+
+def get_backend(name: str) -> EmbeddingBackend:
+    """Instantiate the backend selected by EMBEDDING_BACKEND."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name]()
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed embedding cache backed by SQLite.
+
+    Vectors are keyed by (model, dimensions, sha256(text)) and stored as packed
+    float32, so identical chunks (LICENSE files, vendored code, re-ingests,
+    repeated queries) are only ever embedded once. The least recently used
+    entries are evicted once the cache holds more than max_entries vectors.
+    """
+
+    def __init__(self, path: str, max_entries: int = 50_000):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                dims INTEGER NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, dims, text_hash)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, model: str, dims: int, text: str) -> list[float] | None:
+        """Return the cached vector for text, or None on a miss."""
+        return self.get_many(model, dims, [text]).get(text)
+
+    def get_many(self, model: str, dims: int, texts: list[str]) -> dict[str, list[float]]:
+        """Look up many texts at once. Returns {text: vector} for the hits only."""
+        by_hash = {}
+        for text in texts:
+            by_hash.setdefault(self.text_hash(text), text)
+        found = {}
+        hashes = list(by_hash)
+        now = time.time()
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(hashes), 500):
+                part = hashes[i:i + 500]
+                marks = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND dims = ? AND text_hash IN ({marks})",
+                    (model, dims, *part)
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[by_hash[text_hash]] = array("f", blob).tolist()
+                if rows:
+                    hit_marks = ",".join("?" * len(rows))
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_used = ? WHERE model = ? AND dims = ? AND text_hash IN ({hit_marks})",
+                        (now, model, dims, *[text_hash for text_hash, _ in rows])
+                    )
+            self.hits += len(found)
+            self.misses += len(by_hash) - len(found)
+        return found
+
+    def put(self, model: str, dims: int, text: str, vector: list[float]):
+        """Store a vector, evicting least recently used entries when full."""
+        self.put_many(model, dims, [(text, vector)])
+
+    def put_many(self, model: str, dims: int, items: list[tuple[str, list[float]]]):
+        """Store several (text, vector) pairs in one transaction."""
+        now = time.time()
+        rows = [(model, dims, self.text_hash(text), array("f", vector).tobytes(), now) for text, vector in items]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            cur = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, dims, text_hash, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.execute("COMMIT")
+            self._count += cur.rowcount
+            # Evict in slabs of ~5% so eviction doesn't run on every insert
+            if self._count > self.max_entries:
+                excess = self._count - int(self.max_entries * 0.95)
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE (model, dims, text_hash) IN "
+                    "(SELECT model, dims, text_hash FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+                self._count -= excess
+                self.evictions += excess
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process plus the current cache size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": self._count,
+            "max_entries": self.max_entries,
+        }
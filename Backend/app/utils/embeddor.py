@@ -1,17 +1,104 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import (
+    EMBEDDING_BACKEND, EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_BATCH_MAX_ITEMS, EMBEDDING_BATCH_MAX_TOKENS
+)
+from app.utils.embedding_backends import get_backend
+from app.utils.embedding_cache import EmbeddingCache
 
-from openai import AzureOpenAI
-from app.core.config import AZURE_OPENAI_API_KEY,AZURE_OPENAI_ENDPOINT
+# Azure OpenAI or a local sentence-transformers model, per EMBEDDING_BACKEND
+backend = get_backend(EMBEDDING_BACKEND)
 
-Azure_client = AzureOpenAI(
-    api_key=AZURE_OPENAI_API_KEY,
-    api_version="2024-12-01-preview",
-    azure_endpoint=AZURE_OPENAI_ENDPOINT
+embedding_cache = (
+    EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES)
+    if EMBEDDING_CACHE_MAX_ENTRIES > 0 else None
 )
 
+_batch_pool = ThreadPoolExecutor(max_workers=backend.concurrency, thread_name_prefix="embed")
+
+_encoding = None
+
+
+def embedding_dimensions() -> int:
+    """Vector size produced by the configured backend."""
+    return backend.dimensions
+
+
+def count_tokens(text: str) -> int:
+    """Token count with the embedding model's tokenizer (cl100k_base), or an estimate."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def pack_batches(texts: list[str], max_items: int = EMBEDDING_BATCH_MAX_ITEMS,
+                 max_tokens: int = EMBEDDING_BATCH_MAX_TOKENS) -> list[tuple[list[str], int]]:
+    """
+    Greedily pack texts into requests bounded by item count and token budget.
+    Returns: A list of (texts, token_count) batches in input order
+    """
+    batches = []
+    current, current_tokens = [], 0
+    for text in texts:
+        tokens = count_tokens(text)
+        if current and (len(current) >= max_items or current_tokens + tokens > max_tokens):
+            batches.append((current, current_tokens))
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        batches.append((current, current_tokens))
+    return batches
+
+
+def _embed_batch(batch: tuple[list[str], int]) -> list[list[float]]:
+    texts, tokens = batch
+    return backend.embed(texts, tokens)
+
+
+def create_embeddings_batch(texts: list[str]) -> list[list[float]]:
+    """
+    Embed many texts with as few requests as possible.
+    Cached vectors are reused, duplicates are sent once, and the remaining
+    texts are packed into token-bounded batches with several in flight.
+    Returns: One vector per input text, in order
+    """
+    model, dims = backend.model, backend.dimensions
+    cached = embedding_cache.get_many(model, dims, texts) if embedding_cache else {}
+    missing = list(dict.fromkeys(text for text in texts if text not in cached))
+
+    if missing:
+        batches = pack_batches(missing)
+        new_items = []
+        for (batch_texts, _), vectors in zip(batches, _batch_pool.map(_embed_batch, batches)):
+            new_items.extend(zip(batch_texts, vectors))
+        if embedding_cache is not None:
+            embedding_cache.put_many(model, dims, new_items)
+        cached.update(new_items)
+
+    return [cached[text] for text in texts]
+
+
 def create_embedding(query:str):
-    query_vector = Azure_client.embeddings.create(
-            model="text-embedding-3-large",
-            input=query
-        ).data[0].embedding
-    
-    return query_vector
\ No newline at end of file
+    return create_embeddings_batch([query])[0]
+
+
+async def acreate_embedding(query: str) -> list[float]:
+    """create_embedding() for the async request path: the API call doesn't hold a thread."""
+    model, dims = backend.model, backend.dimensions
+    if embedding_cache is not None:
+        vector = await asyncio.to_thread(embedding_cache.get, model, dims, query)
+        if vector is not None:
+            return vector
+    vector = (await backend.aembed([query], count_tokens(query)))[0]
+    if embedding_cache is not None:
+        await asyncio.to_thread(embedding_cache.put, model, dims, query, vector)
+    return vector
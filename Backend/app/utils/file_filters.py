@@ -0,0 +1,28 @@
+import os
+from app.core.config import INGEST_MAX_FILE_BYTES
+
+# Define excluded extensions (images, pdf, office docs, archives, media, binaries)
+EXCLUDED_EXTS = {
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg', '.webp', '.ico', '.pdf',
+    '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.odt', '.ods', '.odp', '.rtf', '.zip', '.rar', '.7z', '.tar', '.gz', '.mp3', '.mp4', '.avi', '.mov', '.mkv', '.exe', '.dll'
+}
+
+# Directories that never carry useful source for the assistant
+EXCLUDED_DIRS = {'.git', '.venv', 'venv', '__pycache__', 'node_modules', '.vscode', '.idea'}
+
+
+def should_skip(rel_path: str, size: int = 0) -> bool:
+    """
+    Decide whether a repository file should be left out of ingestion.
+    Args:
+        rel_path: Path relative to the repository root (either separator)
+        size: File size in bytes, when known
+    Returns: True if the file is excluded by extension, directory or size
+    """
+    parts = rel_path.replace("\\", "/").split("/")
+    if any(part in EXCLUDED_DIRS for part in parts[:-1]):
+        return True
+    ext = os.path.splitext(parts[-1])[1].lower()
+    if ext in EXCLUDED_EXTS:
+        return True
+    return size > INGEST_MAX_FILE_BYTES
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """Classic token bucket: refills at `rate` units/second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (amount is capped at capacity)."""
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+
+class AdaptiveRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limiter shared by every caller.
+
+    Buckets hold ten seconds of quota, matching how Azure OpenAI evaluates
+    its per-minute limits. Rates back off multiplicatively on 429s, creep
+    back up additively on success, and bucket levels are pulled down to the
+    x-ratelimit-remaining-* values the server reports.
+    """
+
+    WINDOW = 10.0
+    # Fraction of the configured limit a successful response adds back to the rate
+    INCREASE_STEP = 0.02
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, min_fraction: float = 0.05):
+        self.max_rpm = requests_per_minute
+        self.max_tpm = tokens_per_minute
+        self.min_fraction = min_fraction
+        self.requests = TokenBucket(requests_per_minute / 60, requests_per_minute / 60 * self.WINDOW)
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute / 60 * self.WINDOW)
+        self.paused_until = 0.0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Take quota for one request if available. Returns: 0, or seconds to wait before trying again"""
+        with self._lock:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            wait = max(
+                self.paused_until - now,
+                self.requests.wait_time(1),
+                self.tokens.wait_time(tokens),
+            )
+            if wait <= 0:
+                self.requests.level -= 1
+                self.tokens.level -= min(tokens, self.tokens.capacity)
+                return 0.0
+            return wait
+
+    def acquire(self, tokens: int = 1):
+        """Block until one request carrying `tokens` tokens may be sent."""
+        while (wait := self._try_acquire(tokens)) > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int = 1):
+        """acquire() for coroutines: waits without holding a thread."""
+        while (wait := self._try_acquire(tokens)) > 0:
+            await asyncio.sleep(wait)
+
+    def on_response(self, headers):
+        """Feed back rate-limit headers from a successful response."""
+        with self._lock:
+            remaining_requests = _header_number(headers, "x-ratelimit-remaining-requests")
+            remaining_tokens = _header_number(headers, "x-ratelimit-remaining-tokens")
+            if remaining_requests is not None:
+                self.requests.level = min(self.requests.level, remaining_requests)
+            if remaining_tokens is not None:
+                self.tokens.level = min(self.tokens.level, remaining_tokens)
+            # Additive increase back towards the configured limits
+            self._set_rates(lambda rate, limit: rate + limit * self.INCREASE_STEP)
+
+    def on_rate_limited(self, retry_after: float | None):
+        """Back off after a 429: pause everyone and halve the rates."""
+        with self._lock:
+            now = time.monotonic()
+            self.throttled += 1
+            self.paused_until = max(self.paused_until, now + (retry_after or 1.0))
+            self._set_rates(lambda rate, limit: rate * 0.5)
+            self.requests.level = min(self.requests.level, 0)
+            self.tokens.level = min(self.tokens.level, 0)
+
+    def _set_rates(self, new_rate):
+        """Apply new_rate(rate, limit) (both per second) to both buckets, within [min_fraction, 1] of the limit."""
+        for bucket, limit in ((self.requests, self.max_rpm), (self.tokens, self.max_tpm)):
+            per_second = limit / 60
+            bucket.rate = min(per_second, max(per_second * self.min_fraction, new_rate(bucket.rate, per_second)))
+            bucket.capacity = bucket.rate * self.WINDOW
+
+    def stats(self) -> dict:
+        return {
+            "requests_per_minute": round(self.requests.rate * 60, 1),
+            "tokens_per_minute": round(self.tokens.rate * 60, 1),
+            "throttled": self.throttled,
+        }
+
+
+def _header_number(headers, name: str) -> float | None:
+    value = headers.get(name) if headers is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def retry_after_seconds(headers) -> float | None:
+    """Read retry-after-ms / retry-after from a 429 response."""
+    if headers is None:
+        return None
+    millis = _header_number(headers, "retry-after-ms")
+    if millis is not None:
+        return millis / 1000
+    return _header_number(headers, "retry-after")
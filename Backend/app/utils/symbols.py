@@ -0,0 +1,189 @@
+import ast
+import re
+from app.utils.chunker import detect_language
+
+# Longest source line kept with a definition or reference
+SNIPPET_CHARS = 200
+
+_JS_LIKE = {"javascript", "typescript", "vue", "svelte"}
+_CALL_KEYWORDS = {
+    "if", "for", "while", "switch", "catch", "return", "function", "typeof", "new", "await", "super", "import",
+    "require", "sizeof", "elif", "and", "or", "not", "in", "with", "print", "def", "class", "fn", "func", "match",
+    "async",
+}
+
+# JS / TS
+_JS_DEFINITIONS = [
+    (re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)"), "function"),
+    (re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+([A-Za-z_$][\w$]*)"), "class"),
+    (re.compile(r"^\s*(?:export\s+)?interface\s+([A-Za-z_$][\w$]*)"), "interface"),
+    (re.compile(r"^\s*(?:export\s+)?type\s+([A-Za-z_$][\w$]*)\s*(?:<[^=]*>)?\s*="), "type"),
+    (re.compile(r"^\s*(?:export\s+)?(?:const\s+)?enum\s+([A-Za-z_$][\w$]*)"), "enum"),
+    # const handler = async (req) => ..., const Sidebar: React.FC = () => ..., const f = function ...
+    # (parameters may continue on the next lines: 'const f = (')
+    (re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*(?::[^=]+)?=\s*(?:async\s*)?"
+                r"(?:function\b|\([^)]*\)\s*(?::[^=]+)?=>|\(\s*$|[A-Za-z_$][\w$]*\s*=>)"), "function"),
+    (re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)"), "variable"),
+    # Class members: '  async fetchUser(id) {', '  private render(): void {'
+    (re.compile(r"^\s+(?:(?:public|private|protected|static|readonly|async|override|get|set)\s+)*"
+                r"([A-Za-z_$][\w$]*)\s*\([^;]*\)\s*(?::\s*[^={]+)?\{\s*$"), "method"),
+]
+_JS_IMPORT = re.compile(r"^\s*import\s+(?:type\s+)?(.+?)\s+from\s+['\"]([^'\"]+)['\"]")
+_JS_REQUIRE = re.compile(r"^\s*(?:const|let|var)\s+(.+?)\s*=\s*require\(\s*['\"]([^'\"]+)['\"]\s*\)")
+_JSX_ELEMENT = re.compile(r"<([A-Z][\w$]*(?:\.[A-Z][\w$]*)?)[\s/>]")
+
+# Other brace languages: Go, Rust, Java, C#, C/C++, Kotlin, Swift, PHP, Ruby, shell
+_GENERIC_DEFINITIONS = [
+    (re.compile(r"^\s*func\s+(?:\([^)]*\)\s*)?([A-Za-z_]\w*)"), "function"),
+    (re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?fn\s+([A-Za-z_]\w*)"), "function"),
+    (re.compile(r"^\s*(?:pub\s+)?(?:struct|enum|trait|union)\s+([A-Za-z_]\w*)"), "class"),
+    (re.compile(r"^\s*(?:[\w@]+\s+)*(?:class|interface|object|record|protocol|module)\s+([A-Za-z_]\w*)"), "class"),
+    (re.compile(r"^\s*type\s+([A-Za-z_]\w*)\s+(?:struct|interface)"), "class"),
+    (re.compile(r"^\s*def\s+(?:self\.)?([A-Za-z_]\w*[?!]?)"), "function"),
+    (re.compile(r"^\s*(?:function\s+)?([A-Za-z_]\w*)\s*\(\)\s*\{"), "function"),
+    # Java/C#/C-like methods: modifiers and a return type, then name( ... ) {
+    (re.compile(r"^\s*(?:(?:public|private|protected|static|final|virtual|override|async|inline|const)\s+)*"
+                r"[\w<>\[\],.*&:?]+\s+\**([A-Za-z_]\w*)\s*\([^;]*\)\s*(?:const\s*)?(?:throws [\w., ]+)?\{?\s*$"),
+     "function"),
+]
+_GENERIC_IMPORT = re.compile(r"^\s*(?:import|use|using|require|#include)\s+[\"<]?([\w./:*-]+)")
+
+_CALL = re.compile(r"(?<![\w$.])([A-Za-z_$][\w$]*)\s*\(")
+_METHOD_CALL = re.compile(r"\.([A-Za-z_$][\w$]*)\s*\(")
+_LINE_COMMENT = re.compile(r"^\s*(//|#(?!include)|\*|/\*|--)")
+_STRINGS = re.compile(r"\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*'|`[^`]*`")
+
+
+def _snippet(lines: list[str], line: int) -> str:
+    return lines[line - 1].strip()[:SNIPPET_CHARS] if 0 < line <= len(lines) else ""
+
+
+def _python_symbols(content: str, lines: list[str]):
+    tree = ast.parse(content)
+    definitions, references = [], []
+
+    def visit(node, container: str, in_class: bool):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                kind = "class" if isinstance(child, ast.ClassDef) else ("method" if in_class else "function")
+                definitions.append({
+                    "name": child.name, "kind": kind, "line": child.lineno,
+                    "end_line": getattr(child, "end_lineno", child.lineno), "container": container,
+                    "signature": _snippet(lines, child.lineno),
+                })
+                qualified = f"{container}.{child.name}" if container else child.name
+                visit(child, qualified, isinstance(child, ast.ClassDef))
+                continue
+            if isinstance(child, (ast.Assign, ast.AnnAssign)) and not container:
+                targets = child.targets if isinstance(child, ast.Assign) else [child.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        definitions.append({
+                            "name": target.id, "kind": "variable", "line": child.lineno,
+                            "end_line": getattr(child, "end_lineno", child.lineno), "container": "",
+                            "signature": _snippet(lines, child.lineno),
+                        })
+            elif isinstance(child, ast.Import):
+                for alias in child.names:
+                    references.append({"name": alias.asname or alias.name.split(".")[-1], "kind": "import",
+                                       "line": child.lineno, "container": container, "detail": alias.name})
+            elif isinstance(child, ast.ImportFrom):
+                module = "." * child.level + (child.module or "")
+                for alias in child.names:
+                    references.append({"name": alias.name, "kind": "import", "line": child.lineno,
+                                       "container": container, "detail": module})
+            elif isinstance(child, ast.Call):
+                func = child.func
+                name = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+                if name:
+                    references.append({"name": name, "kind": "call", "line": child.lineno, "container": container,
+                                       "detail": ""})
+            visit(child, container, False if isinstance(child, ast.Lambda) else in_class)
+
+    visit(tree, "", False)
+    return definitions, references
+
+
+def _regex_symbols(language: str, lines: list[str]):
+    js = language in _JS_LIKE
+    patterns = _JS_DEFINITIONS if js else _GENERIC_DEFINITIONS
+    definitions, references = [], []
+    # The top-level class or function the current line belongs to, by indentation
+    container, container_kind, container_indent = "", "", -1
+    for number, line in enumerate(lines, start=1):
+        if not line.strip() or _LINE_COMMENT.match(line):
+            continue
+        indent = len(line) - len(line.lstrip())
+        if container and indent <= container_indent and line.strip() not in ("}", "};", ")", "});", "end"):
+            container, container_kind, container_indent = "", "", -1
+
+        defined = None
+        for pattern, kind in patterns:
+            match = pattern.match(line)
+            if not match or match.group(1) in _CALL_KEYWORDS:
+                continue
+            defined = match.group(1)
+            if kind == "method" and container_kind != "class":
+                kind = "function"
+            # Locals aren't worth indexing; inner functions are
+            if kind == "variable" and container:
+                break
+            definitions.append({"name": defined, "kind": kind, "line": number, "end_line": number,
+                                "container": container, "signature": line.strip()[:SNIPPET_CHARS]})
+            if not container and kind in ("class", "interface", "function"):
+                container, container_indent = defined, indent
+                container_kind = "function" if kind == "function" else "class"
+            break
+
+        import_match = (_JS_IMPORT.match(line) or _JS_REQUIRE.match(line)) if js else _GENERIC_IMPORT.match(line)
+        if import_match:
+            if js:
+                bound, module = import_match.group(1), import_match.group(2)
+                for name in re.findall(r"(?:\bas\s+)?([A-Za-z_$][\w$]*)", bound.replace("* as", "")):
+                    if name not in ("as", "type"):
+                        references.append({"name": name, "kind": "import", "line": number, "container": "",
+                                           "detail": module})
+            else:
+                module = import_match.group(1)
+                references.append({"name": re.split(r"[./:]", module.rstrip(".*"))[-1] or module, "kind": "import",
+                                   "line": number, "container": "", "detail": module})
+            continue
+
+        code = _STRINGS.sub('""', line)
+        for pattern in (_CALL, _METHOD_CALL):
+            for match in pattern.finditer(code):
+                name = match.group(1)
+                if name in _CALL_KEYWORDS or name == defined:
+                    continue
+                references.append({"name": name, "kind": "call", "line": number, "container": container,
+                                   "detail": ""})
+        if js:
+            for match in _JSX_ELEMENT.finditer(line):
+                references.append({"name": match.group(1).split(".")[-1], "kind": "call", "line": number,
+                                   "container": container, "detail": "jsx"})
+    return definitions, references
+
+
+def extract_symbols(path: str, content: str) -> tuple[list[dict], list[dict]]:
+    """
+    Definitions and references in one file.
+    Python is parsed with ast; JS/TS and other code languages go through
+    line-based regexes, which miss some constructs but never fail.
+    Returns: (definitions [{"name", "kind", "line", "end_line", "container", "signature"}],
+              references [{"name", "kind" ('call'|'import'), "line", "container", "detail", "text"}])
+    """
+    language = detect_language(path)
+    if language in ("markdown", "rst", "text", "json", "yaml", "toml", "xml", "css", "html", "sql"):
+        return [], []
+    lines = content.split("\n")
+    definitions = references = None
+    if language == "python":
+        try:
+            definitions, references = _python_symbols(content, lines)
+        except (SyntaxError, ValueError, RecursionError):
+            pass
+    if definitions is None:
+        definitions, references = _regex_symbols(language, lines)
+    for reference in references:
+        reference["text"] = _snippet(lines, reference["line"])
+    return definitions, references
@@ -0,0 +1,84 @@
+# The regex parser is private to the re module; if it moves or changes
+# shape, queries fall back to searching every file instead of failing
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    try:
+        import sre_parse
+    except ImportError:
+        sre_parse = None
+
+# Most alternatives a pattern's literal requirements are expanded into; past
+# that a group adds no requirement rather than multiplying the lookups
+MAX_ALTERNATIVES = 16
+
+_REPEATS = {getattr(sre_parse, name, None) for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")} - {None}
+
+
+def trigrams(text: str) -> set[bytes]:
+    """Distinct 3-byte sequences of the lowercased UTF-8 text; the unit the trigram index is keyed on."""
+    data = text.lower().encode("utf-8")
+    # Deduplicating int tuples first is about twice as fast as slicing out every trigram
+    return {bytes(gram) for gram in set(zip(data, data[1:], data[2:]))}
+
+
+def _required(parsed) -> list[list[str]]:
+    """
+    Literal strings any match of a parsed pattern must contain, as
+    alternatives of requirements: [["foo", "bar"], ["baz"]] means the text
+    contains both foo and bar, or baz. [[]] means nothing is required.
+    """
+    alternatives = [[]]
+    run = ""
+
+    def add(sub: list[list[str]]):
+        nonlocal alternatives
+        if len(alternatives) * len(sub) <= MAX_ALTERNATIVES:
+            alternatives = [have + more for have in alternatives for more in sub]
+
+    for op, av in parsed:
+        if op is sre_parse.LITERAL:
+            run += chr(av)
+            continue
+        if op is sre_parse.AT:
+            continue  # anchors and \b match no characters
+        if run:
+            add([[run]])
+            run = ""
+        if op is sre_parse.SUBPATTERN:
+            add(_required(av[-1]))
+        elif op is sre_parse.BRANCH:
+            branches = [alt for branch in av[1] for alt in _required(branch)]
+            if all(branches):
+                add(branches)
+        elif op in _REPEATS and av[0] >= 1:
+            add(_required(av[2]))
+    if run:
+        add([[run]])
+    return alternatives
+
+
+def query_trigrams(pattern: str, flags: int = 0) -> list[set[bytes]] | None:
+    """
+    Trigrams a file must contain to possibly match a regex: any one of the
+    returned sets, all of its trigrams. None when the pattern has no literal
+    of 3+ characters to narrow by, so every file has to be searched; also
+    when the pattern can't be analysed (callers compile it first, which is
+    where an invalid pattern is reported).
+    """
+    if sre_parse is None:
+        return None
+    try:
+        alternatives = _required(sre_parse.parse(pattern, flags))
+    except Exception:
+        return None
+    query = []
+    for requirement in alternatives:
+        needed = set()
+        for literal in requirement:
+            needed |= trigrams(literal)
+        if not needed:
+            return None
+        query.append(needed)
+    return query
+
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Measure the per-request overhead of the chat agent, without calling Gemini.
+
+A fake chat model answers instantly without calling tools, so what is
+timed is LangChain itself: building the prompt,
+agent and executor on every request (the old chat_about_repo) versus
+reusing one executor built by app.services.llm.executor.
+
+    python scripts/bench_agent.py --requests 500
+    python scripts/bench_agent.py --requests 200 --verbose   # old console logging on both sides
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder  # noqa: E402
+from langchain.agents import create_tool_calling_agent, AgentExecutor  # noqa: E402
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel  # noqa: E402
+from langchain_core.messages import AIMessage  # noqa: E402
+
+from app.services.llm.prompt import PROMPT  # noqa: E402
+from app.services.llm.agent import TOOLS, TOOLS_DESC  # noqa: E402
+from app.services.llm.executor import build_agent_executor  # noqa: E402
+
+
+class FakeToolLLM(GenericFakeChatModel):
+    """Replies with a fixed answer; bind_tools is a no-op so tool-calling agents accept it."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def fake_llm() -> FakeToolLLM:
+    return FakeToolLLM(messages=itertools.repeat(AIMessage(content="It runs with `uvicorn app.app:app`.")))
+
+
+def request_inputs(i: int) -> dict:
+    return {
+        "query": f"how do I run this? ({i})",
+        "conversation": [{"role": "human", "content": "hi"}, {"role": "ai", "content": "hello"}],
+        "collection_name": "owner_repo",
+        "owner_repo": "owner",
+    }
+
+
+def per_request(llm, verbose: bool, i: int):
+    """What chat_about_repo did before: rebuild everything, then invoke."""
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", PROMPT),
+        MessagesPlaceholder("conversation"),
+        ("human", "{query}"),
+        MessagesPlaceholder("agent_scratchpad"),
+    ])
+    agent = create_tool_calling_agent(llm=llm, prompt=prompt, tools=TOOLS)
+    executor = AgentExecutor(agent=agent, tools=TOOLS, verbose=verbose)
+    return executor.invoke({**request_inputs(i), "TOOLS_DESC": TOOLS_DESC})
+
+
+def run(label: str, call, requests: int) -> dict:
+    latencies = []
+    # Verbose output still gets formatted; it just doesn't flood the terminal
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(requests):
+            start = time.perf_counter()
+            call(i)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "variant": label,
+        "requests": requests,
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--verbose", action="store_true", help="Use verbose=True for the reused executor too")
+    args = parser.parse_args()
+
+    llm = fake_llm()
+    shared = build_agent_executor(llm, verbose=args.verbose)
+
+    # Warm up imports and lazy initialisation on both paths
+    with contextlib.redirect_stdout(io.StringIO()):
+        per_request(llm, True, -1)
+        shared.invoke(request_inputs(-1))
+
+    rows = [
+        run("rebuilt per request (verbose)", lambda i: per_request(llm, True, i), args.requests),
+        run(f"built once{' (verbose)' if args.verbose else ''}", lambda i: shared.invoke(request_inputs(i)),
+            args.requests),
+    ]
+    for row in rows:
+        print(row)
+    print(f"Per-request overhead saved: {rows[0]['mean_ms'] - rows[1]['mean_ms']:.3f} ms "
+          f"({rows[0]['mean_ms'] / rows[1]['mean_ms']:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Measure embedding throughput offline against scripts/fake_embeddings.py.
+
+Chunks the bundled 'Arman-Shaikh58_*' sample repos into 500-character windows
+and embeds them twice: one chunk per request (the old path) and through the
+batching embedder. The embedding cache is disabled for the run.
+
+    python scripts/bench_embeddings.py --tpm 350000 --rpm 2100 --limit 3000
+
+With --backend local the chunks go through the sentence-transformers backend
+instead, with no network at all:
+
+    python scripts/bench_embeddings.py --backend local --limit 3000 --threads 8
+"""
+import argparse
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_embeddings  # noqa: E402
+
+
+def sample_chunks(chunk_size: int = 500, chunk_overlap: int = 50) -> list[str]:
+    chunks = []
+    for entry in sorted(os.listdir(BACKEND_DIR)):
+        if not entry.startswith("Arman-Shaikh58_"):
+            continue
+        for root, dirs, files in os.walk(os.path.join(BACKEND_DIR, entry)):
+            for file_name in files:
+                try:
+                    with open(os.path.join(root, file_name), "r", encoding="utf-8") as f:
+                        content = f.read()
+                except (UnicodeDecodeError, OSError):
+                    continue
+                start = 0
+                while start < len(content):
+                    chunks.append(content[start:start + chunk_size])
+                    start += chunk_size - chunk_overlap
+    return chunks
+
+
+def bench_local(args):
+    os.environ["EMBEDDING_BACKEND"] = "local"
+    os.environ["EMBEDDING_LOCAL_THREADS"] = str(args.threads)
+
+    from app.utils import embeddor
+
+    chunks = sample_chunks()[:args.limit]
+    print(f"{len(chunks)} chunks from the sample repos, {embeddor.embedding_dimensions()} dimensions")
+    start = time.perf_counter()
+    vectors = embeddor.create_embeddings_batch(chunks)
+    elapsed = time.perf_counter() - start
+    print(f"local: {len(vectors)} chunks in {elapsed:.2f}s -> {len(vectors) / elapsed:.1f} chunks/s, "
+          f"{embeddor.backend.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["azure", "local"], default="azure")
+    parser.add_argument("--threads", type=int, default=0, help="torch threads for --backend local (0: all cores)")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rpm", type=float, default=2100)
+    parser.add_argument("--tpm", type=float, default=350000)
+    parser.add_argument("--limit", type=int, default=3000, help="Chunks to embed in the batched run")
+    parser.add_argument("--sequential-limit", type=int, default=200,
+                        help="Chunks to embed one per request (the old path is slow)")
+    args = parser.parse_args()
+    os.environ["EMBEDDING_CACHE_MAX_ENTRIES"] = "0"
+    if args.backend == "local":
+        bench_local(args)
+        return
+
+    server = fake_embeddings.serve(latency=args.latency, rpm=args.rpm, tpm=args.tpm)
+    os.environ["AZURE_OPENAI_ENDPOINT"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ["AZURE_OPENAI_API_KEY"] = "fake"
+    os.environ["EMBEDDING_RPM"] = str(args.rpm)
+    os.environ["EMBEDDING_TPM"] = str(args.tpm)
+
+    from app.utils import embeddor
+
+    chunks = sample_chunks()[:args.limit]
+    print(f"{len(chunks)} chunks from the sample repos")
+
+    subset = chunks[:args.sequential_limit]
+    start = time.perf_counter()
+    for chunk in subset:
+        embeddor.backend.client.embeddings.create(model=embeddor.backend.model, input=chunk)
+    elapsed = time.perf_counter() - start
+    print(f"one chunk per request: {len(subset)} chunks in {elapsed:.2f}s "
+          f"-> {len(subset) / elapsed:.1f} chunks/s (plus the old 0.2s sleep: <5 chunks/s)")
+
+    fake_embeddings.FakeEmbeddingHandler.stats.update(requests=0, throttled=0, inputs=0)
+    start = time.perf_counter()
+    vectors = embeddor.create_embeddings_batch(chunks)
+    elapsed = time.perf_counter() - start
+    stats = fake_embeddings.FakeEmbeddingHandler.stats
+    print(f"batched: {len(vectors)} chunks in {elapsed:.2f}s -> {len(vectors) / elapsed:.1f} chunks/s, "
+          f"{stats['requests']} requests ({stats['throttled']} throttled), limiter {embeddor.backend.rate_limiter.stats()}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Compare recall and search latency of collection layouts before choosing
+QDRANT_QUANTIZATION / EMBEDDING_DIMENSIONS for a deployment.
+
+Embeds chunks of the bundled 'Arman-Shaikh58_*' sample repos with the
+configured backend (or uses --synthetic random vectors), holds some of them
+out as queries, and for every dimension x quantization combination builds a
+scratch collection and measures recall@k against exact float32 search on
+the full-size vectors. Smaller dimensions are Matryoshka truncations of the
+same vectors (first d components, re-normalized), which is what the
+text-embedding-3 `dimensions` parameter returns.
+
+    python scripts/bench_quantization.py --url http://localhost:6333 --dims 3072,1024,256
+
+Run it against a real Qdrant: the in-memory fallback ignores quantization and
+on-disk settings, so only its recall of the truncated variants means anything.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np  # noqa: E402
+from qdrant_client import QdrantClient  # noqa: E402
+from qdrant_client.models import PointStruct, VectorParams, Distance  # noqa: E402
+
+from app.db.qdrant import store  # noqa: E402
+from bench_embeddings import sample_chunks  # noqa: E402
+
+BYTES_PER_DIMENSION = {"none": 4, "scalar": 1, "binary": 1 / 8}
+
+
+def load_vectors(args) -> np.ndarray:
+    if args.synthetic:
+        # Clustered Gaussian data: closer to real embeddings than uniform noise
+        rng = np.random.default_rng(0)
+        centers = rng.normal(size=(64, args.synthetic_dims))
+        labels = rng.integers(0, len(centers), args.synthetic)
+        vectors = centers[labels] + rng.normal(scale=0.6, size=(args.synthetic, args.synthetic_dims))
+    else:
+        from app.utils.embeddor import create_embeddings_batch
+
+        chunks = list(dict.fromkeys(sample_chunks()))[:args.limit]
+        print(f"Embedding {len(chunks)} sample chunks...")
+        vectors = np.asarray(create_embeddings_batch(chunks), dtype=np.float32)
+    return vectors.astype(np.float32)
+
+
+def truncate(vectors: np.ndarray, dims: int) -> np.ndarray:
+    cut = vectors[:, :dims]
+    return cut / np.linalg.norm(cut, axis=1, keepdims=True)
+
+
+def exact_top_k(docs: np.ndarray, queries: np.ndarray, k: int) -> list[set[int]]:
+    scores = queries @ docs.T
+    return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+
+def run_variant(client, docs, queries, truth, dims, quantization, k, oversampling, rescore) -> dict:
+    name = f"bench_quant_{dims}_{quantization}_{uuid.uuid4().hex[:6]}"
+    client.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(size=dims, distance=Distance.COSINE, on_disk=quantization != "none"),
+        quantization_config=store.quantization_config(quantization)
+    )
+    try:
+        client.upload_points(
+            collection_name=name,
+            points=[PointStruct(id=i, vector=vector.tolist()) for i, vector in enumerate(truncate(docs, dims))],
+            batch_size=256,
+            wait=True
+        )
+        params = store.search_params(quantization)
+        if params is not None:
+            params.quantization.oversampling = oversampling
+            params.quantization.rescore = rescore
+
+        hits, latencies = 0, []
+        for query, expected in zip(truncate(queries, dims), truth):
+            start = time.perf_counter()
+            points = client.query_points(
+                collection_name=name, query=query.tolist(), limit=k, search_params=params, with_payload=False
+            ).points
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len(expected & {point.id for point in points})
+    finally:
+        client.delete_collection(collection_name=name)
+
+    latencies.sort()
+    return {
+        "dims": dims,
+        "quantization": quantization,
+        f"recall@{k}": round(hits / (k * len(truth)), 4),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        "ram_bytes_per_vector": int(dims * BYTES_PER_DIMENSION[quantization]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=os.getenv("QDRANT_ENDPOINT") or ":memory:")
+    parser.add_argument("--api-key", default=os.getenv("QDRANT_API_KEY"))
+    parser.add_argument("--dims", default="3072,1536,1024,512,256",
+                        help="Comma-separated dimensions to try (larger than the vectors are skipped)")
+    parser.add_argument("--quantization", default="none,scalar,binary")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100, help="Held-out vectors used as queries")
+    parser.add_argument("--limit", type=int, default=3000, help="Sample chunks to embed")
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument("--no-rescore", action="store_true")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N random vectors instead of embedding chunks")
+    parser.add_argument("--synthetic-dims", type=int, default=3072)
+    args = parser.parse_args()
+
+    vectors = load_vectors(args)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries, docs = vectors[:args.queries], vectors[args.queries:]
+    full_dims = vectors.shape[1]
+    print(f"{len(docs)} documents, {len(queries)} queries, {full_dims} dimensions")
+
+    if args.url == ":memory:":
+        print("No Qdrant URL: using the in-memory client, which ignores quantization settings")
+        client = QdrantClient(":memory:")
+    else:
+        client = QdrantClient(url=args.url, api_key=args.api_key, timeout=120)
+
+    # Ground truth is always exact search on the full-size vectors
+    truth = exact_top_k(docs, queries, args.k)
+    dims_list = [int(d) for d in args.dims.split(",") if int(d) <= full_dims]
+    rows = []
+    for dims in dims_list:
+        for quantization in args.quantization.split(","):
+            row = run_variant(client, docs, queries, truth, dims, quantization.strip(), args.k,
+                              args.oversampling, not args.no_rescore)
+            rows.append(row)
+            print(row)
+
+    print()
+    header = list(rows[0])
+    print(" | ".join(f"{h:>20}" for h in header))
+    for row in rows:
+        print(" | ".join(f"{str(row[h]):>20}" for h in header))
+
+
+if __name__ == "__main__":
+    main()
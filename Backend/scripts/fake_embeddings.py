@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for the Azure OpenAI embeddings endpoint.
+
+Answers POST .../embeddings with deterministic vectors (the same text always
+gets the same vector), simulates request latency and enforces requests- and
+tokens-per-minute limits with 429 + retry-after-ms, the same way Azure does:
+
+    python scripts/fake_embeddings.py --port 8766 --tpm 350000 --rpm 2100
+    AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8766 AZURE_OPENAI_API_KEY=fake uvicorn app.app:app
+"""
+import argparse
+import base64
+import hashlib
+import json
+import math
+import sys
+import threading
+import time
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_vector(text: str, dims: int) -> list[float]:
+    """Deterministic unit vector derived from the text."""
+    raw = array("h", hashlib.shake_256(text.encode("utf-8")).digest(dims * 2))
+    norm = math.sqrt(sum(v * v for v in raw)) or 1.0
+    return [v / norm for v in raw]
+
+
+class Limiter:
+    """Per-minute request/token quota, refilled continuously."""
+
+    def __init__(self, rpm: float, tpm: float):
+        self.rpm, self.tpm = rpm, tpm
+        self.requests, self.tokens = rpm, tpm
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self, tokens: int) -> tuple[bool, float]:
+        with self.lock:
+            now = time.monotonic()
+            elapsed = now - self.updated
+            self.updated = now
+            self.requests = min(self.rpm, self.requests + elapsed * self.rpm / 60)
+            self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / 60)
+            if self.requests >= 1 and self.tokens >= tokens:
+                self.requests -= 1
+                self.tokens -= tokens
+                return True, 0.0
+            wait = max((1 - self.requests) * 60 / self.rpm, (tokens - self.tokens) * 60 / self.tpm)
+            return False, wait
+
+
+class FakeEmbeddingHandler(BaseHTTPRequestHandler):
+    dims = 3072
+    latency = 0.05
+    per_item_latency = 0.0002
+    limiter: Limiter | None = None
+    stats = {"requests": 0, "throttled": 0, "inputs": 0}
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload: dict, headers: dict | None = None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.split("?")[0].endswith("/embeddings"):
+            return self._send(404, {"error": {"message": "Not Found"}})
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        tokens = sum(len(text) // 4 + 1 for text in inputs)
+        dims = int(body.get("dimensions") or self.dims)
+
+        with self.lock:
+            self.stats["requests"] += 1
+        limiter = self.limiter
+        if limiter is not None:
+            allowed, wait = limiter.take(tokens)
+            if not allowed:
+                with self.lock:
+                    self.stats["throttled"] += 1
+                return self._send(429, {"error": {"code": "429", "message": "Rate limit exceeded"}},
+                                  headers={"retry-after-ms": str(int(wait * 1000) + 1),
+                                           "retry-after": str(math.ceil(wait))})
+
+        time.sleep(self.latency + self.per_item_latency * len(inputs))
+        data = []
+        for i, text in enumerate(inputs):
+            vector = fake_vector(text, dims)
+            if body.get("encoding_format") == "base64":
+                vector = base64.b64encode(array("f", vector).tobytes()).decode()
+            data.append({"object": "embedding", "index": i, "embedding": vector})
+        with self.lock:
+            self.stats["inputs"] += len(inputs)
+
+        headers = {}
+        if limiter is not None:
+            headers = {
+                "x-ratelimit-remaining-requests": str(int(limiter.requests)),
+                "x-ratelimit-remaining-tokens": str(int(limiter.tokens)),
+            }
+        self._send(200, {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "text-embedding-3-large"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }, headers=headers)
+
+
+def serve(port: int = 0, dims: int = 3072, latency: float = 0.05, per_item_latency: float = 0.0002,
+          rpm: float | None = None, tpm: float | None = None) -> ThreadingHTTPServer:
+    """
+    Start the fake endpoint on a background thread.
+    Returns the server; point AZURE_OPENAI_ENDPOINT at http://127.0.0.1:{server.server_port}
+    """
+    FakeEmbeddingHandler.dims = dims
+    FakeEmbeddingHandler.latency = latency
+    FakeEmbeddingHandler.per_item_latency = per_item_latency
+    FakeEmbeddingHandler.limiter = Limiter(rpm, tpm) if rpm and tpm else None
+    FakeEmbeddingHandler.stats = {"requests": 0, "throttled": 0, "inputs": 0}
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeEmbeddingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--dims", type=int, default=3072)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per request")
+    parser.add_argument("--per-item-latency", type=float, default=0.0002, help="Extra seconds per input")
+    parser.add_argument("--rpm", type=float, help="Requests per minute before answering 429")
+    parser.add_argument("--tpm", type=float, help="Tokens per minute before answering 429")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.dims, args.latency, args.per_item_latency, args.rpm, args.tpm)
+    print(f"Fake embeddings endpoint on http://127.0.0.1:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
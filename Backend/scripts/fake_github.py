@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the parts of the GitHub API used by ingestion.
+
+Serves the bundled 'Arman-Shaikh58_*' sample repos so ingestion can run with
+no network:
+
+    python scripts/fake_github.py --port 8765
+    GITHUB_API_URL=http://127.0.0.1:8765 uvicorn app.app:app
+
+Routes:
+    GET /repos/{owner}/{repo}                      repo info (default_branch)
+    GET /repos/{owner}/{repo}/commits/{ref}        commit and tree SHA of the ref
+    GET /repos/{owner}/{repo}/tarball/{ref}        gzipped tarball of the repo
+    GET /repos/{owner}/{repo}/git/trees/{ref}      recursive tree listing
+    GET /repos/{owner}/{repo}/git/blobs/{sha}      raw blob download
+
+--fail-rate makes a fraction of requests answer 503/429 (with Retry-After) to
+exercise the fetcher's retry path; --latency adds a per-request delay.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import tarfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BRANCH = "main"
+
+
+def discover_repos(fixtures_dir: str = BACKEND_DIR) -> dict:
+    """Map (owner, repo) to the local directory of every 'owner_repo' fixture."""
+    repos = {}
+    for entry in sorted(os.listdir(fixtures_dir)):
+        full = os.path.join(fixtures_dir, entry)
+        if entry.startswith("Arman-Shaikh58_") and os.path.isdir(full):
+            owner, repo = entry.split("_", 1)
+            repos[(owner, repo)] = full
+    return repos
+
+
+def list_files(repo_dir: str) -> list[str]:
+    """All files of a fixture repo as sorted posix paths relative to its root."""
+    paths = []
+    for root, dirs, files in os.walk(repo_dir):
+        for file_name in files:
+            rel = os.path.relpath(os.path.join(root, file_name), repo_dir)
+            paths.append(rel.replace(os.sep, "/"))
+    return sorted(paths)
+
+
+def fake_commit_sha(repo_dir: str) -> str:
+    """Stable stand-in commit id derived from the fixture contents."""
+    digest = hashlib.sha1()
+    for rel in list_files(repo_dir):
+        digest.update(rel.encode())
+        with open(os.path.join(repo_dir, rel), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def git_blob_sha(data: bytes) -> str:
+    """SHA-1 of a blob exactly as git computes it."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def build_tree(repo_dir: str) -> dict:
+    """Recursive git trees API payload plus a sha -> path map for blob lookups."""
+    entries, blobs = [], {}
+    for rel in list_files(repo_dir):
+        with open(os.path.join(repo_dir, rel), "rb") as f:
+            data = f.read()
+        sha = git_blob_sha(data)
+        blobs[sha] = rel
+        entries.append({"path": rel, "mode": "100644", "type": "blob", "sha": sha, "size": len(data)})
+    tree_sha = hashlib.sha1("".join(e["sha"] + e["path"] for e in entries).encode()).hexdigest()
+    return {"sha": tree_sha, "tree": entries, "truncated": False, "blobs": blobs}
+
+
+def build_tarball(owner: str, repo: str, repo_dir: str) -> bytes:
+    """Build a tarball laid out like GitHub's: '<owner>-<repo>-<sha7>/...'."""
+    sha = fake_commit_sha(repo_dir)
+    prefix = f"{owner}-{repo}-{sha[:7]}"
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz", format=tarfile.PAX_FORMAT,
+                      pax_headers={"comment": sha}) as tar:
+        for rel in list_files(repo_dir):
+            tar.add(os.path.join(repo_dir, rel), arcname=f"{prefix}/{rel}", recursive=False)
+    return buf.getvalue()
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    repos: dict = {}
+    tarballs: dict = {}
+    trees: dict = {}
+    fail_rate = 0.0
+    latency = 0.0
+    request_count = 0
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json", headers: dict | None = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, payload, status: int = 200):
+        self._send(status, json.dumps(payload).encode())
+
+    def _not_found(self):
+        self._json({"message": "Not Found"}, status=404)
+
+    def do_GET(self):
+        with FakeGitHubHandler.lock:
+            FakeGitHubHandler.request_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_rate and random.random() < self.fail_rate:
+            if random.random() < 0.5:
+                return self._send(429, b'{"message": "rate limited"}', headers={"Retry-After": "1"})
+            return self._send(503, b'{"message": "unavailable"}')
+        url = urlparse(self.path)
+        parts = [unquote(p) for p in url.path.strip("/").split("/")]
+
+        if parts[0] != "repos" or len(parts) < 3:
+            return self._not_found()
+
+        key = (parts[1], parts[2])
+        repo_dir = self.repos.get(key)
+        if repo_dir is None:
+            return self._not_found()
+        rest = parts[3:]
+
+        if not rest:
+            return self._json({"name": key[1], "full_name": f"{key[0]}/{key[1]}", "default_branch": DEFAULT_BRANCH})
+        if rest[0] == "commits":
+            if key not in self.trees:
+                self.trees[key] = build_tree(repo_dir)
+            return self._json({"sha": fake_commit_sha(repo_dir), "commit": {"tree": {"sha": self.trees[key]["sha"]}}})
+        if rest[0] == "tarball":
+            if key not in self.tarballs:
+                self.tarballs[key] = build_tarball(key[0], key[1], repo_dir)
+            return self._send(200, self.tarballs[key], content_type="application/x-gzip")
+        if rest[0] == "git" and len(rest) == 3:
+            if key not in self.trees:
+                self.trees[key] = build_tree(repo_dir)
+            tree = self.trees[key]
+            if rest[1] == "trees":
+                return self._json({k: v for k, v in tree.items() if k != "blobs"})
+            if rest[1] == "blobs" and rest[2] in tree["blobs"]:
+                with open(os.path.join(repo_dir, tree["blobs"][rest[2]]), "rb") as f:
+                    return self._send(200, f.read(), content_type="application/vnd.github.raw")
+        return self._not_found()
+
+
+def serve(port: int = 0, fixtures_dir: str = BACKEND_DIR, fail_rate: float = 0.0,
+          latency: float = 0.0) -> ThreadingHTTPServer:
+    """
+    Start the stand-in server on a background thread.
+    Returns the server; its base URL is http://127.0.0.1:{server.server_port}
+    """
+    FakeGitHubHandler.repos = discover_repos(fixtures_dir)
+    FakeGitHubHandler.tarballs = {}
+    FakeGitHubHandler.trees = {}
+    FakeGitHubHandler.fail_rate = fail_rate
+    FakeGitHubHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeGitHubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", default=BACKEND_DIR, help="Directory holding the owner_repo sample repos")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503/429")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of delay added to every request")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.fixtures, args.fail_rate, args.latency)
+    print(f"Fake GitHub API on http://127.0.0.1:{server.server_port}")
+    for owner, repo in FakeGitHubHandler.repos:
+        print(f"  {owner}/{repo}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
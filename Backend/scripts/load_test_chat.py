@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Load-test /api/chat offline: the old blocking handler versus the async one.
+
+Both apps run under uvicorn in this process with the same fakes: a chat model
+that takes --latency seconds per answer (time.sleep when called
+synchronously, asyncio.sleep when awaited) and an in-memory topics
+collection. The "sync" app is the previous handler shape - a plain `def`
+calling executor.invoke, so every in-flight request holds one of Starlette's
+threadpool threads (40 by default). The "async" app is app.api.chat's router
+as shipped, awaiting executor.ainvoke.
+
+    python scripts/load_test_chat.py --latency 1 --concurrency 10,50,200 --requests 400
+
+Throughput of the sync app flattens at threadpool size / latency; the async
+app keeps scaling with concurrency.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Nothing below talks to Azure, Gemini or MongoDB; the clients just need settings to construct
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "http://127.0.0.1:9")
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "fake")
+os.environ.setdefault("GOOGLE_API_KEY", "fake")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from bson import ObjectId  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from langchain_core.messages import AIMessage, AIMessageChunk  # noqa: E402
+from langchain_core.outputs import ChatGenerationChunk  # noqa: E402
+
+import app.api.chat as chat  # noqa: E402
+from app.services.llm.executor import build_agent_executor  # noqa: E402
+from bench_agent import FakeToolLLM  # noqa: E402
+
+
+class SlowLLM(FakeToolLLM):
+    """Answers after `latency` seconds, blocking a thread only when called synchronously."""
+
+    latency: float = 1.0
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        yield ChatGenerationChunk(message=AIMessageChunk(content=next(self.messages).content))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        yield ChatGenerationChunk(message=AIMessageChunk(content=next(self.messages).content))
+
+
+class FakeTopics:
+    """Just enough of a topics collection for new-topic requests."""
+
+    def __init__(self):
+        self.docs = {}
+        self._lock = threading.Lock()
+
+    def insert_one(self, doc):
+        with self._lock:
+            doc["_id"] = ObjectId()
+            self.docs[doc["_id"]] = doc
+        return type("InsertOneResult", (), {"inserted_id": doc["_id"]})()
+
+
+class FakeAsyncTopics(FakeTopics):
+    async def insert_one(self, doc):
+        return FakeTopics.insert_one(self, doc)
+
+
+def sync_app(executor, topics: FakeTopics) -> FastAPI:
+    """The handler as it was before the async path: blocking calls in a threadpool thread."""
+    app = FastAPI()
+
+    @app.post("/api/chat/{owner}/{repo_name}/{topic_id}")
+    def chat_about_repo(owner: str, repo_name: str, topic_id: str, query: str, use_cache: bool = True):
+        raw_res = executor.invoke({
+            "query": query,
+            "conversation": [],
+            "collection_name": f"{owner}_{repo_name}",
+            "owner_repo": owner,
+        })
+        answer = raw_res.get("output", str(raw_res))
+        result = topics.insert_one({"owner": owner, "repo_name": repo_name, "topic_name": query[:50],
+                                    "messages": [{"role": "human", "content": query},
+                                                 {"role": "ai", "content": answer}]})
+        return {"topic_id": str(result.inserted_id), "response": answer}
+
+    return app
+
+
+def async_app(executor, topics: FakeAsyncTopics) -> FastAPI:
+    chat.get_agent_executor = lambda: executor
+    chat.async_topics_collection = topics
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/api/chat")
+    return app
+
+
+def serve(app: FastAPI, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning",
+                                           backlog=4096, timeout_keep_alive=300))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def hammer(port: int, requests: int, concurrency: int) -> dict:
+    latencies, errors = [], 0
+    gate = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=300) as client:
+        async def one(i: int):
+            nonlocal errors
+            async with gate:
+                start = time.perf_counter()
+                try:
+                    resp = await client.post("/api/chat/owner/repo/new",
+                                             params={"query": f"question {i}", "use_cache": "false"})
+                except httpx.TransportError:
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - start)
+                errors += resp.status_code != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "req_per_second": round(requests / elapsed, 1),
+        "p50_s": round(statistics.median(latencies), 3),
+        "p95_s": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=1.0, help="Seconds the fake LLM takes per answer")
+    parser.add_argument("--concurrency", default="10,50,200")
+    parser.add_argument("--requests", type=int, default=400, help="Requests per run")
+    parser.add_argument("--port", type=int, default=8790)
+    args = parser.parse_args()
+
+    answers = itertools.repeat(AIMessage(content="It runs with uvicorn."))
+    executor = build_agent_executor(SlowLLM(messages=answers, latency=args.latency), verbose=False)
+    servers = {
+        "sync": serve(sync_app(executor, FakeTopics()), args.port),
+        "async": serve(async_app(executor, FakeAsyncTopics()), args.port + 1),
+    }
+
+    rows = []
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        for offset, name in enumerate(servers):
+            row = {"path": name, **asyncio.run(hammer(args.port + offset, args.requests, concurrency))}
+            rows.append(row)
+            print(row)
+
+    print()
+    header = list(rows[0])
+    print(" | ".join(f"{h:>14}" for h in header))
+    for row in rows:
+        print(" | ".join(f"{str(row[h]):>14}" for h in header))
+    for server in servers.values():
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+One-off migration of topics to the flat message schema.
+
+Topics used to get each exchange appended as one [human, ai] array, so their
+`messages` field is a list of lists. This rewrites every such topic to one
+{role, content} element per message and converts the conversation summary
+counter (`summarized_turns`, in array elements) to `summarized_messages`.
+
+    python scripts/migrate_flat_messages.py --dry-run
+    python scripts/migrate_flat_messages.py --batch-size 500
+
+A topic that gets a new message while it is being migrated is skipped (the
+rewrite only applies if the array is still the size it was read at); run the
+script again to pick it up. Already flat topics are left alone, so reruns are
+safe.
+"""
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from pymongo import UpdateOne  # noqa: E402
+
+from app.db.mongoDB.mongo import topics_collection  # noqa: E402
+from app.services.llm.memory import normalize_messages  # noqa: E402
+
+NEEDS_MIGRATION = {"$or": [
+    {"messages": {"$elemMatch": {"$type": "array"}}},
+    {"summarized_turns": {"$exists": True}},
+]}
+
+
+def flat_update(topic: dict) -> UpdateOne:
+    elements = topic.get("messages", [])
+    update = {"$set": {"messages": normalize_messages(elements)}}
+    if "summarized_turns" in topic:
+        update["$set"]["summarized_messages"] = len(normalize_messages(elements[:topic["summarized_turns"]]))
+        update["$unset"] = {"summarized_turns": ""}
+    return UpdateOne({"_id": topic["_id"], "messages": {"$size": len(elements)}}, update)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=200, help="Topics rewritten per bulk write")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the topics that need migrating")
+    args = parser.parse_args()
+
+    if topics_collection is None:
+        sys.exit("MongoDB is not configured (MONGODB_CONNECTION_STRING)")
+
+    pending = topics_collection.count_documents(NEEDS_MIGRATION)
+    print(f"{pending} topic(s) to migrate")
+    if args.dry_run or not pending:
+        return
+
+    migrated = skipped = 0
+    batch = []
+
+    def flush():
+        nonlocal migrated, skipped
+        if batch:
+            result = topics_collection.bulk_write(batch, ordered=False)
+            migrated += result.modified_count
+            skipped += len(batch) - result.matched_count
+            batch.clear()
+
+    cursor = topics_collection.find(NEEDS_MIGRATION, {"messages": 1, "summarized_turns": 1})
+    for topic in cursor:
+        batch.append(flat_update(topic))
+        if len(batch) >= args.batch_size:
+            flush()
+            print(f"  {migrated} migrated")
+    flush()
+    print(f"Done: {migrated} migrated, {skipped} changed while migrating (run again to retry)")
+
+
+if __name__ == "__main__":
+    main()
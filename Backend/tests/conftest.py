@@ -0,0 +1,200 @@
+"""
+Shared setup: ingestion runs against scripts/fake_github.py and
+scripts/fake_embeddings.py, with the local vector store and every repo,
+index and cache under a temporary directory. The environment is set here,
+before any app module reads app.core.config, so a local .env can't point
+the tests at real services. Run from Backend/:
+
+    uv run --with pytest --with mongomock pytest
+"""
+import itertools
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "scripts"))
+
+import fake_embeddings  # noqa: E402
+import fake_github  # noqa: E402
+
+WORK_DIR = tempfile.mkdtemp(prefix="gitdocs-tests-")
+FIXTURES_DIR = os.path.join(WORK_DIR, "fixtures")
+OWNER = "Arman-Shaikh58"
+
+github_server = fake_github.serve(0, fixtures_dir=BACKEND_DIR)
+embeddings_server = fake_embeddings.serve(0, dims=64, latency=0, per_item_latency=0)
+
+os.environ.update({
+    "GITHUB_API_URL": f"http://127.0.0.1:{github_server.server_port}",
+    "GITHUB_TOKEN": "",
+    "GITHUB_INGEST_MODE": "archive",
+    "AZURE_OPENAI_ENDPOINT": f"http://127.0.0.1:{embeddings_server.server_port}",
+    "AZURE_OPENAI_API_KEY": "fake",
+    "GOOGLE_API_KEY": "fake",
+    "EMBEDDING_BACKEND": "azure",
+    "EMBEDDING_DIMENSIONS": "64",
+    "EMBEDDING_CACHE_MAX_ENTRIES": "0",
+    # The fake endpoint has no quota; keep the client's rate limiter out of the way
+    "EMBEDDING_RPM": "1000000",
+    "EMBEDDING_TPM": "1000000000",
+    "VECTOR_STORE": "local",
+    "MONGODB_CONNECTION_STRING": "",
+    "REPOS_DIR": os.path.join(WORK_DIR, "Repos"),
+    "INDEX_DIR": os.path.join(WORK_DIR, "Indexes"),
+    "INGEST_BATCH_LINGER": "0.05",
+})
+
+SAMPLE_FILES = {
+    "app/main.py": (
+        "import os\n"
+        "\n"
+        "\n"
+        "def greet(name):\n"
+        "    \"\"\"Say hello.\"\"\"\n"
+        "    return f\"Hello, {name}\"\n"
+        "\n"
+        "\n"
+        "class Greeter:\n"
+        "    def __init__(self, prefix):\n"
+        "        self.prefix = prefix\n"
+        "\n"
+        "    def welcome(self, name):\n"
+        "        return self.prefix + greet(name)\n"
+    ),
+    "app/util.js": (
+        "export function formatTotal(items) {\n"
+        "  return items.reduce((sum, item) => sum + item.price, 0).toFixed(2)\n"
+        "}\n"
+    ),
+    "README.md": "# Sample\n\nA tiny repository served by the fake GitHub API.\n\n## Usage\n\nRun greet.\n",
+    "docs/notes.txt": "Deployment notes: the quarterly rollout checklist lives here.\n",
+    "node_modules/left-pad/index.js": "module.exports = function leftPad() {}\n",
+    "assets/logo.png": "\x89PNG not really an image\n",
+}
+# What ingestion keeps of SAMPLE_FILES (should_skip drops node_modules and images)
+SAMPLE_INGESTED = ["README.md", "app/main.py", "app/util.js", "docs/notes.txt"]
+
+_names = itertools.count(1)
+
+
+class FixtureRepo:
+    """A repo served by the fake GitHub API from a directory the test can edit."""
+
+    def __init__(self, files: dict[str, str]):
+        self.owner = OWNER
+        self.repo = f"sample{next(_names)}"
+        self.repo_key = f"{self.owner}_{self.repo}"
+        self.dir = os.path.join(FIXTURES_DIR, self.repo_key)
+        for rel_path, content in files.items():
+            self.write(rel_path, content)
+        fake_github.FakeGitHubHandler.repos[(self.owner, self.repo)] = self.dir
+
+    def _changed(self):
+        # The fake server caches each repo's tree and tarball
+        fake_github.FakeGitHubHandler.trees.pop((self.owner, self.repo), None)
+        fake_github.FakeGitHubHandler.tarballs.pop((self.owner, self.repo), None)
+
+    def write(self, rel_path: str, content: str):
+        path = os.path.join(self.dir, *rel_path.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        self._changed()
+
+    def remove(self, rel_path: str):
+        os.remove(os.path.join(self.dir, *rel_path.split("/")))
+        self._changed()
+
+    def local_path(self, rel_path: str) -> str:
+        """Where ingestion stores the file."""
+        return os.path.join(os.environ["REPOS_DIR"], self.repo_key, *rel_path.split("/"))
+
+
+@pytest.fixture
+def github_repo() -> FixtureRepo:
+    """A fresh copy of SAMPLE_FILES under a repo name no other test uses."""
+    return FixtureRepo(SAMPLE_FILES)
+
+
+class AsyncCursor:
+    """pymongo's AsyncCursor over a mongomock cursor: chainable modifiers, async to_list()."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        def modify(*args, **kwargs):
+            self._cursor = getattr(self._cursor, name)(*args, **kwargs)
+            return self
+        return modify
+
+    async def to_list(self, length=None):
+        docs = list(self._cursor)
+        return docs if length is None else docs[:length]
+
+
+class AsyncCollection:
+    """
+    The parts of pymongo's AsyncCollection the app uses, over a mongomock
+    collection. As in pymongo, find() returns a cursor right away while
+    aggregate() is a coroutine that returns one; every other method is a
+    coroutine returning what the sync call returns.
+    """
+
+    def __init__(self, collection):
+        self.sync = collection
+
+    def find(self, *args, **kwargs) -> AsyncCursor:
+        return AsyncCursor(self.sync.find(*args, **kwargs))
+
+    async def aggregate(self, pipeline, **kwargs) -> AsyncCursor:
+        return AsyncCursor(iter(self.sync.aggregate(pipeline, **kwargs)))
+
+    def __getattr__(self, name):
+        method = getattr(self.sync, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+
+@pytest.fixture
+def mongo_db():
+    """A fresh in-memory MongoDB database (skips the test when mongomock isn't installed)."""
+    mongomock = pytest.importorskip("mongomock")
+    return mongomock.MongoClient()["test"]
+
+
+class FailingConnection:
+    """Passes statements through to SQLite, failing the first one that starts with `prefix`."""
+
+    def __init__(self, conn: sqlite3.Connection, prefix: str):
+        self.conn, self.prefix = conn, prefix
+
+    def _check(self, sql: str):
+        if self.prefix and sql.lstrip().startswith(self.prefix):
+            self.prefix = None
+            raise sqlite3.OperationalError("disk I/O error")
+
+    def execute(self, sql, *args):
+        self._check(sql)
+        return self.conn.execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        self._check(sql)
+        return self.conn.executemany(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+def pytest_unconfigure(config):
+    github_server.shutdown()
+    embeddings_server.shutdown()
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
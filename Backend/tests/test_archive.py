@@ -0,0 +1,52 @@
+import os
+
+import pytest
+from conftest import SAMPLE_INGESTED
+
+from app.services.github.archive import ArchiveUnavailable, _safe_relpath, fetch_archive
+from app.services.ingestion.progress import IngestProgress
+
+
+@pytest.mark.parametrize("member_name, expected", [
+    ("owner-repo-abc1234/src/main.py", os.path.join("src", "main.py")),
+    ("owner-repo-abc1234/README.md", "README.md"),
+    ("owner-repo-abc1234/a/./b.py", os.path.join("a", "b.py")),
+    ("owner-repo-abc1234/", None),
+    ("owner-repo-abc1234", None),
+    ("owner-repo-abc1234/../escape.py", None),
+    ("owner-repo-abc1234/a/../../escape.py", None),
+    ("owner-repo-abc1234//etc/passwd", None),
+])
+def test_safe_relpath(member_name, expected):
+    assert _safe_relpath(member_name) == expected
+
+
+def test_fetch_archive_extracts_kept_files(github_repo, tmp_path):
+    local_dir = str(tmp_path / "repo")
+    seen = {}
+    progress = IngestProgress()
+    result = fetch_archive(github_repo.owner, github_repo.repo, "main", local_dir, progress=progress,
+                           on_file=lambda rel_path, data: seen.setdefault(rel_path, data))
+
+    assert sorted(result["files"]) == SAMPLE_INGESTED
+    assert sorted(seen) == SAMPLE_INGESTED
+    assert result["bytes"] == sum(len(data) for data in seen.values())
+    assert result["commit_sha"]
+    for rel_path in SAMPLE_INGESTED:
+        with open(os.path.join(local_dir, *rel_path.split("/")), "rb") as f:
+            assert f.read() == seen[rel_path]
+    assert not os.path.exists(os.path.join(local_dir, "node_modules"))
+    assert not os.path.exists(f"{local_dir}.partial")
+    assert progress.snapshot()["files_fetched"] == len(SAMPLE_INGESTED)
+
+
+def test_missing_archive_leaves_existing_copy(github_repo, tmp_path):
+    local_dir = tmp_path / "repo"
+    local_dir.mkdir()
+    (local_dir / "kept.txt").write_text("previous download")
+
+    with pytest.raises(ArchiveUnavailable):
+        fetch_archive(github_repo.owner, "no-such-repo", "main", str(local_dir))
+
+    assert (local_dir / "kept.txt").read_text() == "previous download"
+    assert not os.path.exists(f"{local_dir}.partial")
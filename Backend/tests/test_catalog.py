@@ -0,0 +1,114 @@
+import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.services.ingestion import catalog
+from app.services.ingestion.catalog import (_listing_index, ensure_repo_catalog, mark_repo, record_repo,
+                                            serialize_repo)
+
+
+@pytest.mark.parametrize("owner, status, sort, expected", [
+    (None, None, "updated_at", ["updated_at", "repo_owner", "repo_name"]),
+    (None, None, "name", ["repo_owner", "repo_name"]),
+    ("octo", None, "added_at", ["repo_owner", "added_at", "repo_name"]),
+    ("octo", None, "name", ["repo_owner", "repo_name"]),
+    (None, "ready", "updated_at", ["status", "updated_at", "repo_owner", "repo_name"]),
+    ("octo", "ready", "name", ["status", "repo_owner", "repo_name"]),
+])
+def test_listing_index(owner, status, sort, expected):
+    assert _listing_index(owner, status, sort) == expected
+
+
+def test_serialize_repo():
+    added = datetime.datetime(2024, 1, 2, 3, 4, 5)
+    doc = {"_id": "x", "repo_owner": "octo", "repo_name": "hello", "status": "ready", "files": 3, "added_at": added}
+    entry = serialize_repo(doc)
+    assert entry["owner"] == "octo" and entry["repo"] == "hello"
+    assert entry["added_at"] == "2024-01-02T03:04:05"
+    assert entry["updated_at"] is None
+    assert "_id" not in entry
+
+
+@pytest.fixture
+def repos_collection(monkeypatch):
+    mongomock = pytest.importorskip("mongomock")
+    collection = mongomock.MongoClient()["test"]["repos_collection"]
+    monkeypatch.setattr(catalog, "repos_collection", collection)
+    return collection
+
+
+def test_mark_and_record_repo(repos_collection):
+    mark_repo("octo", "hello", "main", "ingesting", job_id="job1")
+    entry = repos_collection.find_one({"repo_owner": "octo", "repo_name": "hello"})
+    assert entry["status"] == "ingesting"
+    assert entry["last_job_id"] == "job1"
+    added_at = entry["added_at"]
+
+    summary = {"commit_sha": "c1", "tree_sha": "t1", "mode": "full", "timings": {"total_seconds": 1.5},
+               "stats": {"files": 4, "chunks": 9, "bytes": 100, "lines": 20, "embedding_model": "m"}}
+    record_repo("octo", "hello", "main", summary, job_id="job1")
+    mark_repo("octo", "hello", "main", "failed", job_id="job2", error="boom")
+
+    assert repos_collection.count_documents({}) == 1
+    entry = repos_collection.find_one({"repo_owner": "octo", "repo_name": "hello"})
+    # A failed later run keeps the stats of the last successful one
+    assert entry["status"] == "failed" and entry["error"] == "boom"
+    assert entry["commit_sha"] == "c1" and entry["chunks"] == 9
+    assert entry["timings"] == {"total_seconds": 1.5}
+    assert entry["added_at"] == added_at
+    assert entry["last_job_id"] == "job2"
+
+
+def _legacy_id(year: int) -> ObjectId:
+    return ObjectId.from_datetime(datetime.datetime(year, 1, 1, tzinfo=datetime.timezone.utc))
+
+
+def test_ensure_repo_catalog_collapses_duplicates(repos_collection):
+    # Every fetch used to insert another {repo_name, repo_owner}
+    repos_collection.insert_many([
+        {"_id": _legacy_id(2022), "repo_owner": "octo", "repo_name": "hello"},
+        {"_id": _legacy_id(2023), "repo_owner": "octo", "repo_name": "hello"},
+        {"_id": _legacy_id(2024), "repo_owner": "octo", "repo_name": "hello"},
+        {"_id": _legacy_id(2021), "repo_owner": "octo", "repo_name": "other"},
+    ])
+    ensure_repo_catalog()
+
+    entries = list(repos_collection.find({}, sort=[("repo_name", 1)]))
+    # The oldest entry of each repo is kept
+    assert [(e["repo_name"], e["_id"]) for e in entries] == [("hello", _legacy_id(2022)), ("other", _legacy_id(2021))]
+    assert all(e["status"] == "ready" for e in entries)
+    unique = repos_collection.index_information()["repo_owner_1_repo_name_1"]
+    assert unique.get("unique")
+    # Running it again on a clean catalogue changes nothing
+    ensure_repo_catalog()
+    assert list(repos_collection.find({}, sort=[("repo_name", 1)])) == entries
+
+
+def test_ensure_repo_catalog_backfills_dates(repos_collection):
+    updated = datetime.datetime(2024, 5, 6, 7, 8, 9)
+    repos_collection.insert_many([
+        {"_id": _legacy_id(2021), "repo_owner": "octo", "repo_name": "missing"},
+        {"_id": _legacy_id(2022), "repo_owner": "octo", "repo_name": "strings",
+         "added_at": "2023-03-04T05:06:07", "updated_at": "2024-05-06T07:08:09+00:00"},
+        {"_id": _legacy_id(2023), "repo_owner": "octo", "repo_name": "garbled", "added_at": "last tuesday",
+         "updated_at": updated, "status": "failed"},
+    ])
+    ensure_repo_catalog()
+
+    entries = {e["repo_name"]: e for e in repos_collection.find()}
+
+    def naive(value):
+        return value.replace(tzinfo=None)
+
+    assert naive(entries["missing"]["added_at"]) == datetime.datetime(2021, 1, 1)
+    assert entries["missing"]["updated_at"] == entries["missing"]["added_at"]
+    assert entries["strings"]["added_at"] == datetime.datetime(2023, 3, 4, 5, 6, 7)
+    assert naive(entries["strings"]["updated_at"]) == updated
+    # An unreadable string falls back to the ObjectId time; a stored date is kept
+    assert naive(entries["garbled"]["added_at"]) == datetime.datetime(2023, 1, 1)
+    assert entries["garbled"]["updated_at"] == updated
+    assert entries["garbled"]["status"] == "failed"
+    for entry in entries.values():
+        assert isinstance(entry["added_at"], datetime.datetime)
+        assert isinstance(entry["updated_at"], datetime.datetime)
@@ -0,0 +1,66 @@
+import pytest
+from bson import ObjectId
+from conftest import AsyncCollection
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import chat
+
+
+@pytest.fixture
+def topics(mongo_db, monkeypatch):
+    collection = mongo_db["topics_collection"]
+    monkeypatch.setattr(chat, "async_topics_collection", AsyncCollection(collection))
+    return collection
+
+
+@pytest.fixture
+def client(topics):
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/api/chat")
+    return TestClient(app)
+
+
+def _topic(topics, count: int) -> str:
+    messages = [{"role": "human" if i % 2 == 0 else "ai", "content": f"message {i}"} for i in range(count)]
+    return str(topics.insert_one({
+        "owner": "octo", "repo_name": "hello", "topic_name": "Setup", "messages": messages
+    }).inserted_id)
+
+
+def _contents(body: dict) -> list[str]:
+    return [message["content"] for message in body["messages"]]
+
+
+def test_messages_are_paged_newest_first(client, topics):
+    topic_id = _topic(topics, 25)
+    url = f"/api/chat/octo/hello/{topic_id}/messages"
+
+    first = client.get(url, params={"limit": 10})
+    assert first.status_code == 200
+    body = first.json()
+    assert body["topic_name"] == "Setup"
+    assert body["total"] == 25
+    assert _contents(body) == [f"message {i}" for i in range(15, 25)]
+    assert body["next_before"] == 15
+
+    body = client.get(url, params={"limit": 10, "before": body["next_before"]}).json()
+    assert _contents(body) == [f"message {i}" for i in range(5, 15)]
+    assert body["next_before"] == 5
+
+    body = client.get(url, params={"limit": 10, "before": body["next_before"]}).json()
+    assert _contents(body) == [f"message {i}" for i in range(5)]
+    assert body["next_before"] is None
+
+
+def test_topic_without_messages(client, topics):
+    topic_id = str(topics.insert_one({"owner": "octo", "repo_name": "hello", "topic_name": "Empty"}).inserted_id)
+    body = client.get(f"/api/chat/octo/hello/{topic_id}/messages").json()
+    assert body["messages"] == [] and body["total"] == 0 and body["next_before"] is None
+
+
+def test_unknown_and_invalid_topics(client, topics):
+    topic_id = _topic(topics, 2)
+    assert client.get(f"/api/chat/octo/other/{topic_id}/messages").status_code == 404
+    assert client.get(f"/api/chat/octo/hello/{ObjectId()}/messages").status_code == 404
+    assert client.get("/api/chat/octo/hello/not-an-id/messages").status_code == 400
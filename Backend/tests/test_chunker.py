@@ -0,0 +1,59 @@
+import hashlib
+
+from app.utils.chunker import chunk_text, detect_language
+
+FUNCTIONS = "import os\n\n\n" + "".join(
+    f"def func_{i}(value):\n    total = value * {i}\n    return total + {i}\n\n\n" for i in range(6)
+)
+
+
+def _spans(chunks: list[dict]) -> list[tuple[int, int]]:
+    return [(chunk["start_line"], chunk["end_line"]) for chunk in chunks]
+
+
+def test_small_file_is_one_chunk():
+    chunks = chunk_text("app/main.py", FUNCTIONS)
+    assert _spans(chunks) == [(1, 33)]
+    assert chunks[0]["language"] == "python"
+    assert chunks[0]["content_hash"] == hashlib.sha256(chunks[0]["text"].encode("utf-8")).hexdigest()
+
+
+def test_python_is_split_on_definitions():
+    chunks = chunk_text("app/main.py", FUNCTIONS, max_tokens=25, overlap_tokens=0)
+    lines = FUNCTIONS.split("\n")
+    assert [lines[chunk["start_line"] - 1] for chunk in chunks[1:]] == [f"def func_{i}(value):" for i in range(6)]
+    assert all(chunk["tokens"] <= 25 for chunk in chunks)
+
+
+def test_markdown_is_split_on_headings():
+    chunks = chunk_text("README.md", "# A\n\ntext a\n\n## B\n\ntext b\n", max_tokens=8, overlap_tokens=0)
+    assert _spans(chunks) == [(1, 4), (5, 7)]
+    assert chunks[1]["text"].startswith("## B")
+
+
+def test_block_without_boundaries_is_cut_with_overlap():
+    text = "\n".join(f"line number {i} with some words" for i in range(300))
+    chunks = chunk_text("notes.txt", text, max_tokens=50, overlap_tokens=10)
+    assert len(chunks) > 1
+    assert all(chunk["tokens"] <= 50 for chunk in chunks)
+    assert chunks[0]["start_line"] == 1 and chunks[-1]["end_line"] == 300
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert previous["start_line"] < chunk["start_line"] <= previous["end_line"]
+
+
+def test_overlong_line_is_split():
+    chunks = chunk_text("minified.py", "x = '" + "ab " * 2000 + "'\n", max_tokens=50)
+    assert len(chunks) > 1
+    assert all(chunk["tokens"] <= 50 for chunk in chunks)
+    assert {(chunk["start_line"], chunk["end_line"]) for chunk in chunks} == {(1, 1)}
+
+
+def test_empty_file_has_no_chunks():
+    assert chunk_text("empty.py", "") == []
+    assert chunk_text("blank.md", "\n\n") == []
+
+
+def test_detect_language():
+    assert detect_language("src/App.TSX") == "typescript"
+    assert detect_language("docs/guide.md") == "markdown"
+    assert detect_language("scripts/run.sh") == "shell"
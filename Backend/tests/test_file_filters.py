@@ -0,0 +1,35 @@
+import pytest
+
+from app.core.config import INGEST_MAX_FILE_BYTES
+from app.utils.file_filters import should_skip
+
+
+@pytest.mark.parametrize("rel_path", [
+    "node_modules/react/index.js",
+    "web/node_modules/react/index.js",
+    ".git/HEAD",
+    "pkg/__pycache__/mod.cpython-311.pyc",
+    ".venv/lib/site.py",
+    "assets/logo.PNG",
+    "docs/manual.pdf",
+    "release.tar",
+    "build\\node_modules\\x.js",
+])
+def test_excluded_paths_are_skipped(rel_path):
+    assert should_skip(rel_path)
+
+
+@pytest.mark.parametrize("rel_path", [
+    "app/main.py",
+    "README.md",
+    "node_modules.md",
+    "src/git/client.ts",
+    ".github/workflows/ci.yml",
+])
+def test_source_files_are_kept(rel_path):
+    assert not should_skip(rel_path, 100)
+
+
+def test_size_limit():
+    assert not should_skip("app/main.py", INGEST_MAX_FILE_BYTES)
+    assert should_skip("app/main.py", INGEST_MAX_FILE_BYTES + 1)
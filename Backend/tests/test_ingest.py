@@ -0,0 +1,160 @@
+import os
+from collections import Counter
+
+import fake_github
+from conftest import SAMPLE_INGESTED
+
+from app.db.lexical.index import get_lexical_index
+from app.db.trigrams.index import get_trigram_index
+from app.db.vector_store import vector_store
+from app.services.github.archive import ArchiveUnavailable
+from app.services.ingestion import ingest, pipeline
+from app.services.ingestion.ingest import refresh_repo
+from app.services.ingestion.manifest import load_manifest
+from app.utils.trigrams import query_trigrams
+
+
+def _lexical_paths(repo_key: str, query: str) -> set[str]:
+    return {hit.payload["path"] for hit in get_lexical_index(repo_key).search(query, limit=20)}
+
+
+def _fail_chunking(monkeypatch, failing_path: str):
+    """Make chunking raise for one file, the way a parser bug would."""
+    chunk_text = pipeline.chunk_text
+
+    def flaky(path, *args, **kwargs):
+        if path == failing_path:
+            raise ValueError("chunker crashed")
+        return chunk_text(path, *args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "chunk_text", flaky)
+
+
+def test_full_ingest_from_tarball(github_repo):
+    summary = refresh_repo(github_repo.owner, github_repo.repo, "main")
+
+    assert summary["mode"] == "full"
+    assert summary["failed"] == []
+    assert summary["changed"] == len(SAMPLE_INGESTED)
+    # The ref came down as one tarball
+    assert (github_repo.owner, github_repo.repo) in fake_github.FakeGitHubHandler.tarballs
+    for rel_path in SAMPLE_INGESTED:
+        assert os.path.isfile(github_repo.local_path(rel_path))
+    assert not os.path.exists(github_repo.local_path("node_modules/left-pad/index.js"))
+    assert not os.path.exists(github_repo.local_path("assets/logo.png"))
+
+    manifest = load_manifest(github_repo.repo_key)
+    assert manifest["tree_sha"] == summary["tree_sha"]
+    assert sorted(manifest["files"]) == SAMPLE_INGESTED
+
+    stats = summary["stats"]
+    assert stats["files"] == len(SAMPLE_INGESTED)
+    assert stats["embedding_dimensions"] == 64
+    assert stats["chunks"] == vector_store.count(github_repo.repo_key) > 0
+    assert _lexical_paths(github_repo.repo_key, "formatTotal") == {"app/util.js"}
+    trigrams = get_trigram_index(github_repo.repo_key)
+    assert trigrams.candidates(query_trigrams("class Greeter")) == ["app/main.py"]
+
+
+def test_full_ingest_from_tree(github_repo, monkeypatch):
+    monkeypatch.setattr(ingest, "GITHUB_INGEST_MODE", "tree")
+    summary = refresh_repo(github_repo.owner, github_repo.repo, "main")
+
+    assert summary["mode"] == "full"
+    assert summary["failed"] == []
+    assert (github_repo.owner, github_repo.repo) not in fake_github.FakeGitHubHandler.tarballs
+    for rel_path in SAMPLE_INGESTED:
+        assert os.path.isfile(github_repo.local_path(rel_path))
+    assert summary["stats"]["chunks"] == vector_store.count(github_repo.repo_key) > 0
+
+
+def test_archive_failing_midway_falls_back_without_resubmitting(github_repo, monkeypatch):
+    fetch_archive = ingest.fetch_archive
+
+    def broken_archive(*args, on_file=None, **kwargs):
+        def deliver(rel_path, data):
+            if len(delivered) == 2:
+                raise ArchiveUnavailable("connection reset mid-stream")
+            delivered.append(rel_path)
+            on_file(rel_path, data)
+        return fetch_archive(*args, on_file=deliver, **kwargs)
+
+    delivered = []
+    submitted = Counter()
+    submit = pipeline.IngestPipeline.submit
+
+    def counting_submit(self, rel_path, data):
+        submitted[rel_path] += 1
+        return submit(self, rel_path, data)
+
+    monkeypatch.setattr(ingest, "fetch_archive", broken_archive)
+    monkeypatch.setattr(pipeline.IngestPipeline, "submit", counting_submit)
+    summary = refresh_repo(github_repo.owner, github_repo.repo, "main")
+
+    assert summary["failed"] == []
+    # The tree fetch wrote every file but only handed over the ones the tarball hadn't
+    assert len(delivered) == 2
+    assert submitted == Counter(SAMPLE_INGESTED)
+    for rel_path in SAMPLE_INGESTED:
+        assert os.path.isfile(github_repo.local_path(rel_path))
+    assert summary["stats"]["files"] == len(SAMPLE_INGESTED)
+    assert summary["stats"]["chunks"] == vector_store.count(github_repo.repo_key) > 0
+
+
+def test_reingest_of_same_tree_is_skipped(github_repo):
+    first = refresh_repo(github_repo.owner, github_repo.repo, "main")
+    second = refresh_repo(github_repo.owner, github_repo.repo, "main")
+
+    assert second["mode"] == "unchanged"
+    assert second["changed"] == 0
+    assert second["stats"]["chunks"] == first["stats"]["chunks"]
+
+
+def test_incremental_reingest(github_repo):
+    refresh_repo(github_repo.owner, github_repo.repo, "main")
+    github_repo.write("app/main.py", "def farewell(name):\n    return f\"Bye, {name}\"\n")
+    github_repo.write("app/config.py", "RETRY_LIMIT = 3\n")
+    github_repo.remove("docs/notes.txt")
+
+    summary = refresh_repo(github_repo.owner, github_repo.repo, "main")
+
+    assert summary["mode"] == "incremental"
+    assert summary["changed"] == 2
+    assert summary["removed"] == 1
+    assert summary["failed"] == []
+    assert not os.path.exists(github_repo.local_path("docs/notes.txt"))
+    with open(github_repo.local_path("app/main.py"), encoding="utf-8") as f:
+        assert "farewell" in f.read()
+
+    repo_key = github_repo.repo_key
+    assert sorted(load_manifest(repo_key)["files"]) == ["README.md", "app/config.py", "app/main.py", "app/util.js"]
+    # Old chunks of changed and removed files are gone, untouched files keep theirs
+    assert _lexical_paths(repo_key, "farewell") == {"app/main.py"}
+    assert _lexical_paths(repo_key, "Greeter") == set()
+    assert _lexical_paths(repo_key, "quarterly rollout") == set()
+    assert _lexical_paths(repo_key, "formatTotal") == {"app/util.js"}
+    assert summary["stats"]["chunks"] == vector_store.count(repo_key) == get_lexical_index(repo_key).count()
+    assert get_trigram_index(repo_key).candidates(query_trigrams("RETRY_LIMIT")) == ["app/config.py"]
+    assert get_trigram_index(repo_key).candidates(query_trigrams("rollout")) == []
+
+
+def test_failed_file_is_retried(github_repo, monkeypatch):
+    _fail_chunking(monkeypatch, "app/util.js")
+    summary = refresh_repo(github_repo.owner, github_repo.repo, "main")
+
+    assert summary["failed"] == ["app/util.js"]
+    manifest = load_manifest(github_repo.repo_key)
+    # No tree SHA: the next refresh can't take the "unchanged" shortcut
+    assert manifest["tree_sha"] is None
+    assert "app/util.js" not in manifest["files"]
+
+    monkeypatch.undo()
+    retry = refresh_repo(github_repo.owner, github_repo.repo, "main")
+
+    assert retry["mode"] == "incremental"
+    assert retry["changed"] == 1
+    assert retry["failed"] == []
+    manifest = load_manifest(github_repo.repo_key)
+    assert manifest["tree_sha"] == retry["tree_sha"]
+    assert sorted(manifest["files"]) == SAMPLE_INGESTED
+    assert _lexical_paths(github_repo.repo_key, "formatTotal") == {"app/util.js"}
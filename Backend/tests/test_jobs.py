@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from conftest import AsyncCollection
+
+from app.services.ingestion import catalog, jobs
+from app.services.ingestion.progress import IngestProgress
+
+
+@pytest.fixture
+def job_db(mongo_db, monkeypatch):
+    """Jobs and catalogue on mongomock, with the indexes resume_jobs creates; jobs are recorded, not run."""
+    monkeypatch.setattr(jobs, "jobs_collection", mongo_db["jobs_collection"])
+    monkeypatch.setattr(jobs, "async_jobs_collection", AsyncCollection(mongo_db["jobs_collection"]))
+    monkeypatch.setattr(catalog, "repos_collection", mongo_db["repos_collection"])
+    started = []
+    monkeypatch.setattr(jobs, "_start", lambda job: started.append(job["_id"]))
+    monkeypatch.setattr(jobs, "_active", {})
+    jobs.resume_jobs()
+    mongo_db.started = started
+    return mongo_db
+
+
+def test_concurrent_submits_share_one_job(job_db):
+    async def submit_twice():
+        return await asyncio.gather(jobs.submit_job("octo", "hello", "main"), jobs.submit_job("octo", "hello", "main"))
+
+    first, second = asyncio.run(submit_twice())
+
+    assert first["_id"] == second["_id"]
+    assert job_db.started == [first["_id"]]
+    assert job_db["jobs_collection"].count_documents({}) == 1
+
+
+def test_job_orphaned_by_another_process_is_superseded(job_db):
+    orphan = asyncio.run(jobs.submit_job("octo", "hello", "main"))
+    job_db["jobs_collection"].update_one({"_id": orphan["_id"]}, {"$set": {"process": "previous"}})
+
+    job = asyncio.run(jobs.submit_job("octo", "hello", "main"))
+
+    assert job["_id"] != orphan["_id"]
+    stored = job_db["jobs_collection"].find_one({"_id": orphan["_id"]})
+    assert stored["status"] == "failed" and "active" not in stored
+
+
+def test_cancel_does_not_reopen_a_finished_job(job_db, monkeypatch):
+    job = asyncio.run(jobs.submit_job("octo", "hello", "main"))
+    progress = IngestProgress()
+    jobs._active[str(job["_id"])] = progress
+    stale = dict(job)
+    # The run stores its final state after cancel_job has read the job
+    job_db["jobs_collection"].update_one(
+        {"_id": job["_id"]}, {"$set": {"status": "completed"}, "$unset": {"active": ""}}
+    )
+    collection = jobs.async_jobs_collection
+    reads = iter([stale])
+
+    async def find_one(query, *args, **kwargs):
+        return next(reads, None) or collection.sync.find_one(query, *args, **kwargs)
+
+    monkeypatch.setattr(collection, "find_one", find_one, raising=False)
+
+    result = asyncio.run(jobs.cancel_job(str(job["_id"])))
+
+    assert result["status"] == "completed"
+    assert job_db["jobs_collection"].find_one({"_id": job["_id"]})["status"] == "completed"
+
+
+def test_cancelled_orphan_is_settled(job_db):
+    job = asyncio.run(jobs.submit_job("octo", "hello", "main"))
+    result = asyncio.run(jobs.cancel_job(str(job["_id"])))
+    assert result["status"] == "cancelled"
+    assert "active" not in result
+
+
+def test_job_cancelled_before_start_leaves_the_catalogue_alone(job_db):
+    job = asyncio.run(jobs.submit_job("octo", "hello", "main"))
+    progress = IngestProgress()
+    progress.cancel()
+    jobs._active[str(job["_id"])] = progress
+
+    jobs._run(job["_id"], "octo", "hello", "main", progress)
+
+    stored = job_db["jobs_collection"].find_one({"_id": job["_id"]})
+    assert stored["status"] == "cancelled" and "active" not in stored
+    assert str(job["_id"]) not in jobs._active
+    assert job_db["repos_collection"].count_documents({}) == 0
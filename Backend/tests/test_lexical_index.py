@@ -0,0 +1,53 @@
+import sqlite3
+
+import pytest
+from conftest import FailingConnection
+from qdrant_client.models import PointStruct
+
+from app.db.lexical.index import LexicalIndex
+
+
+def _point(n: int, path: str, text: str) -> PointStruct:
+    return PointStruct(id=f"00000000-0000-0000-0000-{n:012d}", vector=[0.0], payload={"path": path, "text": text})
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = LexicalIndex(str(tmp_path / "lexical.sqlite3"))
+    yield index
+    index.close()
+
+
+def _paths(index: LexicalIndex, query: str) -> set[str]:
+    return {hit.payload["path"] for hit in index.search(query)}
+
+
+def test_replace_and_delete(index):
+    index.clear()
+    index.add([_point(1, "a.py", "def handler(): pass"), _point(2, "b.py", "class Greeter: pass")])
+    index.done_loading()
+    index.add([_point(1, "a.py", "def renamed(): pass")])
+    assert _paths(index, "handler") == set()
+    assert _paths(index, "renamed") == {"a.py"}
+    index.delete_paths(["b.py"])
+    assert index.count() == 1
+
+
+@pytest.mark.parametrize("operation, prefix", [
+    (lambda index: index.add([_point(3, "c.py", "def third(): pass")]), "INSERT INTO chunks"),
+    (lambda index: index.delete_paths(["a.py"]), "DELETE FROM chunk_keys"),
+    (lambda index: index.clear(), "DELETE FROM chunk_keys"),
+], ids=["add", "delete_paths", "clear"])
+def test_failed_write_is_rolled_back(index, operation, prefix):
+    index.add([_point(1, "a.py", "def handler(): pass")])
+    index._conn = FailingConnection(index._conn, prefix)
+
+    with pytest.raises(sqlite3.OperationalError):
+        operation(index)
+
+    # Nothing of the failed write stayed, and the connection takes new transactions
+    assert not index._conn.in_transaction
+    assert index.count() == 1
+    assert _paths(index, "handler") == {"a.py"}
+    index.add([_point(4, "d.py", "def fourth(): pass")])
+    assert _paths(index, "fourth") == {"d.py"}
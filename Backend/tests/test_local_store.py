@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from qdrant_client.models import PointStruct
+
+from app.db.local import store
+from app.db.local.store import LocalVectorStore
+from app.utils.embeddor import embedding_dimensions
+
+
+def _points(start: int, count: int, path: str = "a.py") -> list[PointStruct]:
+    rng = np.random.default_rng(start)
+    return [
+        PointStruct(id=f"p{i}", vector=rng.normal(size=embedding_dimensions()).tolist(), payload={"path": path, "n": i})
+        for i in range(start, start + count)
+    ]
+
+
+@pytest.fixture
+def local_store(monkeypatch):
+    vectors = LocalVectorStore(max_segments=4, compact_ratio=0.3)
+    vectors.ensure_collection("local_store_test", recreate=True)
+    written = []
+    write_segment = store._Collection.write_segment
+
+    def counting(self, matrix, ids, payloads):
+        written.append(len(ids))
+        return write_segment(self, matrix, ids, payloads)
+
+    monkeypatch.setattr(store._Collection, "write_segment", counting)
+    vectors.written = written
+    yield vectors
+    vectors.delete_collection("local_store_test")
+
+
+def test_many_batches_are_merged_size_tiered(local_store):
+    batches, size = 200, 10
+    for b in range(batches):
+        local_store.upsert("local_store_test", _points(b * size, size))
+
+    total = batches * size
+    assert local_store.count("local_store_test") == total
+    collection = local_store._get("local_store_test")
+    assert len(collection.segments) <= 4
+    # Rewriting everything on every merge would copy ~total^2 / (2 * size * max_segments) rows
+    assert sum(local_store.written) < 8 * total
+
+    query = _points(1230, size)[4]
+    hit = local_store.search_batch("local_store_test", [query.vector], limit=1)[0][0]
+    assert hit.id == "p1234" and hit.payload["n"] == 1234
+
+
+def test_merge_keeps_replaced_and_deleted_points_out(local_store):
+    for b in range(6):
+        local_store.upsert("local_store_test", _points(b * 10, 10, path=f"f{b}.py"))
+    local_store.upsert("local_store_test", _points(0, 5, path="f0.py"))  # replaces p0..p4
+    local_store.delete_paths("local_store_test", ["f5.py"])
+
+    assert local_store.count("local_store_test") == 50
+    for b in range(6):
+        local_store.upsert("local_store_test", _points(100 + b * 10, 10, path="g.py"))
+    collection = local_store._get("local_store_test")
+    assert local_store.count("local_store_test") == 110
+    assert sum(int(s.alive.sum()) for s in collection.segments) == 110
+    assert "p55" not in collection.locations
+
+    # A fresh process sees the same live rows
+    reopened = LocalVectorStore()
+    assert reopened.count("local_store_test") == 110
+    hits = reopened.search_batch("local_store_test", [_points(0, 5)[3].vector], limit=1, paths=["f0.py"])[0]
+    assert hits[0].id == "p3"
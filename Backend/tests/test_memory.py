@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from conftest import AsyncCollection
+from langchain_core.messages import AIMessage
+
+from app.core.config import HISTORY_MAX_TURNS, HISTORY_SUMMARY_EVERY
+from app.services.llm import memory
+
+
+class FakeLLM:
+    def __init__(self, reply: str = "Earlier: the user set up the project."):
+        self.reply = reply
+        self.prompts = []
+
+    async def ainvoke(self, prompt: str):
+        self.prompts.append(prompt)
+        return AIMessage(content=self.reply)
+
+
+@pytest.fixture
+def topics(mongo_db, monkeypatch):
+    collection = mongo_db["topics_collection"]
+    monkeypatch.setattr(memory, "async_topics_collection", AsyncCollection(collection))
+    return collection
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    llm = FakeLLM()
+    monkeypatch.setattr(memory, "llm", llm)
+    return llm
+
+
+def _topic(topics, count: int, **fields) -> str:
+    messages = [{"role": "human" if i % 2 == 0 else "ai", "content": f"message {i}"} for i in range(count)]
+    return str(topics.insert_one({"owner": "octo", "repo_name": "hello", "messages": messages, **fields}).inserted_id)
+
+
+async def _schedule_and_wait(topic_id: str):
+    memory.schedule_summary("octo", "hello", topic_id)
+    await asyncio.gather(*memory._tasks)
+
+
+def test_summary_rolls_forward_in_the_background(topics, fake_llm):
+    total = 2 * HISTORY_MAX_TURNS + 4
+    topic_id = _topic(topics, total)
+
+    asyncio.run(_schedule_and_wait(topic_id))
+
+    keep = HISTORY_MAX_TURNS - min(max(HISTORY_SUMMARY_EVERY, 1), HISTORY_MAX_TURNS)
+    upto = total - 2 * keep
+    topic = topics.find_one()
+    assert topic["summary"] == fake_llm.reply
+    assert topic["summarized_messages"] == upto
+    prompt = fake_llm.prompts[0]
+    assert f"message {upto - 1}" in prompt and f"message {upto}\n" not in prompt
+    assert memory._summarizing == set()
+
+
+def test_summary_continues_from_the_covered_messages(topics, fake_llm):
+    total = 2 * HISTORY_MAX_TURNS + 12
+    topic_id = _topic(topics, total, summary="Old summary.", summarized_messages=4)
+
+    assert asyncio.run(memory.roll_summary("octo", "hello", topic_id))
+
+    prompt = fake_llm.prompts[0]
+    assert "Old summary." in prompt
+    assert "message 3\n" not in prompt and "message 4\n" in prompt
+    assert topics.find_one()["summarized_messages"] > 4
+
+
+def test_short_topics_are_left_alone(topics, fake_llm):
+    topic_id = _topic(topics, 2 * HISTORY_MAX_TURNS)
+    assert not asyncio.run(memory.roll_summary("octo", "hello", topic_id))
+    assert fake_llm.prompts == []
+    assert "summary" not in topics.find_one()
+
+
+def test_failures_are_logged(topics, monkeypatch, caplog):
+    class BrokenLLM:
+        async def ainvoke(self, prompt):
+            raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(memory, "llm", BrokenLLM())
+    topic_id = _topic(topics, 2 * HISTORY_MAX_TURNS + 4)
+
+    assert not asyncio.run(memory.roll_summary("octo", "hello", topic_id))
+    assert "model unavailable" in caplog.text
+    assert "summary" not in topics.find_one()
@@ -0,0 +1,77 @@
+import pytest
+
+from app.db.lexical.index import get_lexical_index
+from app.db.vector_store import vector_store
+from app.services.ingestion import pipeline
+from app.services.ingestion.pipeline import IngestPipeline
+from app.services.ingestion.progress import IngestProgress, IngestionCancelled
+
+FILES = {
+    "src/app.py": b"def handler(event):\n    return event\n",
+    "src/broken.py": b"def explode():\n    raise RuntimeError('BOOM')\n",
+    "README.md": b"# Title\n\nSome words.\n",
+    "empty.txt": b"",
+    "latin1.txt": "caf\xe9".encode("latin-1"),
+}
+
+
+def _run(collection: str, files: dict, progress=None) -> IngestPipeline:
+    vector_store.ensure_collection(collection, recreate=True)
+    get_lexical_index(collection).clear()
+    with IngestPipeline(collection, "main", progress=progress) as ingest:
+        for rel_path, data in files.items():
+            ingest.submit(rel_path, data)
+    get_lexical_index(collection).done_loading()
+    return ingest
+
+
+def test_pipeline_embeds_and_indexes_every_file():
+    progress = IngestProgress()
+    ingest = _run("pipeline_ok", FILES, progress)
+
+    assert ingest.failed == []
+    assert sorted(ingest.file_stats) == sorted(FILES)
+    points = vector_store.count("pipeline_ok")
+    assert points == get_lexical_index("pipeline_ok").count() == 3
+    snapshot = progress.snapshot()
+    assert snapshot["files_embedded"] == len(FILES)
+    assert snapshot["chunks_embedded"] == snapshot["points_upserted"] == points
+
+
+def test_pipeline_reports_files_whose_batch_failed_to_embed(monkeypatch):
+    create = pipeline.create_embeddings_batch
+
+    def failing(texts):
+        if any("BOOM" in text for text in texts):
+            raise RuntimeError("embedding endpoint down")
+        return create(texts)
+
+    monkeypatch.setattr(pipeline, "create_embeddings_batch", failing)
+    monkeypatch.setattr(pipeline, "EMBEDDING_BATCH_MAX_ITEMS", 1)
+    ingest = _run("pipeline_embed_failure", FILES)
+
+    assert ingest.failed == ["src/broken.py"]
+    assert {hit.payload["path"] for hit in get_lexical_index("pipeline_embed_failure").search("handler")} == {
+        "src/app.py"
+    }
+
+
+def test_pipeline_reports_files_whose_chunking_failed(monkeypatch):
+    chunk_text = pipeline.chunk_text
+
+    def failing(path, *args, **kwargs):
+        if path == "README.md":
+            raise ValueError("chunker crashed")
+        return chunk_text(path, *args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "chunk_text", failing)
+    ingest = _run("pipeline_chunk_failure", FILES)
+
+    assert ingest.failed == ["README.md"]
+
+
+def test_cancelled_pipeline_raises():
+    progress = IngestProgress()
+    progress.cancel()
+    with pytest.raises(IngestionCancelled):
+        _run("pipeline_cancelled", FILES, progress)
@@ -0,0 +1,55 @@
+import sqlite3
+
+import pytest
+from conftest import FailingConnection
+
+from app.db.symbols.index import SymbolIndex
+
+
+def _definition(name: str, line: int = 1) -> dict:
+    return {"name": name, "kind": "function", "line": line, "end_line": line, "container": None,
+            "signature": f"def {name}()"}
+
+
+def _reference(name: str, line: int = 1) -> dict:
+    return {"name": name, "kind": "call", "line": line, "container": None, "detail": None, "text": f"{name}()"}
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SymbolIndex(str(tmp_path / "symbols.sqlite3"))
+
+
+def _defined_in(index: SymbolIndex, name: str) -> set[str]:
+    return {d["path"] for d in index.find_definitions(name)}
+
+
+@pytest.mark.parametrize("operation, prefix", [
+    (lambda index: index.replace_file("a.py", [_definition("renamed")], []), "INSERT INTO refs"),
+    (lambda index: index.delete_paths(["a.py"]), "DELETE FROM refs"),
+    (lambda index: index.clear(), "DELETE FROM refs"),
+], ids=["replace_file", "delete_paths", "clear"])
+def test_failed_write_is_rolled_back(index, operation, prefix):
+    index.replace_file("a.py", [_definition("handler")], [_reference("greet", 2)])
+    index._conn = FailingConnection(index._conn, prefix)
+
+    with pytest.raises(sqlite3.OperationalError):
+        operation(index)
+
+    # The file keeps the symbols it had, and the connection takes new transactions
+    assert not index._conn.in_transaction
+    assert index.count() == {"definitions": 1, "references": 1}
+    assert _defined_in(index, "handler") == {"a.py"}
+    assert _defined_in(index, "renamed") == set()
+    index.replace_file("b.py", [_definition("fourth")], [])
+    assert _defined_in(index, "fourth") == {"b.py"}
+
+
+def test_malformed_symbols_leave_the_file_untouched(index):
+    index.replace_file("a.py", [_definition("handler")], [])
+
+    with pytest.raises(KeyError):
+        index.replace_file("a.py", [{"name": "broken"}], [])
+
+    assert not index._conn.in_transaction
+    assert _defined_in(index, "handler") == {"a.py"}
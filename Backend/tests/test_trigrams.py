@@ -0,0 +1,107 @@
+import re
+import sqlite3
+
+import pytest
+from conftest import FailingConnection
+
+from app.db.trigrams.index import TrigramIndex
+from app.utils import trigrams as trigram_utils
+from app.utils.trigrams import query_trigrams, trigrams
+
+
+def test_trigrams_are_lowercased_and_distinct():
+    assert trigrams("AbcdAbcd") == {b"abc", b"bcd", b"cda", b"dab"}
+    assert trigrams("ab") == set()
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("hello", [{b"hel", b"ell", b"llo"}]),
+    ("HeLLo", [{b"hel", b"ell", b"llo"}]),
+    ("foo.*bar", [{b"foo", b"bar"}]),
+    ("foo|barbaz", [{b"foo"}, {b"bar", b"arb", b"rba", b"baz"}]),
+    (r"\bclass\s+Foo\b", [{b"cla", b"las", b"ass", b"foo"}]),
+    ("(abc)+x", [{b"abc"}]),
+    ("x{0,3}abcd", [{b"abc", b"bcd"}]),
+])
+def test_query_trigrams(pattern, expected):
+    assert query_trigrams(pattern) == expected
+
+
+@pytest.mark.parametrize("pattern", ["a.b", "(abc)?xy", "ab[cd]ef", "foo|ba", ".*"])
+def test_patterns_without_a_required_literal_search_every_file(pattern):
+    assert query_trigrams(pattern) is None
+
+
+def test_parser_failure_falls_back_to_a_full_scan(monkeypatch):
+    monkeypatch.setattr(trigram_utils, "_required", lambda parsed: 1 / 0)
+    assert query_trigrams("hello") is None
+    assert query_trigrams("([") is None
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = TrigramIndex(str(tmp_path / "trigrams.sqlite3"))
+    index.add_file("a.py", "def handler(event):\n    return event\n")
+    index.add_file("b.py", "class Greeter:\n    pass\n")
+    index.add_file("c.md", "The handler greets people.\n")
+    index.flush()
+    return index
+
+
+def test_candidates(index):
+    assert index.candidates(query_trigrams("handler")) == ["a.py", "c.md"]
+    assert index.candidates(query_trigrams(r"def\s+handler")) == ["a.py"]
+    assert index.candidates(query_trigrams("Greeter|event")) == ["a.py", "b.py"]
+    assert index.candidates(query_trigrams("missing")) == []
+    assert index.candidates(None) == ["a.py", "b.py", "c.md"]
+    # Trigrams are case-insensitive; the regex itself decides case later
+    assert index.candidates(query_trigrams("GREETER", re.IGNORECASE)) == ["b.py"]
+
+
+def test_replaced_and_deleted_files(index):
+    index.add_file("a.py", "def other():\n    pass\n")
+    index.delete_paths(["c.md"])
+    index.flush()
+    assert index.candidates(query_trigrams("handler")) == []
+    assert index.candidates(query_trigrams("other")) == ["a.py"]
+    assert sorted(index.paths().values()) == ["a.py", "b.py"]
+
+
+def test_unflushed_files_are_not_searched(index):
+    index.add_file("d.py", "unique_token = 1\n")
+    assert index.candidates(query_trigrams("unique_token")) == []
+    index.flush()
+    assert index.candidates(query_trigrams("unique_token")) == ["d.py"]
+
+
+def test_clear(index):
+    index.clear()
+    assert index.candidates(None) == []
+    assert not index.needs_compaction()
+
+
+def test_failed_flush_keeps_the_buffer(index):
+    index.add_file("d.py", "unique_token = 1\n")
+    index._conn = FailingConnection(index._conn, "INSERT INTO postings")
+
+    with pytest.raises(sqlite3.OperationalError):
+        index.flush()
+
+    assert not index._conn.in_transaction
+    assert index.candidates(query_trigrams("unique_token")) == []
+    # The next flush writes what the failed one couldn't
+    index.flush()
+    assert index.candidates(query_trigrams("unique_token")) == ["d.py"]
+    assert index.candidates(query_trigrams("handler")) == ["a.py", "c.md"]
+
+
+def test_failed_clear_is_rolled_back(index):
+    index._conn = FailingConnection(index._conn, "DELETE FROM postings")
+
+    with pytest.raises(sqlite3.OperationalError):
+        index.clear()
+
+    assert not index._conn.in_transaction
+    assert index.candidates(query_trigrams("handler")) == ["a.py", "c.md"]
+    index.clear()
+    assert index.candidates(None) == []
@@ -144,7 +144,7 @@ export default function Chat() {
         repo: parsed.repo
       })
       
-      if (res.data.status === 200) {
+      if (res.status === 202) {
         // Save to recent repos
         const repoEntry = { owner: parsed.owner, repo: parsed.repo, addedAt: Date.now() }
         const existingRepos = JSON.parse(localStorage.getItem('gitdocs:repos') || '[]')
@@ -109,8 +109,7 @@ export default function Home() {
       owner: parsed.owner,
       repo: parsed.repo,
     });
-    const data = res.data;
-    if (data.status == 200) {
+    if (res.status === 202) {
       // Save to recent repos
       const repoEntry = {
         owner: parsed.owner,